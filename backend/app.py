@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 import firebase_admin
@@ -6,10 +6,13 @@ from firebase_admin import credentials, auth
 import os
 from dotenv import load_dotenv
 from datetime import datetime
-import openpyxl
-from openpyxl import Workbook
-from io import BytesIO
 import logging
+import json
+import base64
+import tempfile
+import xlsxwriter
+from write_behind import WriteBehindBuffer
+from column_widths import ColumnWidths
 
 # Load environment variables
 load_dotenv()
@@ -65,7 +68,7 @@ class User(db.Model):
     role = db.Column(db.String(50), default='user')  # Default role
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
@@ -80,6 +83,18 @@ class User(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+def flush_user_updates(updates):
+    """Write buffered per-user column updates in one transaction"""
+    with app.app_context():
+        db.session.execute(
+            db.update(User),
+            [{'uid': uid, **values} for uid, values in updates.items()]
+        )
+        db.session.commit()
+
+# Login timestamps are coalesced instead of committed on every sign-in
+login_updates = WriteBehindBuffer(flush_user_updates, name="flask-users")
+
 @app.route('/api/auth/google', methods=['POST'])
 def google_auth():
     """
@@ -113,13 +128,15 @@ def google_auth():
         
         if existing_user:
             logger.info(f"User {email} already exists, updating last login")
-            # Update last login time
-            existing_user.updated_at = datetime.utcnow()
-            db.session.commit()
+            # Update last login time through the write-behind buffer
+            now = datetime.utcnow()
+            login_updates.put(uid, {'updated_at': now})
+            user_dict = existing_user.to_dict()
+            user_dict['updated_at'] = now.isoformat()
             
             return jsonify({
                 'success': True,
-                'user': existing_user.to_dict(),
+                'user': user_dict,
                 'isNewUser': False
             })
         else:
@@ -168,17 +185,67 @@ def google_auth():
         logger.error(f"Error in Google Auth: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+USER_FIELDS = ('uid', 'email', 'name', 'picture', 'role', 'created_at', 'updated_at')
+MAX_PAGE_SIZE = 1000
+# Users fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+# Workbooks up to this many bytes stay in memory; larger ones spill to a temp file
+EXPORT_SPOOL_BYTES = int(os.getenv('EXPORT_SPOOL_BYTES', 8 * 1024 * 1024))
+# Bytes read from the finished workbook per chunk of the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def encode_cursor(user):
+    """Opaque keyset cursor for a user's (created_at, uid) position"""
+    position = [user.created_at.isoformat() if user.created_at else None, user.uid]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def users_query(cursor=None):
+    """Users newest first, starting after the keyset cursor"""
+    query = db.session.query(User).order_by(User.created_at.desc(), User.uid.desc())
+    if cursor:
+        created_at, uid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        query = query.filter(
+            db.tuple_(User.created_at, User.uid) < (datetime.fromisoformat(created_at), uid)
+        )
+    return query
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
     """
-    Get all users (admin only)
+    Get users (admin only)
+    - limit / cursor: keyset pagination on (created_at, uid)
+    - fields: comma-separated projection
+    - format=ndjson: stream every user, one JSON object per line
     """
     try:
-        users = db.session.query(User).all()
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or list(USER_FIELDS)
+        unknown = set(fields) - set(USER_FIELDS)
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+
+        def project(user):
+            data = user.to_dict()
+            return {field: data[field] for field in fields}
+
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                # yield_per keeps one batch of ORM objects in memory at a time
+                for user in users_query().yield_per(500):
+                    yield json.dumps(project(user)) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        limit = max(1, min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE))
+        try:
+            users = users_query(request.args.get('cursor')).limit(limit + 1).all()
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        next_cursor = encode_cursor(users[limit - 1]) if len(users) > limit else None
+        users = users[:limit]
         return jsonify({
             'success': True,
-            'users': [user.to_dict() for user in users],
-            'count': len(users)
+            'users': [project(user) for user in users],
+            'count': len(users),
+            'next_cursor': next_cursor
         })
     except Exception as e:
         logger.error(f"Error fetching users: {str(e)}")
@@ -188,65 +255,64 @@ def get_users():
 def export_users():
     """
     Export all users to Excel file
-    - Fetch all users from SQL database
-    - Generate Excel file with user details
-    - Return file as download
+    - Stream users from SQL database in batches
+    - Write them to a constant-memory XlsxWriter workbook in a spooled temp file
+    - Send the finished file in chunks
     """
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
     try:
         logger.info("Starting user export to Excel")
         
-        # Fetch all users from database
-        users = db.session.query(User).all()
-        logger.info(f"Found {len(users)} users to export")
-        
-        # Create Excel workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Users"
-        
-        # Add headers
         headers = ['UID', 'Name', 'Email', 'Role', 'Created At', 'Updated At']
-        for col, header in enumerate(headers, 1):
-            ws.cell(row=1, column=col, value=header)
-        
-        # Add user data
-        for row, user in enumerate(users, 2):
-            ws.cell(row=row, column=1, value=user.uid)
-            ws.cell(row=row, column=2, value=user.name)
-            ws.cell(row=row, column=3, value=user.email)
-            ws.cell(row=row, column=4, value=user.role)
-            ws.cell(row=row, column=5, value=user.created_at.strftime('%Y-%m-%d %H:%M:%S') if user.created_at else '')
-            ws.cell(row=row, column=6, value=user.updated_at.strftime('%Y-%m-%d %H:%M:%S') if user.updated_at else '')
+        # User-entered text is never interpreted as a formula or hyperlink
+        workbook = xlsxwriter.Workbook(spool, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False
+        })
+        worksheet = workbook.add_worksheet('Users')
+        worksheet.write_row(0, 0, headers)
         
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        # yield_per fetches in batches (a server-side cursor where the driver has one)
+        widths = ColumnWidths(headers)
+        count = 0
+        for count, user in enumerate(db.session.query(User).yield_per(EXPORT_BATCH_SIZE), 1):
+            values = [
+                user.uid,
+                user.name,
+                user.email,
+                user.role,
+                user.created_at.strftime('%Y-%m-%d %H:%M:%S') if user.created_at else '',
+                user.updated_at.strftime('%Y-%m-%d %H:%M:%S') if user.updated_at else ''
+            ]
+            worksheet.write_row(count, 0, values)
+            widths.add(values)
         
-        # Save to BytesIO
-        excel_file = BytesIO()
-        wb.save(excel_file)
-        excel_file.seek(0)
+        # constant_memory sheets accept column widths after their rows
+        for index, width in enumerate(widths.widths()):
+            worksheet.set_column(index, index, width)
+        workbook.close()
+        size = spool.tell()
+        spool.seek(0)
+        logger.info(f"Exported {count} users to Excel")
         
-        logger.info("Excel file generated successfully")
+        def chunks():
+            with spool:
+                while True:
+                    chunk = spool.read(EXPORT_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    yield chunk
         
-        # Return file as download
-        return send_file(
-            excel_file,
+        filename = f'users_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        return Response(
+            chunks(),
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'users_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+            headers={'Content-Disposition': f'attachment; filename={filename}', 'Content-Length': str(size)}
         )
         
     except Exception as e:
+        spool.close()
         logger.error(f"Error exporting users: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
@@ -296,6 +362,10 @@ def init_db():
     try:
         with app.app_context():
             db.create_all()
+            # create_all skips tables that already exist, so add indexes declared
+            # on them since (created_at, for keyset paging) to older databases
+            for index in User.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
             logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
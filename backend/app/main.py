@@ -1,18 +1,33 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from typing import Optional, Dict, Any
 import os
+import json
+import asyncio
 import logging
+from datetime import datetime
 from dotenv import load_dotenv
-from ml_agents.student_agent import get_student_opportunities
+from ml_agents.student_agent import opportunity_cache
+from ml_agents.fanout import fan_out
+from ml_agents.utils import search_metrics
+from ml_agents.search_cache import search_cache
+from ml_agents.single_flight import single_flight
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import db
+from database import db, BULK_IMPORT_CHUNK_SIZE
+from async_database import async_db
+from password_hasher import password_hasher, HashQueueFull
+from session_store import session_store
+from user_import import IMPORT_FORMATS, parse_user_records, csv_header, iter_body_lines, merge_reports
 from excel_service import excel_service
+from export_formats import EXPORT_FORMATS, ExportFormatError
+from file_download import resolve_download_path, file_download_response
+from export_jobs import export_jobs, ExportQueueFull
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +40,8 @@ app = FastAPI(title="WealthSage API", version="1.0.0")
 
 # Security
 security = HTTPBearer()
+# Roles allowed to call the /api/admin endpoints, compared case-insensitively
+ADMIN_ROLES = {role.strip().lower() for role in os.getenv('ADMIN_ROLES', 'admin').split(',') if role.strip()}
 
 # Add CORS middleware
 app.add_middleware(
@@ -48,6 +65,15 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class ProfileUpdate(BaseModel):
+    university: Optional[str] = None
+    major: Optional[str] = None
+    graduation_year: Optional[int] = None
+    monthly_income: Optional[float] = None
+    savings_goal: Optional[float] = None
+    current_savings: Optional[float] = None
+    budget_limit: Optional[float] = None
+
 class UserResponse(BaseModel):
     id: int
     email: str
@@ -71,10 +97,69 @@ async def startup_event():
     try:
         db.init_database()
         logger.info("Database initialized successfully")
+        session_store.start_sweeper()
+        excel_service.signup_log.start_compactor()
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled database connections"""
+    session_store.stop_sweeper()
+    excel_service.signup_log.stop_compactor()
+    export_jobs.close()
+    opportunity_cache.close()
+    fan_out.close()
+    async_db.close()
+    password_hasher.close()
+    db.close()
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    """Resolve the bearer session token to the authenticated user"""
+    token = credentials.credentials
+    user = session_store.get_cached(token)
+    if user is None:
+        user = await async_db.run(session_store.load, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired session",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+async def require_admin(user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+    """The authenticated user, if their role is one of ADMIN_ROLES"""
+    if str(user.get('role') or '').lower() not in ADMIN_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
+
+def parse_fields(fields: Optional[str]) -> Optional[list]:
+    """Split a comma-separated ?fields= projection"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+# Files the download route serves, by extension; anything else in the export dir is internal
+DOWNLOAD_MEDIA_TYPES = {f".{extension}": media_type for media_type, extension in EXPORT_FORMATS.values()}
+# Only generated exports are served; the signup log, cache manifest and locks share the directory
+DOWNLOAD_PREFIX = "wealthsage_users_"
+
+def download_media_type(filename: str) -> Optional[str]:
+    """Media type of a downloadable export, or None for any other file"""
+    compacted = os.path.basename(excel_service.signup_log.workbook_path)
+    if not filename.startswith(DOWNLOAD_PREFIX) and filename != compacted:
+        return None
+    return DOWNLOAD_MEDIA_TYPES.get(os.path.splitext(filename)[1])
+
+def ndjson_response(rows) -> StreamingResponse:
+    """Stream rows as newline-delimited JSON without building the full result"""
+    return StreamingResponse(
+        (json.dumps(row, default=str) + "\n" for row in rows),
+        media_type="application/x-ndjson"
+    )
+
 @app.get("/")
 async def read_root():
     """Health check endpoint"""
@@ -85,10 +170,7 @@ async def health_check():
     """Detailed health check"""
     try:
         # Test database connection
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
+        await async_db.ping()
 
         return {
             "status": "healthy",
@@ -99,12 +181,31 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail=f"Service unhealthy: {e}")
 
+@app.get("/api/admin/stats")
+async def admin_stats():
+    """Runtime statistics for the API process"""
+    return {
+        "database_pool": db.pool_stats(),
+        "database_executor": async_db.stats(),
+        "password_hashing": password_hasher.stats(),
+        "sessions": session_store.stats(),
+        "write_behind": db.user_updates.stats(),
+        "user_cache": db.user_cache_stats(),
+        "signup_log": excel_service.signup_log.stats(),
+        "export_jobs": export_jobs.stats(),
+        "export_cache": excel_service.cache.stats(),
+        "opportunity_search": search_metrics.stats(),
+        "opportunity_search_cache": search_cache.stats(),
+        "opportunity_cache": opportunity_cache.stats(),
+        "opportunity_fetches": single_flight.stats()
+    }
+
 @app.post("/api/auth/signup")
 async def signup(user_data: UserSignup):
     """User registration endpoint with Excel export"""
     try:
         # Create user in database
-        user = db.create_user({
+        user = await async_db.create_user({
             'email': user_data.email,
             'password': user_data.password,
             'first_name': user_data.first_name,
@@ -115,7 +216,7 @@ async def signup(user_data: UserSignup):
 
         # Export user to Excel
         try:
-            excel_file = excel_service.export_user_on_signup(user)
+            excel_file = await run_in_threadpool(excel_service.export_user_on_signup, user)
             if excel_file:
                 logger.info(f"User {user['email']} exported to Excel: {excel_file}")
         except Exception as excel_error:
@@ -123,7 +224,7 @@ async def signup(user_data: UserSignup):
             # Don't fail signup if Excel export fails
 
         # Create session
-        session_token = db.create_session(user['id'])
+        session_token = await async_db.create_session(user['id'])
 
         return {
             "message": "User created successfully",
@@ -138,6 +239,9 @@ async def signup(user_data: UserSignup):
             "session_token": session_token
         }
 
+    except HashQueueFull as e:
+        logger.warning(f"Signup rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Signup error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -147,7 +251,7 @@ async def login(credentials: UserLogin):
     """User login endpoint"""
     try:
         # Authenticate user
-        user = db.authenticate_user(credentials.email, credentials.password)
+        user = await async_db.authenticate_user(credentials.email, credentials.password)
 
         if not user:
             raise HTTPException(
@@ -156,7 +260,7 @@ async def login(credentials: UserLogin):
             )
 
         # Create session
-        session_token = db.create_session(user['id'])
+        session_token = await async_db.create_session(user['id'])
 
         return {
             "message": "Login successful",
@@ -173,16 +277,67 @@ async def login(credentials: UserLogin):
 
     except HTTPException:
         raise
+    except HashQueueFull as e:
+        logger.warning(f"Login rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Login error: {e}")
         raise HTTPException(status_code=500, detail="Login failed")
 
+@app.get("/api/auth/me")
+async def read_current_user(user: Dict[str, Any] = Depends(get_current_user)):
+    """Return the user behind the current session token"""
+    return {
+        "user": {
+            "id": user['id'],
+            "email": user['email'],
+            "first_name": user['first_name'],
+            "last_name": user['last_name'],
+            "role": user['role'],
+            "display_name": user['display_name']
+        }
+    }
+
+@app.put("/api/users/me/profile")
+async def update_profile(profile: ProfileUpdate, user: Dict[str, Any] = Depends(get_current_user)):
+    """Update the current user's profile"""
+    try:
+        fields = profile.dict(exclude_unset=True)
+        updated = await async_db.update_user_profile(user['id'], fields)
+        return {
+            "message": "Profile updated",
+            "profile": {field: updated.get(field) for field in (
+                'university', 'monthly_income', 'savings_goal', 'current_savings', 'budget_limit'
+            )}
+        }
+    except Exception as e:
+        logger.error(f"Profile update error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/users/me/income-sources")
+async def list_income_sources(limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+                              format: str = "json", user: Dict[str, Any] = Depends(get_current_user)):
+    """Keyset-paginated income sources for the current user; format=ndjson streams all of them"""
+    try:
+        if format == "ndjson":
+            return ndjson_response(db.iter_income_sources(user['id'], parse_fields(fields)))
+        return await async_db.list_income_sources(user['id'], limit, cursor, parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/auth/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """End the current session"""
+    await async_db.run(session_store.invalidate, credentials.credentials)
+    return {"message": "Logged out"}
+
 @app.get("/api/opportunities/{category}")
 async def read_opportunities(category: str):
     """API endpoint for fetching opportunities"""
     try:
-        opportunities = get_student_opportunities(category)
-        return {"category": category, "opportunities": opportunities}
+        # Concurrent misses await one shared refresh instead of each holding a thread
+        result = await opportunity_cache.get_async(category)
+        return {"category": category, **result}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -190,35 +345,182 @@ async def read_opportunities(category: str):
         raise HTTPException(status_code=500, detail="Failed to fetch opportunities")
 
 @app.get("/api/admin/export-users")
-async def export_users():
-    """Export all users to Excel file"""
+async def export_users(include_users: bool = True, format: str = "xlsx", since: Optional[str] = None):
+    """
+    Export all users. format=xlsx (default) writes an Excel file and returns its
+    download link; include_users=false writes only Summary and Statistics.
+    format=csv, ndjson or parquet streams typed rows straight from the database.
+    since=<timestamp|export_id> exports only users changed since then.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if format != 'xlsx':
+        try:
+            export, chunks = await run_in_threadpool(excel_service.stream_users, format, since)
+        except ExportFormatError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        media_type, extension = EXPORT_FORMATS[format]
+        filename = f"wealthsage_users_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        # A sync iterator: Starlette pulls it on the threadpool, off the event loop
+        return StreamingResponse(
+            chunks, media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                # Pass back as since= for the next delta once the body is complete
+                "X-Export-Id": export['export_id'],
+                "X-Export-Watermark": export['watermark'].isoformat()
+            }
+        )
+    try:
+        since = await run_in_threadpool(excel_service.resolve_since, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        excel_file = excel_service.export_users_to_excel()
-        if excel_file:
+        # Runs as an export job so it shares the worker pool and never blocks the event loop
+        job = export_jobs.submit(include_users=include_users, since=since)
+        try:
+            await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            if not job.future.cancelled():
+                raise  # The request itself was cancelled
+        if job.future.cancelled() or job.status == 'cancelled':
+            raise HTTPException(status_code=409, detail=f"Export job {job.id} was cancelled")
+        if job.status == 'completed':
             return {
                 "message": "Users exported successfully",
-                "file_path": excel_file,
-                "download_url": f"/api/admin/download/{os.path.basename(excel_file)}"
+                "job_id": job.id,
+                "file_path": job.result['file_path'],
+                "download_url": f"/api/admin/download/{os.path.basename(job.result['file_path'])}",
+                "rows": job.result['rows'],
+                "rows_per_second": job.result['rows_per_second'],
+                "cached": job.result['cached'],
+                "export_id": job.result['export_id'],
+                "since": job.result['since'],
+                "watermark": job.result['watermark']
             }
         else:
-            raise HTTPException(status_code=500, detail="Failed to export users")
+            raise HTTPException(status_code=500, detail=job.error or "Failed to export users")
+    except HTTPException:
+        raise
+    except ExportQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error exporting users: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/admin/download/{filename}")
-async def download_file(filename: str):
-    """Download exported Excel file"""
+@app.post("/api/admin/export-jobs", status_code=202)
+async def create_export_job(include_users: bool = True, since: Optional[str] = None):
+    """Queue a background export; poll the returned job for progress"""
     try:
-        file_path = os.path.join("user_exports", filename)
-        if os.path.exists(file_path):
-            return FileResponse(
-                path=file_path,
-                filename=filename,
-                media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:
-            raise HTTPException(status_code=404, detail="File not found")
+        since = await run_in_threadpool(excel_service.resolve_since, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        job = export_jobs.submit(include_users=include_users, since=since)
+    except ExportQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+@app.get("/api/admin/export-jobs")
+async def list_export_jobs():
+    """All export jobs still within the retention window"""
+    return {"jobs": [job.to_dict() for job in export_jobs.list()]}
+
+@app.get("/api/admin/export-jobs/{job_id}")
+async def get_export_job(job_id: str):
+    """Status, progress, ETA and errors for one export job"""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+@app.delete("/api/admin/export-jobs/{job_id}")
+async def cancel_export_job(job_id: str):
+    """Cancel a queued or running export job"""
+    job = export_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+@app.post("/api/admin/compact-signups")
+async def compact_signups():
+    """Fold the signup log into wealthsage_all_users.xlsx now"""
+    excel_file = await run_in_threadpool(excel_service.compact_signup_log)
+    if not excel_file:
+        raise HTTPException(status_code=500, detail="Failed to compact signup log")
+    return {
+        "message": "Signup log compacted",
+        "file_path": excel_file,
+        "download_url": f"/api/admin/download/{os.path.basename(excel_file)}"
+    }
+
+@app.get("/api/admin/users")
+async def list_users(limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+                     format: str = "json", admin: Dict[str, Any] = Depends(require_admin)):
+    """Keyset-paginated user listing; format=ndjson streams the whole table"""
+    try:
+        if format == "ndjson":
+            return ndjson_response(db.iter_users(parse_fields(fields)))
+        return await async_db.list_users(limit, cursor, parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/admin/import-users")
+async def import_users(request: Request, format: str = "ndjson", chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+                       admin: Dict[str, Any] = Depends(require_admin)):
+    """Bulk-create users from a streamed CSV or NDJSON request body"""
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    chunk_size = max(1, min(chunk_size, 5000))
+
+    report = {'processed': 0, 'created': 0, 'failed': 0, 'errors': []}
+    fieldnames = None
+    batch = []
+
+    async def import_batch():
+        part = await async_db.run(
+            db.create_users_bulk, parse_user_records(batch, format, fieldnames),
+            chunk_size, report['processed'] + 1
+        )
+        merge_reports(report, part)
+        batch.clear()
+
+    try:
+        async for line in iter_body_lines(request.stream()):
+            if format == 'csv' and fieldnames is None:
+                if line.strip():
+                    fieldnames = csv_header(line)
+                continue
+            batch.append(line)
+            if len(batch) >= chunk_size:
+                await import_batch()
+        if batch:
+            await import_batch()
+    except Exception as e:
+        logger.error(f"Error importing users: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"{admin['email']} imported {report['created']} of {report['processed']} users")
+    return report
+
+@app.api_route("/api/admin/download/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request):
+    """Download an export; supports Range, If-None-Match and gzip for csv/ndjson"""
+    if export_jobs.is_writing(filename):
+        raise HTTPException(status_code=409, detail="Export is still running")
+    media_type = download_media_type(filename)
+    file_path = resolve_download_path(excel_service.export_dir, filename) if media_type else None
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        return file_download_response(
+            request, file_path, media_type, filename,
+            compress=filename.endswith(('.csv', '.ndjson'))
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
     except Exception as e:
         logger.error(f"Error downloading file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
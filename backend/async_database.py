@@ -0,0 +1,118 @@
+import asyncio
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, Any
+from database import DatabaseManager, DB_POOL_SIZE, db
+from password_hasher import PasswordHasher, password_hasher, needs_rehash
+
+logger = logging.getLogger(__name__)
+
+# Threads that run blocking SQLite calls; matching the pool size means no
+# worker ever waits on a connection another worker is holding
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', DB_POOL_SIZE))
+# Maximum database calls admitted at once; further callers wait without blocking the loop
+DB_MAX_CONCURRENCY = int(os.getenv('DB_MAX_CONCURRENCY', 64))
+
+class AsyncDatabaseManager:
+    """Awaitable facade over DatabaseManager backed by a dedicated thread pool"""
+
+    def __init__(self, manager: DatabaseManager, hasher: PasswordHasher,
+                 max_workers: int = DB_EXECUTOR_WORKERS, max_concurrency: int = DB_MAX_CONCURRENCY):
+        self.manager = manager
+        self.hasher = hasher
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database executor"""
+        with self._lock:
+            self._waiting += 1
+        admitted = False
+        try:
+            async with self._semaphore:
+                with self._lock:
+                    self._waiting -= 1
+                    self._running += 1
+                admitted = True
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                if admitted:
+                    self._running -= 1
+                    self._completed += 1
+                else:
+                    self._waiting -= 1
+
+    async def ping(self) -> bool:
+        return await self.run(self.manager.ping)
+
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        if user_data.get('password') and not user_data.get('password_hash'):
+            user_data = dict(user_data)
+            user_data['password_hash'] = await self.hasher.hash(user_data.pop('password'))
+        return await self.run(self.manager.create_user, user_data)
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.get_user_by_email, email)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.get_user_by_id, user_id)
+
+    async def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate with hashing in the process pool, upgrading outdated hashes"""
+        user = await self.get_user_by_email(email)
+        if not user or not user.get('password_hash'):
+            return None
+
+        if not await self.hasher.verify(password, user['password_hash']):
+            return None
+
+        new_hash = None
+        if needs_rehash(user['password_hash']):
+            new_hash = await self.hasher.hash(password)
+        await self.run(self.manager.record_login, user['id'], new_hash)
+        return user
+
+    async def create_session(self, user_id: int, firebase_token: str = None) -> str:
+        return await self.run(self.manager.create_session, user_id, firebase_token)
+
+    async def update_user_profile(self, user_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.update_user_profile, user_id, fields)
+
+    async def get_user_income_sources(self, user_id: int) -> list:
+        return await self.run(self.manager.get_user_income_sources, user_id)
+
+    async def list_users(self, limit: int = 100, cursor: str = None, fields: list = None) -> Dict[str, Any]:
+        return await self.run(self.manager.list_users, limit, cursor, fields)
+
+    async def list_income_sources(self, user_id: int, limit: int = 100, cursor: str = None,
+                                  fields: list = None) -> Dict[str, Any]:
+        return await self.run(self.manager.list_income_sources, user_id, limit, cursor, fields)
+
+    def stats(self) -> Dict[str, Any]:
+        """Executor usage counters"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_concurrency': self.max_concurrency,
+                'waiting': self._waiting,
+                'running': self._running,
+                'completed': self._completed
+            }
+
+    def close(self):
+        """Wait for in-flight calls and stop the executor"""
+        self._executor.shutdown(wait=True)
+
+# Global async database instance
+async_db = AsyncDatabaseManager(db, password_hasher)
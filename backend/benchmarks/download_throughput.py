@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Measure export download throughput for a large artifact.
+
+Writes a synthetic CSV export of --size-mb into the export directory, then
+downloads it through /api/admin/download: whole, resumed from the middle
+with a Range request, revalidated with If-None-Match, and gzip-encoded.
+
+Run the API first (uvicorn backend.app.main:app), then:
+    python backend/benchmarks/download_throughput.py --api http://localhost:8000 --size-mb 512
+--export-dir must be the directory the API serves (its EXPORT_DIR).
+"""
+import argparse
+import os
+import time
+import requests
+
+def write_artifact(path, size_mb):
+    """A CSV of synthetic user rows, written as repeated 1 MiB blocks"""
+    rows = []
+    length = 0
+    i = 0
+    while length < 1024 * 1024:
+        row = f"{i},user{i}@example.com,Test,User{i},Student,true,2025-01-01 12:00:00,{i % 3000}.0\n"
+        rows.append(row)
+        length += len(row)
+        i += 1
+    block = "".join(rows).encode()
+    with open(path, 'wb') as handle:
+        handle.write(b"id,email,first_name,last_name,role,is_active,created_at,monthly_income\n")
+        for _ in range(size_mb):
+            handle.write(block)
+
+def download(url, headers):
+    start = time.perf_counter()
+    received = 0
+    with requests.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        # raw: count bytes on the wire, without decoding gzip
+        for chunk in response.raw.stream(1024 * 1024, decode_content=False):
+            received += len(chunk)
+        status = response.status_code
+    return status, received, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--api', default="http://localhost:8000")
+    parser.add_argument('--export-dir', default=os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'user_exports'))
+    parser.add_argument('--size-mb', type=int, default=256)
+    args = parser.parse_args()
+
+    filename = "wealthsage_users_download_bench.csv"
+    path = os.path.join(args.export_dir, filename)
+    write_artifact(path, args.size_mb)
+    size = os.path.getsize(path)
+    url = f"{args.api}/api/admin/download/{filename}"
+    try:
+        etag = requests.head(url, headers={'Accept-Encoding': 'identity'}).headers['ETag']
+        cases = [
+            ('full', {'Accept-Encoding': 'identity'}),
+            ('resume from 50%', {'Accept-Encoding': 'identity', 'Range': f"bytes={size // 2}-"}),
+            ('if-none-match', {'Accept-Encoding': 'identity', 'If-None-Match': etag}),
+            ('gzip', {'Accept-Encoding': 'gzip'}),
+        ]
+        print(f"artifact: {size / 1024 / 1024:.0f} MB")
+        print(f"{'case':>16} {'status':>7} {'wire MB':>8} {'seconds':>8} {'wire MB/s':>10} {'file MB/s':>10}")
+        for name, headers in cases:
+            status, received, elapsed = download(url, headers)
+            # File MB/s: how fast the artifact's content reaches the client
+            served = size - size // 2 if 'Range' in headers else (0 if status == 304 else size)
+            print(f"{name:>16} {status:>7} {received / 1024 / 1024:>8.1f} {elapsed:>8.2f} "
+                  f"{received / 1024 / 1024 / elapsed:>10.0f} {served / 1024 / 1024 / elapsed:>10.0f}")
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
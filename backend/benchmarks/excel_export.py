@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming Excel export at increasing user counts.
+
+Each size seeds a fresh SQLite database with synthetic users and profiles,
+exports it with ExcelExportService and prints rows/s, file size and peak
+resident memory. Sizes run smallest first; since peak RSS only ever grows,
+a flat column means memory does not scale with the number of rows.
+
+Usage: python backend/benchmarks/excel_export.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import logging
+logging.disable(logging.INFO)
+from database import DatabaseManager
+from excel_service import ExcelExportService
+
+ROLES = ['Student', 'Student', 'Student', 'Mentor', 'Admin']
+PROVIDERS = ['email', 'email', 'google']
+
+def seed(manager: DatabaseManager, users: int, batch: int = 10000):
+    """Insert synthetic users with one profile each, in large executemany batches"""
+    with manager.engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        for first in range(1, users + 1, batch):
+            ids = range(first, min(first + batch, users + 1))
+            raw.executemany(
+                "INSERT INTO users (id, uid, email, first_name, last_name, display_name, role, "
+                "provider, is_verified, created_at) VALUES (?, ?, ?, 'Test', ?, ?, ?, ?, ?, ?)",
+                ((i, f"uid{i}", f"user{i}@example.com", f"User{i}", f"Test User{i}",
+                  random.choice(ROLES), random.choice(PROVIDERS), i % 3 == 0,
+                  f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00") for i in ids)
+            )
+            raw.executemany(
+                "INSERT INTO user_profiles (user_id, university, monthly_income, savings_goal, "
+                "current_savings, budget_limit, preferences) VALUES (?, 'Test University', ?, ?, ?, ?, '{}')",
+                ((i, random.randint(0, 3000), random.choice([0, 500, 1000, 5000]),
+                  random.randint(0, 2000), random.randint(0, 1500)) for i in ids)
+            )
+            raw.commit()
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'seconds':>9} {'rows/s':>9} {'file MB':>8} {'peak RSS MB':>12}")
+    for users in sorted(args.sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = DatabaseManager(os.path.join(tmp, 'bench.db'))
+            seed(manager, users)
+            service = ExcelExportService(manager, export_dir=tmp)
+
+            start = time.perf_counter()
+            filepath = service.export_users_to_excel('bench.xlsx')
+            elapsed = time.perf_counter() - start
+            size_mb = os.path.getsize(filepath) / 1024 / 1024
+            print(f"{users:>10} {elapsed:>9.2f} {users / elapsed:>9.0f} {size_mb:>8.1f} {peak_rss_mb():>12.1f}")
+            manager.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Measure login latency percentiles as concurrent clients increase.
+
+Run the API first (uvicorn backend.app.main:app), then:
+    python backend/benchmarks/login_latency.py --api http://localhost:8000
+"""
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def login_once(api, credentials):
+    start = time.perf_counter()
+    response = requests.post(f"{api}/api/auth/login", json=credentials)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--api', default="http://localhost:8000")
+    parser.add_argument('--requests-per-client', type=int, default=5)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+    args = parser.parse_args()
+
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@wealthsage.com", "password": "benchpass123"}
+    requests.post(f"{args.api}/api/auth/signup", json={
+        **credentials, "first_name": "Bench", "last_name": "User"
+    }).raise_for_status()
+
+    print(f"{'clients':>8} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for clients in args.clients:
+        total = clients * args.requests_per_client
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            samples = list(pool.map(lambda _: login_once(args.api, credentials), range(total)))
+        elapsed = time.perf_counter() - start
+        print(f"{clients:>8} {total:>9} {statistics.median(samples):>9.1f} "
+              f"{percentile(samples, 99):>9.1f} {total / elapsed:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compare login throughput with and without the last_login write-behind buffer.
+
+Each mode runs concurrent threads calling DatabaseManager.authenticate_user
+against a fresh database. PBKDF2 cost is reduced to a single round so the database write,
+not hashing, dominates.
+
+Usage: python backend/benchmarks/login_throughput.py [--threads 16] [--logins 4000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import logging
+logging.disable(logging.INFO)
+from database import DatabaseManager
+from write_behind import WriteBehindBuffer
+
+def run(flush_interval_ms: int, threads: int, logins: int, users: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        manager.user_updates.close()
+        manager.user_updates = WriteBehindBuffer(
+            manager.apply_user_updates, name="bench", flush_interval_ms=flush_interval_ms
+        )
+        for i in range(users):
+            manager.create_user({
+                'email': f"user{i}@example.com", 'password': "benchpass123",
+                'first_name': "Bench", 'last_name': f"User{i}"
+            })
+
+        def login(i):
+            assert manager.authenticate_user(f"user{i % users}@example.com", "benchpass123")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(login, range(logins)))
+        manager.close()
+        return logins / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=4000)
+    parser.add_argument('--users', type=int, default=200)
+    args = parser.parse_args()
+
+    direct = run(0, args.threads, args.logins, args.users)
+    buffered = run(500, args.threads, args.logins, args.users)
+    print(f"{args.logins} logins, {args.threads} threads, {args.users} users")
+    print(f"  write-through last_login: {direct:8.1f} logins/s")
+    print(f"  write-behind last_login:  {buffered:8.1f} logins/s ({buffered / direct:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the opportunity agents' search fan-out against a local stub server.
+
+Starts a stub of the Tavily search API on localhost that answers each query
+after --latency seconds (every --slow-every'th query takes --slow-latency),
+then times a cold fetch of each category with the queries run one at a time
+and with the shared fan-out executor at each --concurrency.
+
+Usage: python backend/benchmarks/opportunity_fanout.py [--latency 0.3] [--concurrency 1 5 10]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True
+    latency = 0.3
+    slow_every = 0
+    slow_latency = 5.0
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with StubSearchHandler.lock:
+            StubSearchHandler.calls += 1
+            call = StubSearchHandler.calls
+        slow = self.slow_every and call % self.slow_every == 0
+        time.sleep(self.slow_latency if slow else self.latency)
+        results = [{
+            'title': f"{body['query']} hackathon freelance gig {i}",
+            'description': 'Stub result',
+            'url': f"https://example.com/{call}/{i}",
+            'relevance_score': i
+        } for i in range(5)]
+        payload = json.dumps({'results': results}).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            pass  # The client stopped waiting
+
+    def log_message(self, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--slow-every', type=int, default=0,
+                        help="make every Nth query slow, to exercise timeouts and the deadline")
+    parser.add_argument('--slow-latency', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--query-timeout', type=float, default=2.0)
+    parser.add_argument('--deadline', type=float, default=4.0)
+    args = parser.parse_args()
+
+    StubSearchHandler.latency = args.latency
+    StubSearchHandler.slow_every = args.slow_every
+    StubSearchHandler.slow_latency = args.slow_latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSearchHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ['TAVILY_API_KEY'] = 'benchmark'
+    os.environ['TAVILY_API_URL'] = f"http://127.0.0.1:{server.server_port}/search"
+    import logging
+    logging.disable(logging.WARNING)
+    from ml_agents import scholarships_agent, hackathons_agent, freelancing_agent
+    from ml_agents.fanout import FanOutExecutor
+    from ml_agents.search_cache import search_cache
+    agents = [
+        (scholarships_agent, scholarships_agent.fetch_scholarships),
+        (hackathons_agent, hackathons_agent.fetch_hackathons),
+        (freelancing_agent, freelancing_agent.fetch_freelancing_gigs),
+    ]
+
+    # The agents keep file caches under ./cache, and search results in memory
+    # too; run where they start empty and empty them before every fetch
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    print(f"{'concurrency':>11} {'category':>26} {'seconds':>8} {'results':>8}")
+    try:
+        for concurrency in args.concurrency:
+            executor = FanOutExecutor(concurrency=concurrency, query_timeout=args.query_timeout,
+                                      deadline=args.deadline)
+            for module, fetch in agents:
+                module.fan_out = executor
+                shutil.rmtree('cache', ignore_errors=True)
+                search_cache.clear()
+                start = time.perf_counter()
+                results = fetch()
+                elapsed = time.perf_counter() - start
+                print(f"{concurrency:>11} {fetch.__name__:>26} {elapsed:>8.2f} {len(results):>8}")
+            executor.close()
+    finally:
+        os.chdir('/')
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
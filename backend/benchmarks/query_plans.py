@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark hot lookups before and after the index migrations.
+
+Builds a throwaway database at schema version 1 (tables only), seeds it with
+synthetic users, prints EXPLAIN QUERY PLAN and timings for each hot query,
+then applies the remaining migrations and repeats.
+
+Usage: python backend/benchmarks/query_plans.py [--users 50000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from migrations import apply_migrations
+
+HOT_QUERIES = {
+    'get_user_by_email': ('''
+        SELECT u.*, p.university, p.monthly_income, p.savings_goal,
+               p.current_savings, p.budget_limit
+        FROM users u
+        LEFT JOIN user_profiles p ON u.id = p.user_id
+        WHERE u.email = ? AND u.is_active = 1
+    ''', lambda n: (f"user{random.randint(1, n)}@example.com",)),
+    'get_user_by_id': ('''
+        SELECT u.*, p.university, p.monthly_income, p.savings_goal,
+               p.current_savings, p.budget_limit
+        FROM users u
+        LEFT JOIN user_profiles p ON u.id = p.user_id
+        WHERE u.id = ? AND u.is_active = 1
+    ''', lambda n: (random.randint(1, n),)),
+    'get_user_income_sources': ('''
+        SELECT * FROM income_sources
+        WHERE user_id = ? AND status = 'active'
+        ORDER BY created_at DESC
+    ''', lambda n: (random.randint(1, n),)),
+    'sessions_for_user': ('''
+        SELECT id FROM user_sessions WHERE user_id = ?
+    ''', lambda n: (random.randint(1, n),)),
+    'financial_goals_for_user': ('''
+        SELECT * FROM financial_goals WHERE user_id = ?
+    ''', lambda n: (random.randint(1, n),)),
+    # Delta export: users changed since the last export's watermark
+    'users_changed_since': ('''
+        SELECT id FROM users WHERE updated_at >= ?
+        UNION
+        SELECT id FROM users WHERE last_login >= ?
+        UNION
+        SELECT user_id FROM user_profiles WHERE updated_at >= ?
+    ''', lambda n: (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),) * 3),
+}
+
+def seed(conn: sqlite3.Connection, users: int):
+    """Insert synthetic users with one profile, two sessions, income sources and a goal each"""
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO users (uid, email, first_name, last_name) VALUES (?, ?, ?, ?)",
+        ((f"uid{i}", f"user{i}@example.com", "Test", f"User{i}") for i in range(1, users + 1))
+    )
+    conn.executemany(
+        "INSERT INTO user_profiles (user_id, university, preferences) VALUES (?, ?, '{}')",
+        ((i, "Test University") for i in range(1, users + 1))
+    )
+    conn.executemany(
+        "INSERT INTO user_sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
+        ((i % users + 1, f"token{i}", time.time() + 86400) for i in range(users * 2))
+    )
+    conn.executemany(
+        "INSERT INTO income_sources (user_id, source_name, source_type, amount, status) "
+        "VALUES (?, ?, 'scholarship', 100, ?)",
+        ((i % users + 1, f"Source {i}", random.choice(['active', 'applied', 'completed']))
+         for i in range(users * 3))
+    )
+    conn.executemany(
+        "INSERT INTO financial_goals (user_id, goal_name, target_amount) VALUES (?, 'Goal', 1000)",
+        ((i,) for i in range(1, users + 1))
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+def report(conn: sqlite3.Connection, users: int, iterations: int):
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params(users)).fetchall()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            conn.execute(sql, params(users)).fetchall()
+        elapsed_us = (time.perf_counter() - start) / iterations * 1e6
+        print(f"  {name}: {elapsed_us:.1f} us/query")
+        for row in plan:
+            print(f"      {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        with engine.connect() as conn:
+            apply_migrations(conn, target=1)
+            # Seed and time queries on the driver connection to measure SQLite itself
+            raw = conn.connection.driver_connection
+            seed(raw, args.users)
+
+            print(f"Before index migrations ({args.users} users)")
+            report(raw, args.users, args.iterations)
+
+            apply_migrations(conn)
+            raw.execute("ANALYZE")
+            print(f"\nAfter index migrations ({args.users} users)")
+            report(raw, args.users, args.iterations)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
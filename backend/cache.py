@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.pop(key)
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def replace(self, key: Hashable, func) -> bool:
+        """Swap a live entry's value for func(value), keeping its expiry"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= time.monotonic():
+                return False
+            self._data[key] = (entry[0], func(entry[1]))
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
+
+class UserCache:
+    """Read-through cache of user records addressable by id and by email"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self._by_id = TTLCache(max_size, ttl)
+        self._id_by_email = TTLCache(max_size, ttl)
+
+    def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        user = self._by_id.get(user_id)
+        return dict(user) if user is not None else None
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = self._id_by_email.get(email)
+        if user_id is None:
+            return None
+        user = self._by_id.get(user_id)
+        if user is None or user.get('email') != email:
+            return None
+        return dict(user)
+
+    def put(self, user: Dict[str, Any]):
+        self._by_id.set(user['id'], dict(user))
+        self._id_by_email.set(user['email'], user['id'])
+
+    def update(self, user_id: int, values: Dict[str, Any]):
+        """Apply a column update to a cached record, if present"""
+        self._by_id.replace(user_id, lambda user: {**user, **values})
+
+    def invalidate(self, user_id: int = None, email: str = None):
+        user = self._by_id.pop(user_id) if user_id is not None else None
+        if user is not None:
+            self._id_by_email.pop(user['email'])
+        if email is not None:
+            user_id = self._id_by_email.pop(email)
+            if user_id is not None:
+                self._by_id.pop(user_id)
+
+    def clear(self):
+        self._by_id.clear()
+        self._id_by_email.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'by_id': self._by_id.stats(),
+            'by_email': self._id_by_email.stats()
+        }
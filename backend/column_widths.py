@@ -0,0 +1,42 @@
+import os
+from typing import Any, List, Sequence
+
+# Every row up to COLUMN_WIDTH_EXACT_ROWS is measured; after that only every Nth row
+COLUMN_WIDTH_EXACT_ROWS = int(os.getenv('COLUMN_WIDTH_EXACT_ROWS', 1000))
+COLUMN_WIDTH_SAMPLE_EVERY = int(os.getenv('COLUMN_WIDTH_SAMPLE_EVERY', 100))
+
+class ColumnWidths:
+    """
+    Running per-column maximum text width, updated as rows are written.
+
+    Replaces re-reading every cell after the sheet is built, which write-only
+    and constant-memory workbooks cannot do. Very large exports are sampled
+    past the first exact_rows rows.
+    """
+
+    def __init__(self, headers: Sequence[Any], max_width: int = 50, padding: int = 2,
+                 exact_rows: int = COLUMN_WIDTH_EXACT_ROWS,
+                 sample_every: int = COLUMN_WIDTH_SAMPLE_EVERY):
+        self.max_width = max_width
+        self.padding = padding
+        self.exact_rows = exact_rows
+        self.sample_every = max(1, sample_every)
+        self.lengths = [len(str(header)) for header in headers]
+        self.rows = 0
+
+    def add(self, values: Sequence[Any]):
+        """Account for one row of cell values"""
+        self.rows += 1
+        if self.rows > self.exact_rows and self.rows % self.sample_every:
+            return
+        lengths = self.lengths
+        for index, value in enumerate(values[:len(lengths)]):
+            if value is None:
+                continue
+            length = len(value) if isinstance(value, str) else len(str(value))
+            if length > lengths[index]:
+                lengths[index] = length
+
+    def widths(self) -> List[int]:
+        """Column widths in characters, padded and capped"""
+        return [min(length + self.padding, self.max_width) for length in self.lengths]
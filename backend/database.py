@@ -1,273 +1,569 @@
-import sqlite3
 import os
+import json
+import base64
+from contextlib import contextmanager
 from datetime import datetime
-import hashlib
 import secrets
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Sequence
 import logging
+from sqlalchemy import create_engine, event, text, bindparam
+from sqlalchemy.engine import Engine, Connection, make_url
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from migrations import apply_migrations, check_schema, SERVER_DIALECTS
+import schema
+import password_hasher as password_hashing
+from write_behind import WriteBehindBuffer
+from cache import UserCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Any SQLAlchemy URL (sqlite:///, mysql://, postgresql://) or a plain SQLite file path.
+# Not DATABASE_URL: the shared .env sets that for the Flask app, whose schema differs.
+DATABASE_URL = os.getenv('WEALTHSAGE_DATABASE_URL', 'sqlite:///wealthsage.db')
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 4))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+
+# Backends the migrations and dialect-specific inserts are written for
+SUPPORTED_DIALECTS = ('sqlite',) + SERVER_DIALECTS
+
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Pragmas every pooled SQLite connection shares"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def create_db_engine(database_url: str = DATABASE_URL, pool_size: int = DB_POOL_SIZE,
+                     max_overflow: int = DB_MAX_OVERFLOW, pool_timeout: float = DB_POOL_TIMEOUT,
+                     pre_ping: bool = DB_POOL_PRE_PING) -> Engine:
+    """Build a pooled engine for a database URL or SQLite file path"""
+    if '://' not in database_url:
+        database_url = f"sqlite:///{database_url}"
+    url = make_url(database_url)
+    if url.get_backend_name() not in SUPPORTED_DIALECTS:
+        raise ValueError(
+            f"Unsupported database {url.get_backend_name()!r}; expected one of {', '.join(SUPPORTED_DIALECTS)}"
+        )
+    options = {
+        'poolclass': QueuePool,
+        'pool_size': max(1, pool_size),
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_pre_ping': pre_ping,
+    }
+    if url.get_backend_name() == 'sqlite':
+        # Connections move between threads via the pool
+        options['connect_args'] = {'check_same_thread': False, 'timeout': DB_BUSY_TIMEOUT_MS / 1000}
+        if url.database in (None, '', ':memory:'):
+            # Every connection to an in-memory database is a separate database, so only one may exist
+            options.update(pool_size=1, max_overflow=0)
+    else:
+        # Server-side idle timeouts drop connections; replace them before that happens
+        options['pool_recycle'] = DB_POOL_RECYCLE
+
+    engine = create_engine(url, **options)
+    if url.get_backend_name() == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    return engine
+
+def insert_ignore(conn: Connection, table, index_elements: Sequence[str] = None):
+    """INSERT that skips rows violating a unique constraint, in the connection's dialect"""
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        return insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        # A no-op assignment; MySQL's INSERT IGNORE would also swallow unrelated errors
+        primary_key = list(table.primary_key.columns)[0]
+        return insert(table).on_duplicate_key_update({primary_key.name: primary_key})
+    return table.insert()
+
+def upsert(conn: Connection, table, index_elements: Sequence[str], update_columns: Sequence[str]):
+    """INSERT that updates update_columns when index_elements already exist"""
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: stmt.excluded[column] for column in update_columns}
+        )
+    # create_db_engine accepts no other dialects, so this is MySQL or MariaDB
+    from sqlalchemy.dialects.mysql import insert
+    stmt = insert(table)
+    return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in update_columns})
+
+def bump_data_version(conn: Connection, *names: str):
+    """
+    Advance the data_versions counters the export cache keys on. Call once
+    per transaction, as its last statement before commit, so the shared
+    counter row is locked only briefly; last_login is not versioned.
+    """
+    conn.execute(
+        text("UPDATE data_versions SET version = version + 1 WHERE name IN :names")
+        .bindparams(bindparam('names', expanding=True)),
+        {'names': list(names)}
+    )
+
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv('BULK_IMPORT_CHUNK_SIZE', 500))
+
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+# Bounds staleness for writes made by other processes, which cannot invalidate this one
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+
+# Columns that listing APIs may project; password hashes are never listed
+USER_LIST_FIELDS = (
+    'id', 'uid', 'email', 'first_name', 'last_name', 'display_name', 'role', 'phone',
+    'avatar_url', 'is_active', 'is_verified', 'created_at', 'updated_at', 'last_login',
+    'firebase_uid', 'provider'
+)
+INCOME_SOURCE_FIELDS = (
+    'id', 'user_id', 'source_name', 'source_type', 'amount', 'frequency', 'description',
+    'url', 'deadline', 'status', 'created_at', 'updated_at'
+)
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(created_at: Any, row_id: int) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a row"""
+    # Server databases return datetimes; their string form compares the same way
+    if created_at is not None and not isinstance(created_at, str):
+        created_at = str(created_at)
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return created_at, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def check_fields(fields: Optional[List[str]], allowed: Sequence[str]) -> List[str]:
+    """Validate a field projection, defaulting to every allowed field"""
+    fields = list(fields) if fields else list(allowed)
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+# Profile columns that update_user_profile may change
+PROFILE_FIELDS = (
+    'university', 'major', 'graduation_year', 'monthly_income', 'savings_goal',
+    'current_savings', 'budget_limit', 'preferences'
+)
+
+USER_SELECT_SQL = '''
+    SELECT u.*, p.university, p.monthly_income, p.savings_goal, 
+           p.current_savings, p.budget_limit
+    FROM users u
+    LEFT JOIN user_profiles p ON u.id = p.user_id
+'''
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "wealthsage.db"):
-        self.db_path = db_path
+    def __init__(self, database_url: str = DATABASE_URL, **engine_options):
+        self.database_url = database_url
+        self.engine = create_db_engine(database_url, **engine_options)
+        self._connects = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        event.listen(self.engine, 'connect', self._on_connect)
+        event.listen(self.engine, 'checkout', self._on_checkout)
+        self.user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+        # Hot-path metadata (last_login) is coalesced and written in batches
+        self.user_updates = WriteBehindBuffer(self.apply_user_updates, name="users")
         self.init_database()
     
+    def _on_connect(self, dbapi_conn, connection_record):
+        self._connects += 1
+    
+    def _on_checkout(self, dbapi_conn, connection_record, connection_proxy):
+        self._checkouts += 1
+    
+    @contextmanager
     def get_connection(self):
-        """Get database connection with proper error handling"""
+        """Check out a pooled connection; commits on success, rolls back on error"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
-            return conn
-        except sqlite3.Error as e:
+            conn = self.engine.connect()
+        except PoolTimeoutError as e:
+            self._timeouts += 1
             logger.error(f"Database connection error: {e}")
             raise Exception(f"Unable to connect to database: {e}")
+        except SQLAlchemyError as e:
+            logger.error(f"Database connection error: {e}")
+            raise Exception(f"Unable to connect to database: {e}")
+
+        try:
+            yield conn
+            if conn.in_transaction():
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics"""
+        pool = self.engine.pool
+        return {
+            'dialect': self.engine.dialect.name,
+            'max_size': pool.size() + max(pool._max_overflow, 0),
+            'pool_size': pool.size(),
+            'open_connections': pool.checkedin() + pool.checkedout(),
+            'in_use': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'connects': self._connects,
+            'checkouts': self._checkouts,
+            'reused': self._checkouts - self._connects,
+            'timeouts': self._timeouts
+        }
+
+    def close(self):
+        """Flush buffered writes and close all pooled connections"""
+        self.user_updates.close()
+        self.engine.dispose()
+
+    def ping(self) -> bool:
+        """Round-trip a trivial query to verify the database is reachable"""
+        with self.get_connection() as conn:
+            conn.execute(text("SELECT 1")).scalar()
+        return True
     
     def init_database(self):
-        """Initialize database with all required tables"""
+        """Initialize database by applying any pending schema migrations"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Users table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        uid TEXT UNIQUE NOT NULL,
-                        email TEXT UNIQUE NOT NULL,
-                        password_hash TEXT,
-                        first_name TEXT NOT NULL,
-                        last_name TEXT NOT NULL,
-                        display_name TEXT,
-                        role TEXT NOT NULL DEFAULT 'Student',
-                        phone TEXT,
-                        avatar_url TEXT,
-                        is_active BOOLEAN DEFAULT 1,
-                        is_verified BOOLEAN DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_login TIMESTAMP,
-                        firebase_uid TEXT,
-                        provider TEXT DEFAULT 'email'
-                    )
-                ''')
-                
-                # User profiles table for additional data
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_profiles (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        university TEXT,
-                        major TEXT,
-                        graduation_year INTEGER,
-                        monthly_income DECIMAL(10,2) DEFAULT 0,
-                        savings_goal DECIMAL(10,2) DEFAULT 0,
-                        current_savings DECIMAL(10,2) DEFAULT 0,
-                        budget_limit DECIMAL(10,2) DEFAULT 0,
-                        preferences TEXT, -- JSON string
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-                    )
-                ''')
-                
-                # Sessions table for authentication
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_sessions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        session_token TEXT UNIQUE NOT NULL,
-                        firebase_token TEXT,
-                        expires_at TIMESTAMP NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        is_active BOOLEAN DEFAULT 1,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-                    )
-                ''')
-                
-                # Income sources table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS income_sources (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        source_name TEXT NOT NULL,
-                        source_type TEXT NOT NULL, -- scholarship, freelance, job, etc.
-                        amount DECIMAL(10,2) NOT NULL,
-                        frequency TEXT DEFAULT 'monthly', -- monthly, yearly, one-time
-                        description TEXT,
-                        url TEXT,
-                        deadline DATE,
-                        status TEXT DEFAULT 'active', -- active, applied, completed
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-                    )
-                ''')
-                
-                # Financial goals table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS financial_goals (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        goal_name TEXT NOT NULL,
-                        target_amount DECIMAL(10,2) NOT NULL,
-                        current_amount DECIMAL(10,2) DEFAULT 0,
-                        target_date DATE,
-                        category TEXT, -- emergency, education, travel, etc.
-                        description TEXT,
-                        is_completed BOOLEAN DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-                    )
-                ''')
-                
-                conn.commit()
+                applied = apply_migrations(conn)
+                if applied:
+                    logger.info(f"Applied migrations: {', '.join(applied)}")
+                check_schema(conn)
                 logger.info("Database initialized successfully")
                 
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Database initialization error: {e}")
             raise Exception(f"Failed to initialize database: {e}")
     
     def hash_password(self, password: str) -> str:
         """Hash password with salt"""
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return f"{salt}:{password_hash.hex()}"
+        return password_hashing.hash_password(password)
     
     def verify_password(self, password: str, password_hash: str) -> bool:
         """Verify password against hash"""
-        try:
-            salt, hash_hex = password_hash.split(':')
-            password_check = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-            return password_check.hex() == hash_hex
-        except:
-            return False
+        return password_hashing.verify_password(password, password_hash)
     
     def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
                 # Check if user already exists
-                cursor.execute("SELECT id FROM users WHERE email = ?", (user_data['email'],))
-                if cursor.fetchone():
+                existing = conn.execute(
+                    text("SELECT id FROM users WHERE email = :email"), {'email': user_data['email']}
+                ).first()
+                if existing:
                     raise Exception("User with this email already exists")
                 
-                # Hash password if provided
-                password_hash = None
-                if user_data.get('password'):
+                # Hash password if provided and not already hashed by the caller
+                password_hash = user_data.get('password_hash')
+                if not password_hash and user_data.get('password'):
                     password_hash = self.hash_password(user_data['password'])
                 
                 # Insert user
-                cursor.execute('''
-                    INSERT INTO users (
-                        uid, email, password_hash, first_name, last_name, 
-                        display_name, role, firebase_uid, provider
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    user_data.get('uid', secrets.token_urlsafe(16)),
-                    user_data['email'],
-                    password_hash,
-                    user_data['first_name'],
-                    user_data['last_name'],
-                    user_data.get('display_name', f"{user_data['first_name']} {user_data['last_name']}"),
-                    user_data.get('role', 'Student'),
-                    user_data.get('firebase_uid'),
-                    user_data.get('provider', 'email')
-                ))
+                result = conn.execute(schema.users.insert(), self._user_row(user_data, password_hash))
                 
-                user_id = cursor.lastrowid
+                user_id = result.inserted_primary_key[0]
                 
                 # Create user profile
-                cursor.execute('''
-                    INSERT INTO user_profiles (user_id, university, preferences)
-                    VALUES (?, ?, ?)
-                ''', (
-                    user_id,
-                    user_data.get('university', ''),
-                    '{}' # Empty JSON preferences
-                ))
+                conn.execute(schema.user_profiles.insert(), self._profile_row(user_id, user_data))
+                bump_data_version(conn, 'users', 'user_profiles')
                 
                 conn.commit()
                 
                 # Return user data
-                return self.get_user_by_id(user_id)
+                user = self._select_user(conn, "u.id = :id", {'id': user_id})
+                if user:
+                    self.user_cache.put(user)
+                return user
                 
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Error creating user: {e}")
             raise Exception(f"Failed to create user: {e}")
     
+    def _user_row(self, user_data: Dict[str, Any], password_hash: Optional[str]) -> Dict[str, Any]:
+        return {
+            'uid': user_data.get('uid') or secrets.token_urlsafe(16),
+            'email': user_data['email'],
+            'password_hash': password_hash,
+            'first_name': user_data['first_name'],
+            'last_name': user_data['last_name'],
+            'display_name': user_data.get('display_name') or f"{user_data['first_name']} {user_data['last_name']}",
+            'role': user_data.get('role') or 'Student',
+            'firebase_uid': user_data.get('firebase_uid'),
+            'provider': user_data.get('provider') or 'email'
+        }
+    
+    def _profile_row(self, user_id: int, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'university': user_data.get('university', ''),
+            'preferences': '{}'  # Empty JSON preferences
+        }
+    
+    def validate_user_data(self, user_data: Dict[str, Any]) -> Optional[str]:
+        """Return an error message if a user record cannot be imported"""
+        if not isinstance(user_data, dict):
+            return "Malformed record"
+        for field in ('email', 'first_name', 'last_name'):
+            if not str(user_data.get(field) or '').strip():
+                return f"Missing required field: {field}"
+        email = str(user_data['email']).strip()
+        local, _, domain = email.partition('@')
+        if not local or '.' not in domain or ' ' in email:
+            return f"Invalid email address: {email}"
+        return None
+    
+    def create_users_bulk(self, users, chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+                          start_row: int = 1) -> Dict[str, Any]:
+        """
+        Import many users from any iterable of user dicts.
+        
+        Rows are validated and inserted in chunked transactions with executemany;
+        passwords in each chunk are hashed in parallel on the process pool. A bad
+        row is reported in 'errors' (1-based row numbers) without aborting the batch.
+        """
+        report = {'processed': 0, 'created': 0, 'failed': 0, 'errors': []}
+        seen_emails = set()
+        chunk = []
+        
+        for row_number, user_data in enumerate(users, start_row):
+            report['processed'] += 1
+            error = self.validate_user_data(user_data)
+            if not isinstance(user_data, dict):
+                user_data = {}
+            elif not error:
+                user_data = dict(user_data, email=str(user_data['email']).strip())
+                if user_data['email'] in seen_emails:
+                    error = "Duplicate email in import"
+            if error:
+                report['failed'] += 1
+                report['errors'].append({'row': row_number, 'email': user_data.get('email'), 'error': error})
+                continue
+            
+            seen_emails.add(user_data['email'])
+            chunk.append((row_number, user_data))
+            if len(chunk) >= chunk_size:
+                self._import_user_chunk(chunk, report)
+                chunk = []
+        
+        if chunk:
+            self._import_user_chunk(chunk, report)
+        
+        report['errors'].sort(key=lambda error: error['row'])
+        return report
+    
+    
+    def _import_user_chunk(self, chunk, report: Dict[str, Any]):
+        """Insert one validated chunk in a single transaction"""
+        def fail(row_number, email, error):
+            report['failed'] += 1
+            report['errors'].append({'row': row_number, 'email': email, 'error': error})
+        
+        pending = list(chunk)
+        try:
+            # Drop rows whose email is already registered
+            emails = [user_data['email'] for _, user_data in chunk]
+            with self.get_connection() as conn:
+                existing = set(conn.execute(
+                    text("SELECT email FROM users WHERE email IN :emails")
+                    .bindparams(bindparam('emails', expanding=True)),
+                    {'emails': emails}
+                ).scalars())
+            for row_number, user_data in chunk:
+                if user_data['email'] in existing:
+                    fail(row_number, user_data['email'], "User with this email already exists")
+            pending = [(row_number, user_data) for row_number, user_data in chunk
+                       if user_data['email'] not in existing]
+            if not pending:
+                return
+            
+            # Hash the chunk's passwords in parallel, without holding a connection
+            to_hash = [(i, user_data['password']) for i, (_, user_data) in enumerate(pending)
+                       if user_data.get('password') and not user_data.get('password_hash')]
+            hashes = password_hashing.password_hasher.hash_many([password for _, password in to_hash])
+            password_hashes = [user_data.get('password_hash') for _, user_data in pending]
+            for (i, _), password_hash in zip(to_hash, hashes):
+                password_hashes[i] = password_hash
+            user_rows = [self._user_row(user_data, password_hash)
+                         for (_, user_data), password_hash in zip(pending, password_hashes)]
+            
+            with self.get_connection() as conn:
+                # Rows that lost a race for their email or uid are skipped rather than
+                # failing the chunk, then identified by the uid generated for them
+                conn.execute(insert_ignore(conn, schema.users), user_rows)
+                inserted = {
+                    (row.uid, row.email): row.id for row in conn.execute(
+                        text("SELECT id, uid, email FROM users WHERE uid IN :uids")
+                        .bindparams(bindparam('uids', expanding=True)),
+                        {'uids': [user_row['uid'] for user_row in user_rows]}
+                    )
+                }
+                profile_rows = []
+                for (row_number, user_data), user_row in zip(pending, user_rows):
+                    user_id = inserted.get((user_row['uid'], user_row['email']))
+                    if user_id is None:
+                        fail(row_number, user_data['email'], "User with this email or uid already exists")
+                    else:
+                        profile_rows.append(self._profile_row(user_id, user_data))
+                if profile_rows:
+                    conn.execute(schema.user_profiles.insert(), profile_rows)
+                    bump_data_version(conn, 'users', 'user_profiles')
+                conn.commit()
+                report['created'] += len(profile_rows)
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Error importing user chunk: {e}")
+            for row_number, user_data in pending:
+                fail(row_number, user_data['email'], f"Failed to create user: {e}")
+    
+    def _select_user(self, conn: Connection, where: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fetch one active user joined with their profile"""
+        row = conn.execute(
+            text(f"{USER_SELECT_SQL} WHERE {where} AND u.is_active"), params
+        ).mappings().first()
+        if row:
+            return dict(row)
+        return None
+    
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get user by email"""
+        user = self.user_cache.get_by_email(email)
+        if user is not None:
+            return user
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT u.*, p.university, p.monthly_income, p.savings_goal, 
-                           p.current_savings, p.budget_limit
-                    FROM users u
-                    LEFT JOIN user_profiles p ON u.id = p.user_id
-                    WHERE u.email = ? AND u.is_active = 1
-                ''', (email,))
-                
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return None
+                user = self._select_user(conn, "u.email = :email", {'email': email})
+            if user:
+                self.user_cache.put(user)
+            return user
                 
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Error getting user by email: {e}")
             return None
     
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
+        user = self.user_cache.get_by_id(user_id)
+        if user is not None:
+            return user
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT u.*, p.university, p.monthly_income, p.savings_goal, 
-                           p.current_savings, p.budget_limit
-                    FROM users u
-                    LEFT JOIN user_profiles p ON u.id = p.user_id
-                    WHERE u.id = ? AND u.is_active = 1
-                ''', (user_id,))
+                user = self._select_user(conn, "u.id = :id", {'id': user_id})
+            if user:
+                self.user_cache.put(user)
+            return user
                 
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return None
-                
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Error getting user by ID: {e}")
             return None
     
     def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user with email and password"""
-        try:
-            user = self.get_user_by_email(email)
-            if not user or not user.get('password_hash'):
-                return None
-            
-            if self.verify_password(password, user['password_hash']):
-                # Update last login
+        user = self.get_user_by_email(email)
+        if not user or not user.get('password_hash'):
+            return None
+        
+        if not self.verify_password(password, user['password_hash']):
+            return None
+        
+        new_hash = None
+        if password_hashing.needs_rehash(user['password_hash']):
+            new_hash = self.hash_password(password)
+        self.record_login(user['id'], new_hash)
+        return user
+    
+    def _store_password_hash(self, conn: Connection, user_id: int, password_hash: str):
+        conn.execute(text('''
+            UPDATE users SET password_hash = :password_hash, updated_at = CURRENT_TIMESTAMP
+            WHERE id = :id
+        '''), {'password_hash': password_hash, 'id': user_id})
+    
+    def record_login(self, user_id: int, password_hash: str = None):
+        """Stamp last_login, optionally storing an upgraded password hash"""
+        if password_hash:
+            # Transparent upgrade of a legacy or outdated-cost hash, written immediately
+            try:
                 with self.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE users SET last_login = CURRENT_TIMESTAMP 
-                        WHERE id = ?
-                    ''', (user['id'],))
+                    self._store_password_hash(conn, user_id, password_hash)
                     conn.commit()
+                    
+            except SQLAlchemyError as e:
+                logger.error(f"Error storing upgraded password hash: {e}")
+            self.user_cache.invalidate(user_id=user_id)
+        
+        # last_login is buffered; same format and clock as CURRENT_TIMESTAMP
+        last_login = {'last_login': datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}
+        self.user_updates.put(user_id, last_login)
+        self.user_cache.update(user_id, last_login)
+    
+    def update_user_profile(self, user_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update profile columns and return the refreshed user"""
+        unknown = set(fields) - set(PROFILE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+        try:
+            with self.get_connection() as conn:
+                if fields:
+                    assignments = ", ".join(f"{field} = :{field}" for field in fields)
+                    conn.execute(
+                        text(f"UPDATE user_profiles SET {assignments}, updated_at = CURRENT_TIMESTAMP "
+                             f"WHERE user_id = :user_id"),
+                        dict(fields, user_id=user_id)
+                    )
+                    bump_data_version(conn, 'user_profiles')
+                    conn.commit()
+                self.user_cache.invalidate(user_id=user_id)
+                user = self._select_user(conn, "u.id = :id", {'id': user_id})
+            if user:
+                self.user_cache.put(user)
+            return user
                 
-                return user
-            return None
-            
-        except sqlite3.Error as e:
-            logger.error(f"Error authenticating user: {e}")
-            return None
+        except SQLAlchemyError as e:
+            logger.error(f"Error updating user profile: {e}")
+            raise Exception(f"Failed to update profile: {e}")
+    
+    def user_cache_stats(self) -> Dict[str, Any]:
+        """User cache hit and miss counters"""
+        return self.user_cache.stats()
+    
+    def apply_user_updates(self, updates: Dict[int, Dict[str, Any]]):
+        """Write coalesced per-user column updates in a single transaction"""
+        # Group users by the set of columns being written so each group is one executemany
+        groups = {}
+        for user_id, values in updates.items():
+            columns = tuple(sorted(values))
+            groups.setdefault(columns, []).append(dict(values, user_id=user_id))
+        with self.get_connection() as conn:
+            for columns, rows in groups.items():
+                assignments = ", ".join(f"{column} = :{column}" for column in columns)
+                conn.execute(text(f"UPDATE users SET {assignments} WHERE id = :user_id"), rows)
+            conn.commit()
     
     def create_session(self, user_id: int, firebase_token: str = None) -> str:
         """Create a new session for user"""
@@ -276,35 +572,157 @@ class DatabaseManager:
             expires_at = datetime.now().timestamp() + (24 * 60 * 60)  # 24 hours
             
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
+                conn.execute(text('''
                     INSERT INTO user_sessions (user_id, session_token, firebase_token, expires_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, session_token, firebase_token, expires_at))
+                    VALUES (:user_id, :session_token, :firebase_token, :expires_at)
+                '''), {
+                    'user_id': user_id, 'session_token': session_token,
+                    'firebase_token': firebase_token, 'expires_at': expires_at
+                })
                 conn.commit()
             
             return session_token
             
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Error creating session: {e}")
             raise Exception(f"Failed to create session: {e}")
     
-    def get_user_income_sources(self, user_id: int) -> list:
-        """Get user's income sources"""
+    def get_session_user(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Resolve an active, unexpired session token to its user"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM income_sources 
-                    WHERE user_id = ? AND status = 'active'
-                    ORDER BY created_at DESC
-                ''', (user_id,))
+                row = conn.execute(text('''
+                    SELECT u.*, p.university, p.monthly_income, p.savings_goal, 
+                           p.current_savings, p.budget_limit,
+                           s.expires_at AS session_expires_at
+                    FROM user_sessions s
+                    JOIN users u ON u.id = s.user_id
+                    LEFT JOIN user_profiles p ON u.id = p.user_id
+                    WHERE s.session_token = :session_token AND s.is_active
+                      AND s.expires_at > :now AND u.is_active
+                '''), {'session_token': session_token, 'now': datetime.now().timestamp()}).mappings().first()
                 
-                return [dict(row) for row in cursor.fetchall()]
+                if row:
+                    return dict(row)
+                return None
                 
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting session user: {e}")
+            return None
+    
+    def deactivate_session(self, session_token: str) -> bool:
+        """End a session; it is expired immediately so the sweeper can remove it"""
+        try:
+            with self.get_connection() as conn:
+                result = conn.execute(text('''
+                    UPDATE user_sessions SET is_active = :is_active, expires_at = :now
+                    WHERE session_token = :session_token
+                '''), {'is_active': False, 'now': datetime.now().timestamp(), 'session_token': session_token})
+                conn.commit()
+                return result.rowcount > 0
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Error deactivating session: {e}")
+            return False
+    
+    def delete_expired_sessions(self, batch_size: int = 500) -> int:
+        """Delete expired sessions in short batches so writers are never blocked for long"""
+        if self.engine.dialect.name in ('mysql', 'mariadb'):
+            # MySQL rejects LIMIT in an IN subquery but supports DELETE ... LIMIT directly
+            sql = text("DELETE FROM user_sessions WHERE expires_at <= :now LIMIT :batch_size")
+        else:
+            sql = text('''
+                DELETE FROM user_sessions WHERE id IN (
+                    SELECT id FROM user_sessions WHERE expires_at <= :now LIMIT :batch_size
+                )
+            ''')
+        deleted = 0
+        params = {'now': datetime.now().timestamp(), 'batch_size': batch_size}
+        try:
+            while True:
+                with self.get_connection() as conn:
+                    rowcount = conn.execute(sql, params).rowcount
+                    conn.commit()
+                    deleted += rowcount
+                    if rowcount < batch_size:
+                        return deleted
+                    
+        except SQLAlchemyError as e:
+            logger.error(f"Error deleting expired sessions: {e}")
+            return deleted
+    
+    def get_user_income_sources(self, user_id: int) -> list:
+        """Get user's income sources"""
+        try:
+            return list(self.iter_income_sources(user_id))
+            
+        except SQLAlchemyError as e:
             logger.error(f"Error getting income sources: {e}")
             return []
+    
+    def _fetch_page(self, table: str, allowed: Sequence[str], fields: Optional[List[str]],
+                    where: str, params: Dict[str, Any], limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        """One keyset page ordered by (created_at, id) newest first"""
+        fields = check_fields(fields, allowed)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        # The cursor columns are always selected, even when not projected
+        columns = fields + [column for column in ('created_at', 'id') if column not in fields]
+        
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE {where}"
+        params = dict(params, limit=limit + 1)
+        if cursor:
+            sql += " AND (created_at, id) < (:cursor_created_at, :cursor_id)"
+            params['cursor_created_at'], params['cursor_id'] = decode_cursor(cursor)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT :limit"
+        
+        with self.get_connection() as conn:
+            rows = conn.execute(text(sql), params).mappings().fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+        return {
+            'items': [{field: row[field] for field in fields} for row in rows],
+            'next_cursor': next_cursor
+        }
+    
+    def _iter_pages(self, fetch_page, page_size: int) -> Iterator[Dict[str, Any]]:
+        """Walk every page, holding at most one page in memory and no connection between pages"""
+        cursor = None
+        while True:
+            page = fetch_page(page_size, cursor)
+            yield from page['items']
+            cursor = page['next_cursor']
+            if not cursor:
+                return
+    
+    def list_users(self, limit: int = 100, cursor: str = None,
+                   fields: List[str] = None) -> Dict[str, Any]:
+        """Keyset-paginated user listing; pass the returned next_cursor to continue"""
+        return self._fetch_page('users', USER_LIST_FIELDS, fields, "1 = 1", {}, limit, cursor)
+    
+    def iter_users(self, fields: List[str] = None, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream every user in (created_at, id) order"""
+        check_fields(fields, USER_LIST_FIELDS)
+        return self._iter_pages(lambda limit, cursor: self.list_users(limit, cursor, fields), page_size)
+    
+    def list_income_sources(self, user_id: int, limit: int = 100, cursor: str = None,
+                            fields: List[str] = None, status: str = 'active') -> Dict[str, Any]:
+        """Keyset-paginated income sources for one user"""
+        return self._fetch_page(
+            'income_sources', INCOME_SOURCE_FIELDS, fields,
+            "user_id = :user_id AND status = :status", {'user_id': user_id, 'status': status},
+            limit, cursor
+        )
+    
+    def iter_income_sources(self, user_id: int, fields: List[str] = None,
+                            page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream a user's active income sources newest first"""
+        check_fields(fields, INCOME_SOURCE_FIELDS)
+        return self._iter_pages(
+            lambda limit, cursor: self.list_income_sources(user_id, limit, cursor, fields), page_size
+        )
 
 # Global database instance
 db = DatabaseManager()
@@ -1,197 +1,492 @@
-import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
-from datetime import datetime
+import xlsxwriter
+from datetime import datetime, timezone
 import os
+import time
+import secrets
 import logging
-from database import db
+from sqlalchemy import text, select, func, case, extract
+from database import db, upsert
+import schema
+from signup_log import SignupLog
+from column_widths import ColumnWidths
+from export_cache import ExportCache, cache_key
+from export_formats import get_streaming_exporter, typed_rows, parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Where exports are written and served from; the default does not depend on the CWD
+EXPORT_DIR = os.path.abspath(os.getenv(
+    'EXPORT_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'user_exports')
+))
+
+# Rows fetched from the database per round trip while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+USER_EXPORT_SELECT = '''
+    SELECT 
+        u.id,
+        u.email,
+        u.first_name,
+        u.last_name,
+        u.display_name,
+        u.role,
+        u.phone,
+        u.is_active,
+        u.is_verified,
+        u.created_at,
+        u.last_login,
+        u.provider,
+        p.university,
+        p.monthly_income,
+        p.savings_goal,
+        p.current_savings,
+        p.budget_limit
+    FROM users u
+    LEFT JOIN user_profiles p ON u.id = p.user_id
+'''
+
+USER_EXPORT_SQL = USER_EXPORT_SELECT + '''
+    ORDER BY u.created_at DESC
+'''
+
+# Ids of users whose row, last login or profile changed at or after :since.
+# Each branch is a range scan on its own index; UNION removes duplicates.
+CHANGED_USER_IDS_SQL = '''
+    SELECT id FROM users WHERE updated_at >= :since
+    UNION
+    SELECT id FROM users WHERE last_login >= :since
+    UNION
+    SELECT user_id FROM user_profiles WHERE updated_at >= :since
+'''
+
+USER_DELTA_EXPORT_SQL = USER_EXPORT_SELECT + f'''
+    WHERE u.id IN ({CHANGED_USER_IDS_SQL})
+    ORDER BY u.created_at DESC
+'''
+
+USER_EXPORT_COLUMNS = [
+    'ID', 'Email', 'First Name', 'Last Name', 'Display Name', 
+    'Role', 'Phone', 'Active', 'Verified', 'Created At', 
+    'Last Login', 'Provider', 'University', 'Monthly Income',
+    'Savings Goal', 'Current Savings', 'Budget Limit'
+]
+
+MONEY_COLUMNS = ['Monthly Income', 'Savings Goal', 'Current Savings', 'Budget Limit']
+
+# Column names and types of USER_EXPORT_SQL for machine-readable exports
+USER_RECORD_COLUMNS = [
+    ('id', 'int'), ('email', 'string'), ('first_name', 'string'), ('last_name', 'string'),
+    ('display_name', 'string'), ('role', 'string'), ('phone', 'string'),
+    ('is_active', 'bool'), ('is_verified', 'bool'), ('created_at', 'timestamp'),
+    ('last_login', 'timestamp'), ('provider', 'string'), ('university', 'string'),
+    ('monthly_income', 'float'), ('savings_goal', 'float'),
+    ('current_savings', 'float'), ('budget_limit', 'float')
+]
+
+def format_user_row(row) -> dict:
+    """Format one USER_EXPORT_SQL row for the Users sheet"""
+    user_dict = {}
+    for column, value in zip(USER_EXPORT_COLUMNS, row):
+        # Format specific fields
+        if column in ['Active', 'Verified'] and value is not None:
+            user_dict[column] = 'Yes' if value else 'No'
+        elif column in MONEY_COLUMNS:
+            # Kept numeric; dollars are a number format applied when the cell is written
+            user_dict[column] = float(value or 0)
+        elif column in ['Created At', 'Last Login'] and value:
+            # Format datetime
+            if isinstance(value, str):
+                try:
+                    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                    user_dict[column] = dt.strftime("%Y-%m-%d %H:%M:%S")
+                except ValueError:
+                    user_dict[column] = value
+            else:
+                user_dict[column] = str(value)
+        else:
+            user_dict[column] = value or ''
+    return user_dict
+
+# Excel number format for dollar amounts
+MONEY_FORMAT = '$#,##0.00'
+
+def get_user_stats(conn) -> dict:
+    """Summary and Statistics metrics, aggregated by the database"""
+    users, profiles = schema.users, schema.user_profiles
+    joined = users.outerjoin(profiles, users.c.id == profiles.c.user_id)
+    has_goal = profiles.c.savings_goal > 0
+    
+    totals = conn.execute(select(
+        func.count().label('total_users'),
+        func.coalesce(func.sum(case((users.c.is_active, 1), else_=0)), 0).label('active_users'),
+        func.coalesce(func.sum(case((users.c.is_verified, 1), else_=0)), 0).label('verified_users'),
+        func.coalesce(func.sum(case((has_goal, profiles.c.savings_goal), else_=0)), 0).label('total_savings_goals'),
+        func.coalesce(func.sum(case((has_goal, 1), else_=0)), 0).label('users_with_goals'),
+        func.coalesce(func.avg(case((has_goal, profiles.c.savings_goal))), 0).label('average_savings_goal'),
+        func.coalesce(func.sum(profiles.c.current_savings), 0).label('total_current_savings'),
+        func.coalesce(func.avg(func.coalesce(profiles.c.current_savings, 0)), 0).label('average_current_savings')
+    ).select_from(joined)).mappings().one()
+    
+    def counts(column):
+        count = func.count().label('count')
+        return [(value or '', n) for value, n in conn.execute(
+            select(column, count).group_by(column).order_by(count.desc(), column)
+        )]
+    
+    year = extract('year', users.c.created_at)
+    month = extract('month', users.c.created_at)
+    monthly = conn.execute(
+        select(year, month, func.count())
+        .where(users.c.created_at.is_not(None))
+        .group_by(year, month).order_by(year, month)
+    )
+    
+    money = ('total_savings_goals', 'average_savings_goal', 'total_current_savings', 'average_current_savings')
+    stats = {key: float(value) if key in money else int(value) for key, value in totals.items()}
+    stats['role_counts'] = counts(users.c.role)
+    stats['provider_counts'] = counts(users.c.provider)
+    stats['monthly_registrations'] = [(f"{int(y):04d}-{int(m):02d}", n) for y, m, n in monthly]
+    return stats
+
+def get_data_version(conn) -> dict:
+    """Cheap fingerprint of everything a user export reads, last_login aside; any other write changes it"""
+    users = conn.execute(text("SELECT COUNT(*), MAX(updated_at) FROM users")).one()
+    profiles = conn.execute(text("SELECT COUNT(*), MAX(updated_at) FROM user_profiles")).one()
+    # Timestamps are to the second; the counters, bumped by every export-visible
+    # write, tell apart writes within the same second. last_login changes on
+    # every login and is left out: delta exports pick it up by watermark.
+    changes = dict(conn.execute(select(schema.data_versions.c.name, schema.data_versions.c.version)).all())
+    return {
+        'users': [users[0], str(users[1]), changes.get('users')],
+        'user_profiles': [profiles[0], str(profiles[1]), changes.get('user_profiles')]
+    }
+
+def utc_naive(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC, to the second"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+def since_param(conn, since: datetime):
+    # SQLite stores timestamps as 'YYYY-MM-DD HH:MM:SS' text, which only
+    # compares correctly against text in exactly that format
+    if conn.dialect.name == 'sqlite':
+        return since.strftime("%Y-%m-%d %H:%M:%S")
+    return since
+
+def user_export_query(conn, since=None):
+    """USER_EXPORT_SQL, or only the users changed at or after since"""
+    if since is None:
+        return text(USER_EXPORT_SQL)
+    return text(USER_DELTA_EXPORT_SQL).bindparams(since=since_param(conn, since))
+
+def count_changed_users(conn, since: datetime) -> int:
+    return conn.execute(
+        text(f"SELECT COUNT(*) FROM ({CHANGED_USER_IDS_SQL}) changed"),
+        {'since': since_param(conn, since)}
+    ).scalar()
+
+def resolve_since(conn, since):
+    """
+    A since= value as a naive UTC timestamp: the id of an earlier export,
+    whose watermark is used, or an ISO 8601 timestamp. None means everything.
+    """
+    if since is None or isinstance(since, datetime):
+        return utc_naive(since) if since else None
+    watermarks = schema.export_watermarks
+    watermark = conn.execute(
+        select(watermarks.c.watermark).where(watermarks.c.export_id == since)
+    ).scalar()
+    if watermark is None:
+        watermark = parse_timestamp(since)
+    if watermark is None:
+        raise ValueError(f"since must be an ISO timestamp or the id of an earlier export: {since}")
+    return utc_naive(watermark)
+
+def current_watermark(conn) -> datetime:
+    """The database clock, read before any exported row so a delta from it misses nothing"""
+    return utc_naive(parse_timestamp(conn.execute(select(func.current_timestamp())).scalar()))
+
+def record_watermark(conn, export_id, fmt, since, watermark, rows):
+    conn.execute(
+        upsert(conn, schema.export_watermarks, ['export_id'], ['format', 'since', 'watermark', 'rows']),
+        {'export_id': export_id, 'format': fmt, 'since': since, 'watermark': watermark, 'rows': rows}
+    )
+
 class ExcelExportService:
-    def __init__(self):
-        self.export_dir = "user_exports"
+    def __init__(self, manager=db, export_dir=EXPORT_DIR):
+        self.manager = manager
+        self.export_dir = export_dir
         os.makedirs(self.export_dir, exist_ok=True)
+        # Signups are appended to a log and folded into the workbook by compaction
+        self.signup_log = SignupLog(
+            os.path.join(self.export_dir, "wealthsage_signups.ndjson"),
+            os.path.join(self.export_dir, "wealthsage_all_users.xlsx"),
+            money_columns=MONEY_COLUMNS, money_format=MONEY_FORMAT
+        )
+        self.cache = ExportCache(self.export_dir)
+        self.last_export = None
     
-    def export_users_to_excel(self, filename=None):
+    def export_users_to_excel(self, filename=None, include_users=True):
         """Export all users to Excel file"""
         try:
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"wealthsage_users_{timestamp}.xlsx"
-            
-            filepath = os.path.join(self.export_dir, filename)
-            
-            # Get all users from database
-            users_data = self.get_all_users_data()
-            
-            if not users_data:
-                logger.warning("No users found to export")
-                return None
-            
-            # Create DataFrame
-            df = pd.DataFrame(users_data)
-            
-            # Create Excel workbook with multiple sheets
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Main users sheet
-                df.to_excel(writer, sheet_name='Users', index=False)
-                
-                # Get workbook and worksheet for styling
-                workbook = writer.book
-                worksheet = workbook['Users']
-                
-                # Style the header
-                self.style_header(worksheet)
-                
-                # Auto-adjust column widths
-                self.adjust_column_widths(worksheet)
-                
-                # Add summary sheet
-                self.create_summary_sheet(workbook, users_data)
-                
-                # Add statistics sheet
-                self.create_statistics_sheet(workbook, users_data)
-            
-            logger.info(f"Users exported successfully to {filepath}")
-            return filepath
+            result = self.export_users(filename, include_users)
+            return result['file_path'] if result else None
             
         except Exception as e:
             logger.error(f"Error exporting users to Excel: {e}")
             return None
     
+    def export_users(self, filename=None, include_users=True, progress=None, use_cache=True, since=None):
+        """
+        Export all users to an Excel file and return the export's metrics.
+        
+        Rows stream from a database cursor into an XlsxWriter workbook in
+        constant_memory mode, so memory stays flat regardless of the number of users.
+        Summary and Statistics come from SQL aggregates; include_users=False skips
+        the Users sheet entirely. progress(rows_written, total_rows) is called
+        periodically and after each sheet, and may raise to abort; a partial
+        file is removed. Returns None when there are no users.
+        
+        Exports are cached by data version and options: while no user or profile
+        has changed, the same request returns the existing file.
+        
+        since (a timestamp or an earlier export's id) limits the Users sheet to
+        users changed at or after it. Every export records its watermark under
+        its export_id, the cache key, for the next delta to start from.
+        """
+        # Buffered last_login stamps are exported columns; write them before reading anything
+        self.manager.user_updates.flush()
+        with self.manager.get_connection() as conn:
+            since = resolve_since(conn, since)
+            options = {'format': 'xlsx', 'include_users': include_users, 'since': since}
+            key = cache_key(get_data_version(conn), options)
+        
+        cached = self.cache.get(key) if use_cache else None
+        if cached:
+            if progress:
+                progress(cached['rows'], cached['rows'])
+            self.last_export = dict(cached, cached=True)
+            logger.info(f"Serving cached export {cached['file_path']}")
+            return self.last_export
+        
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"wealthsage_users_{timestamp}_{key[:8]}.xlsx"
+        
+        filepath = os.path.join(self.export_dir, filename)
+        # Written aside and renamed when complete, so a partial file is never served or cached
+        partial_path = filepath + ".partial"
+        start = time.perf_counter()
+        
+        with self.manager.get_connection() as conn:
+            watermark = self.export_watermark(conn)
+            stats = get_user_stats(conn)
+            total_rows = stats['total_users'] if since is None else count_changed_users(conn, since)
+        if not stats['total_users']:
+            logger.warning("No users found to export")
+            return None
+        
+        # Create Excel workbook with multiple sheets; user-entered text is never
+        # interpreted as a formula or hyperlink
+        workbook = xlsxwriter.Workbook(partial_path, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False
+        })
+        rows = 0
+        if not include_users:
+            total_rows = 0
+        try:
+            # Main users sheet
+            if include_users:
+                rows = self.write_users_sheet(workbook, total_rows, progress, since)
+            
+            # Add summary sheet
+            self.create_summary_sheet(workbook, stats)
+            # Checked after every sheet, so a cancelled job stops before the file is finished
+            if progress:
+                progress(rows, total_rows)
+            
+            # Add statistics sheet
+            self.create_statistics_sheet(workbook, stats)
+            if progress:
+                progress(rows, total_rows)
+        except BaseException:
+            workbook.close()
+            os.remove(partial_path)
+            raise
+        workbook.close()
+        os.replace(partial_path, filepath)
+        
+        elapsed = time.perf_counter() - start
+        result = {
+            'file_path': filepath,
+            'rows': rows,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed) if elapsed else None,
+            'cache_key': key,
+            'export_id': key,
+            'since': str(since) if since else None,
+            'watermark': str(watermark)
+        }
+        with self.manager.get_connection() as conn:
+            record_watermark(conn, key, 'xlsx', since, watermark, rows)
+        self.cache.put(key, result)
+        self.last_export = dict(result, cached=False)
+        logger.info(
+            f"Users exported successfully to {filepath}: {rows} rows "
+            f"in {elapsed:.2f}s ({result['rows_per_second']} rows/s)"
+        )
+        return self.last_export
+    
+    def write_users_sheet(self, workbook, total_rows=None, progress=None, since=None) -> int:
+        """Stream users (all, or changed since) into a Users sheet; returns the number of rows written"""
+        worksheet = workbook.add_worksheet('Users')
+        worksheet.write_row(0, 0, USER_EXPORT_COLUMNS, self.header_format(workbook))
+        money_format = workbook.add_format({'num_format': MONEY_FORMAT})
+        first_money = USER_EXPORT_COLUMNS.index(MONEY_COLUMNS[0])
+        
+        # Widths are tracked as rows stream and applied once at the end
+        widths = ColumnWidths(USER_EXPORT_COLUMNS)
+        row_idx = 0
+        for row_idx, user in enumerate(self.iter_users_data(since), 1):
+            values = [user[column] for column in USER_EXPORT_COLUMNS]
+            worksheet.write_row(row_idx, 0, values[:first_money])
+            worksheet.write_row(row_idx, first_money, values[first_money:], money_format)
+            widths.add(values)
+            if progress and row_idx % EXPORT_BATCH_SIZE == 0:
+                progress(row_idx, total_rows)
+        self.set_column_widths(worksheet, widths)
+        if progress:
+            progress(row_idx, total_rows)
+        return row_idx
+    
+    def iter_users_data(self, since=None):
+        """Stream formatted users from the database in batches"""
+        with self.manager.get_connection() as conn:
+            result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(user_export_query(conn, since))
+            for row in result:
+                yield format_user_row(row)
+    
+    def iter_user_records(self, since=None):
+        """Stream typed USER_RECORD_COLUMNS tuples from the database in batches"""
+        with self.manager.get_connection() as conn:
+            result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(user_export_query(conn, since))
+            yield from typed_rows(USER_RECORD_COLUMNS, result)
+    
+    def export_watermark(self, conn) -> datetime:
+        """
+        current_watermark, held back to the oldest last_login still in the
+        write-behind buffer: those stamps are earlier than the clock but reach
+        the database after this export has read it, so the next delta must
+        start at or before them. Read after the clock, so a stamp flushed in
+        between is already visible to the export's rows.
+        """
+        watermark = current_watermark(conn)
+        buffered = parse_timestamp(self.manager.user_updates.oldest('last_login'))
+        if buffered is not None:
+            watermark = min(watermark, utc_naive(buffered))
+        return watermark
+    
+    def resolve_since(self, since):
+        """Validate a since= value; raises ValueError for an unknown export id or bad timestamp"""
+        with self.manager.get_connection() as conn:
+            return resolve_since(conn, since)
+    
+    def stream_users(self, fmt, since=None):
+        """
+        A csv, ndjson or parquet export of every user, or of those changed since.
+        
+        Returns (export, chunks): export holds the export_id and watermark, known
+        before the first row is read, and chunks yields the encoded body as rows
+        come off the cursor; nothing is written to disk. The watermark is
+        recorded once the last chunk has been produced.
+        """
+        exporter = get_streaming_exporter(fmt)
+        self.manager.user_updates.flush()
+        with self.manager.get_connection() as conn:
+            since = resolve_since(conn, since)
+            watermark = self.export_watermark(conn)
+        export = {'export_id': secrets.token_hex(16), 'since': since, 'watermark': watermark}
+        
+        def chunks():
+            rows = 0
+            def counted(records):
+                nonlocal rows
+                for record in records:
+                    rows += 1
+                    yield record
+            yield from exporter(USER_RECORD_COLUMNS, counted(self.iter_user_records(since)))
+            with self.manager.get_connection() as conn:
+                record_watermark(conn, export['export_id'], fmt, since, watermark, rows)
+        
+        return export, chunks()
+    
     def get_all_users_data(self):
         """Get all users data from database"""
         try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT 
-                        u.id,
-                        u.email,
-                        u.first_name,
-                        u.last_name,
-                        u.display_name,
-                        u.role,
-                        u.phone,
-                        u.is_active,
-                        u.is_verified,
-                        u.created_at,
-                        u.last_login,
-                        u.provider,
-                        p.university,
-                        p.monthly_income,
-                        p.savings_goal,
-                        p.current_savings,
-                        p.budget_limit
-                    FROM users u
-                    LEFT JOIN user_profiles p ON u.id = p.user_id
-                    ORDER BY u.created_at DESC
-                ''')
-                
-                columns = [
-                    'ID', 'Email', 'First Name', 'Last Name', 'Display Name', 
-                    'Role', 'Phone', 'Active', 'Verified', 'Created At', 
-                    'Last Login', 'Provider', 'University', 'Monthly Income',
-                    'Savings Goal', 'Current Savings', 'Budget Limit'
-                ]
-                
-                rows = cursor.fetchall()
-                users_data = []
-                
-                for row in rows:
-                    user_dict = {}
-                    for i, column in enumerate(columns):
-                        value = row[i] if i < len(row) else None
-                        
-                        # Format specific fields
-                        if column in ['Active', 'Verified'] and value is not None:
-                            user_dict[column] = 'Yes' if value else 'No'
-                        elif column in ['Monthly Income', 'Savings Goal', 'Current Savings', 'Budget Limit']:
-                            user_dict[column] = f"${value:.2f}" if value else "$0.00"
-                        elif column in ['Created At', 'Last Login'] and value:
-                            # Format datetime
-                            if isinstance(value, str):
-                                try:
-                                    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                                    user_dict[column] = dt.strftime("%Y-%m-%d %H:%M:%S")
-                                except:
-                                    user_dict[column] = value
-                            else:
-                                user_dict[column] = str(value)
-                        else:
-                            user_dict[column] = value or ''
-                    
-                    users_data.append(user_dict)
-                
-                return users_data
+            return list(self.iter_users_data())
                 
         except Exception as e:
             logger.error(f"Error getting users data: {e}")
             return []
     
-    def style_header(self, worksheet):
-        """Style the header row"""
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
+    def header_format(self, workbook):
+        """Style for the header row"""
+        return workbook.add_format({
+            'bold': True,
+            'font_color': '#FFFFFF',
+            'bg_color': '#366092',
+            'align': 'center',
+            'valign': 'vcenter'
+        })
+    
+    def write_report_sheet(self, workbook, title, rows, bold_values, money_labels=()):
+        """Write a small two-column report sheet with a title row and bold section labels"""
+        sheet = workbook.add_worksheet(title)
+        title_format = workbook.add_format({'bold': True, 'font_size': 16})
+        bold_format = workbook.add_format({'bold': True})
+        money_format = workbook.add_format({'num_format': MONEY_FORMAT})
+        widths = ColumnWidths(['', ''])
         
-        for cell in worksheet[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+        for row_idx, (label, value) in enumerate(rows):
+            # Style headers
+            if row_idx == 0:
+                sheet.write_row(row_idx, 0, [label, value], title_format)
+            elif label in bold_values:
+                sheet.write_row(row_idx, 0, [label, value], bold_format)
+            elif label in money_labels:
+                sheet.write(row_idx, 0, label)
+                sheet.write_number(row_idx, 1, value, money_format)
+                value = f"${value:,.2f}"  # Width of the rendered amount
+            else:
+                sheet.write_row(row_idx, 0, [label, value])
+            widths.add([label, value])
+        
+        self.set_column_widths(sheet, widths)
+        return sheet
     
-    def adjust_column_widths(self, worksheet):
-        """Auto-adjust column widths"""
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            adjusted_width = min(max_length + 2, 50)  # Max width of 50
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+    def set_column_widths(self, worksheet, widths: ColumnWidths):
+        """Apply tracked widths; constant_memory sheets accept these after their rows"""
+        for index, width in enumerate(widths.widths()):
+            worksheet.set_column(index, index, width)
     
-    def create_summary_sheet(self, workbook, users_data):
+    def create_summary_sheet(self, workbook, stats):
         """Create summary sheet with key metrics"""
-        summary_sheet = workbook.create_sheet("Summary")
-        
-        # Calculate summary statistics
-        total_users = len(users_data)
-        active_users = sum(1 for user in users_data if user.get('Active') == 'Yes')
-        verified_users = sum(1 for user in users_data if user.get('Verified') == 'Yes')
-        
-        # Role distribution
-        role_counts = {}
-        for user in users_data:
-            role = user.get('Role', 'Unknown')
-            role_counts[role] = role_counts.get(role, 0) + 1
-        
-        # Provider distribution
-        provider_counts = {}
-        for user in users_data:
-            provider = user.get('Provider', 'Unknown')
-            provider_counts[provider] = provider_counts.get(provider, 0) + 1
-        
         # Write summary data
         summary_data = [
             ['WealthSage User Summary', ''],
             ['Generated On', datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
             ['', ''],
-            ['Total Users', total_users],
-            ['Active Users', active_users],
-            ['Verified Users', verified_users],
+            ['Total Users', stats['total_users']],
+            ['Active Users', stats['active_users']],
+            ['Verified Users', stats['verified_users']],
             ['', ''],
             ['Role Distribution', ''],
         ]
         
-        for role, count in role_counts.items():
+        for role, count in stats['role_counts']:
             summary_data.append([f'  {role}', count])
         
         summary_data.extend([
@@ -199,59 +494,16 @@ class ExcelExportService:
             ['Provider Distribution', ''],
         ])
         
-        for provider, count in provider_counts.items():
+        for provider, count in stats['provider_counts']:
             summary_data.append([f'  {provider}', count])
         
-        # Write to sheet
-        for row_idx, row_data in enumerate(summary_data, 1):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = summary_sheet.cell(row=row_idx, column=col_idx, value=value)
-                
-                # Style headers
-                if row_idx == 1:
-                    cell.font = Font(bold=True, size=16)
-                elif value in ['Role Distribution', 'Provider Distribution', 'WealthSage User Summary']:
-                    cell.font = Font(bold=True)
-        
-        # Auto-adjust column widths
-        self.adjust_column_widths(summary_sheet)
+        return self.write_report_sheet(
+            workbook, "Summary", summary_data,
+            ['Role Distribution', 'Provider Distribution', 'WealthSage User Summary']
+        )
     
-    def create_statistics_sheet(self, workbook, users_data):
+    def create_statistics_sheet(self, workbook, stats):
         """Create statistics sheet with detailed analytics"""
-        stats_sheet = workbook.create_sheet("Statistics")
-        
-        # Registration trends (by month)
-        monthly_registrations = {}
-        for user in users_data:
-            created_at = user.get('Created At', '')
-            if created_at:
-                try:
-                    month = created_at[:7]  # YYYY-MM format
-                    monthly_registrations[month] = monthly_registrations.get(month, 0) + 1
-                except:
-                    pass
-        
-        # Financial data analysis
-        total_savings_goals = 0
-        total_current_savings = 0
-        users_with_goals = 0
-        
-        for user in users_data:
-            savings_goal = user.get('Savings Goal', '$0.00')
-            current_savings = user.get('Current Savings', '$0.00')
-            
-            try:
-                goal_amount = float(savings_goal.replace('$', '').replace(',', ''))
-                current_amount = float(current_savings.replace('$', '').replace(',', ''))
-                
-                if goal_amount > 0:
-                    total_savings_goals += goal_amount
-                    users_with_goals += 1
-                
-                total_current_savings += current_amount
-            except:
-                pass
-        
         # Write statistics
         stats_data = [
             ['WealthSage Detailed Statistics', ''],
@@ -259,39 +511,28 @@ class ExcelExportService:
             ['Registration Trends', ''],
         ]
         
-        for month, count in sorted(monthly_registrations.items()):
+        for month, count in stats['monthly_registrations']:
             stats_data.append([f'  {month}', count])
         
         stats_data.extend([
             ['', ''],
             ['Financial Overview', ''],
-            ['Total Savings Goals', f'${total_savings_goals:,.2f}'],
-            ['Total Current Savings', f'${total_current_savings:,.2f}'],
-            ['Users with Savings Goals', users_with_goals],
-            ['Average Savings Goal', f'${total_savings_goals/max(users_with_goals, 1):,.2f}'],
-            ['Average Current Savings', f'${total_current_savings/max(len(users_data), 1):,.2f}'],
+            ['Total Savings Goals', stats['total_savings_goals']],
+            ['Total Current Savings', stats['total_current_savings']],
+            ['Users with Savings Goals', stats['users_with_goals']],
+            ['Average Savings Goal', stats['average_savings_goal']],
+            ['Average Current Savings', stats['average_current_savings']],
         ])
         
-        # Write to sheet
-        for row_idx, row_data in enumerate(stats_data, 1):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = stats_sheet.cell(row=row_idx, column=col_idx, value=value)
-                
-                # Style headers
-                if row_idx == 1:
-                    cell.font = Font(bold=True, size=16)
-                elif value in ['Registration Trends', 'Financial Overview']:
-                    cell.font = Font(bold=True)
-        
-        # Auto-adjust column widths
-        self.adjust_column_widths(stats_sheet)
+        return self.write_report_sheet(
+            workbook, "Statistics", stats_data, ['Registration Trends', 'Financial Overview'],
+            money_labels=['Total Savings Goals', 'Total Current Savings',
+                          'Average Savings Goal', 'Average Current Savings']
+        )
     
     def export_user_on_signup(self, user_data):
-        """Export single user data when they sign up"""
+        """Record a new signup in the append-only signup log"""
         try:
-            # Create or update the main users file
-            main_file = os.path.join(self.export_dir, "wealthsage_all_users.xlsx")
-            
             # Prepare user data for Excel
             excel_data = {
                 'ID': user_data.get('id', ''),
@@ -306,31 +547,31 @@ class ExcelExportService:
                 'Created At': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'Provider': user_data.get('provider', 'email'),
                 'University': user_data.get('university', ''),
-                'Monthly Income': '$0.00',
-                'Savings Goal': '$0.00',
-                'Current Savings': '$0.00',
-                'Budget Limit': '$0.00'
+                # Numbers, shown as money by the compacted workbook's column format
+                'Monthly Income': 0.0,
+                'Savings Goal': 0.0,
+                'Current Savings': 0.0,
+                'Budget Limit': 0.0
             }
             
-            # Check if file exists
-            if os.path.exists(main_file):
-                # Append to existing file
-                df_existing = pd.read_excel(main_file)
-                df_new = pd.DataFrame([excel_data])
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            else:
-                # Create new file
-                df_combined = pd.DataFrame([excel_data])
-            
-            # Save to Excel
-            df_combined.to_excel(main_file, index=False)
+            # One locked, fsynced append; cost does not grow with the number of users
+            self.signup_log.append(excel_data)
             
-            logger.info(f"User {user_data.get('email')} exported to Excel")
-            return main_file
+            logger.info(f"User {user_data.get('email')} recorded in signup log")
+            return self.signup_log.log_path
             
         except Exception as e:
             logger.error(f"Error exporting user on signup: {e}")
             return None
+    
+    def compact_signup_log(self):
+        """Materialize wealthsage_all_users.xlsx from the signup log"""
+        try:
+            return self.signup_log.compact() or self.signup_log.workbook_path
+            
+        except Exception as e:
+            logger.error(f"Error compacting signup log: {e}")
+            return None
 
 # Global instance
 excel_service = ExcelExportService()
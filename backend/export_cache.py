@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional, Dict, Any, Iterable
+from signup_log import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Retention for generated exports; the least recently used artifacts go first
+EXPORT_CACHE_MAX_FILES = int(os.getenv('EXPORT_CACHE_MAX_FILES', 20))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv('EXPORT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+EXPORT_CACHE_MAX_AGE = float(os.getenv('EXPORT_CACHE_MAX_AGE', 7 * 24 * 3600))
+
+def cache_key(data_version: Dict[str, Any], options: Dict[str, Any]) -> str:
+    """Content key for an export of this data with these options"""
+    payload = json.dumps({'data': data_version, 'options': options}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+class ExportCache:
+    """
+    Content-addressed index of export artifacts in the export directory.
+
+    The manifest maps a cache key to the file holding that export, with its
+    metrics and last use. It lives next to the files and is guarded by a file
+    lock, so every worker and process shares it. Retention covers every file
+    matching the export pattern, including ones written before the cache.
+    """
+
+    def __init__(self, export_dir: str, pattern_prefix: str = "wealthsage_users_",
+                 pattern_suffix: str = ".xlsx", max_files: int = EXPORT_CACHE_MAX_FILES,
+                 max_bytes: int = EXPORT_CACHE_MAX_BYTES, max_age: float = EXPORT_CACHE_MAX_AGE):
+        self.export_dir = export_dir
+        self.pattern_prefix = pattern_prefix
+        self.pattern_suffix = pattern_suffix
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.manifest_path = os.path.join(export_dir, "export_cache.json")
+        self.lock_path = self.manifest_path + ".lock"
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, manifest: Dict[str, Dict[str, Any]]):
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(manifest, handle)
+        os.replace(temp_path, self.manifest_path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached export's metrics for key, marking it recently used"""
+        with file_lock(self.lock_path):
+            manifest = self._load()
+            entry = manifest.get(key)
+            if entry and not os.path.exists(os.path.join(self.export_dir, entry['file'])):
+                del manifest[key]
+                self._save(manifest)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            entry['last_used'] = time.time()
+            self._save(manifest)
+        self._hits += 1
+        return dict(entry['result'], file_path=os.path.join(self.export_dir, entry['file']))
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Record a freshly written export under key, then apply retention"""
+        name = os.path.basename(result['file_path'])
+        now = time.time()
+        with file_lock(self.lock_path):
+            manifest = self._load()
+            manifest[key] = {'file': name, 'result': result, 'created_at': now, 'last_used': now}
+            self._save(manifest)
+        self.enforce_retention(protect=[name])
+
+    def enforce_retention(self, protect: Iterable[str] = ()) -> int:
+        """Delete expired exports, then least recently used ones past the file and byte limits"""
+        protect = set(protect)
+        now = time.time()
+        removed = 0
+        with file_lock(self.lock_path):
+            manifest = self._load()
+            last_used = {entry['file']: entry['last_used'] for entry in manifest.values()}
+
+            files = []
+            for name in os.listdir(self.export_dir):
+                if not (name.startswith(self.pattern_prefix) and name.endswith(self.pattern_suffix)):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.export_dir, name))
+                except OSError:
+                    continue
+                # Files from before the cache have no manifest entry; their mtime stands in
+                files.append((last_used.get(name, stat.st_mtime), name, stat.st_size))
+            files.sort()
+
+            count = len(files)
+            total_bytes = sum(size for _, _, size in files)
+            for used, name, size in files:
+                expired = now - used > self.max_age
+                over = count > self.max_files or total_bytes > self.max_bytes
+                if name in protect or not (expired or over):
+                    continue
+                try:
+                    os.remove(os.path.join(self.export_dir, name))
+                except OSError as e:
+                    logger.warning(f"Could not evict export {name}: {e}")
+                    continue
+                count -= 1
+                total_bytes -= size
+                removed += 1
+
+            if removed:
+                existing = set(os.listdir(self.export_dir))
+                manifest = {key: entry for key, entry in manifest.items() if entry['file'] in existing}
+                self._save(manifest)
+        if removed:
+            self._evictions += removed
+            logger.info(f"Evicted {removed} cached exports")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_ratio': round(self._hits / lookups, 3) if lookups else None,
+            'evictions': self._evictions,
+            'entries': len(self._load()),
+            'max_files': self.max_files,
+            'max_bytes': self.max_bytes,
+            'max_age': self.max_age
+        }
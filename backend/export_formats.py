@@ -0,0 +1,154 @@
+import io
+import os
+import csv
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet exports are optional
+    pa = None
+    pq = None
+
+# Rows buffered per chunk sent to the client for streamed text formats
+EXPORT_STREAM_CHUNK_ROWS = int(os.getenv('EXPORT_STREAM_CHUNK_ROWS', 1000))
+# Rows per Parquet row group; each group is flushed to the client as it is written
+PARQUET_ROW_GROUP_SIZE = int(os.getenv('PARQUET_ROW_GROUP_SIZE', 50000))
+
+# Export format -> (media type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# A column is (name, type) with type one of 'int', 'float', 'bool', 'string', 'timestamp'
+Columns = Sequence[Tuple[str, str]]
+
+class ExportFormatError(Exception):
+    """Raised for an unknown export format or one whose dependency is missing"""
+
+def parse_timestamp(value: Any):
+    """Database timestamps as datetimes; SQLite hands them back as text"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'string': str,
+    'timestamp': parse_timestamp,
+}
+
+def typed_rows(columns: Columns, rows: Iterable[Sequence[Any]]) -> Iterator[Tuple[Any, ...]]:
+    """Coerce raw database rows to the declared column types, keeping NULLs"""
+    converters = [CONVERTERS[kind] for _, kind in columns]
+    for row in rows:
+        yield tuple(None if value is None else convert(value)
+                    for convert, value in zip(converters, row))
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stream_csv(columns: Columns, rows: Iterable[Sequence[Any]],
+               chunk_rows: int = EXPORT_STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+    """CSV with a header row, one encoded chunk per chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for chunk in _chunks(rows, chunk_rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def stream_ndjson(columns: Columns, rows: Iterable[Sequence[Any]],
+                  chunk_rows: int = EXPORT_STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+    """One JSON object per line; numbers and booleans stay JSON-typed"""
+    names = [name for name, _ in columns]
+    for chunk in _chunks(rows, chunk_rows):
+        yield "".join(json.dumps(dict(zip(names, row)), default=str) + "\n" for row in chunk).encode()
+
+class _DrainableSink:
+    """Write-only file object whose buffered bytes can be taken as they are produced"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_schema(columns: Columns):
+    types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'string': pa.string(),
+        'timestamp': pa.timestamp('us'),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+def stream_parquet(columns: Columns, rows: Iterable[Sequence[Any]],
+                   row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> Iterator[bytes]:
+    """Parquet file written one row group at a time; each group is yielded once written"""
+    schema = parquet_schema(columns)
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in _chunks(rows, row_group_size):
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema), row_group_size=len(chunk))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+# Streaming writers; admin xlsx exports are multi-sheet workbooks built by export jobs
+STREAMING_EXPORTERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+    'parquet': stream_parquet,
+}
+
+def get_streaming_exporter(fmt: str):
+    """The writer for a streamed format, checked before any row is read"""
+    if fmt not in STREAMING_EXPORTERS:
+        raise ExportFormatError(f"Unsupported streaming export format: {fmt}")
+    if fmt == 'parquet' and pq is None:
+        raise ExportFormatError("Parquet export requires pyarrow to be installed")
+    return STREAMING_EXPORTERS[fmt]
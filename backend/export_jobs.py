@@ -0,0 +1,195 @@
+import os
+import time
+import secrets
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable
+from excel_service import excel_service
+
+logger = logging.getLogger(__name__)
+
+# Exports allowed to run at once; further jobs wait in the queue
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', 2))
+# Jobs accepted but not yet finished before new submissions are refused
+EXPORT_MAX_PENDING = int(os.getenv('EXPORT_MAX_PENDING', 20))
+# How long finished jobs stay queryable, in seconds
+EXPORT_JOB_RETENTION = float(os.getenv('EXPORT_JOB_RETENTION', 3600))
+
+class ExportQueueFull(Exception):
+    """Raised when too many export jobs are already pending"""
+
+class ExportCancelled(Exception):
+    """Raised inside a running export when its job is cancelled"""
+
+class ExportJob:
+    """One queued, running or finished export and its progress"""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.id = secrets.token_hex(8)
+        self.options = options
+        # The job id keeps concurrent exports from colliding on the timestamped filename
+        self.filename = f"wealthsage_users_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.id}.xlsx"
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.rows_written = 0
+        self.total_rows = None
+        self.result = None
+        self.error = None
+        self.future: Optional[Future] = None
+        self.cancel_requested = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def progress(self, rows_written: int, total_rows: Optional[int]):
+        """Progress callback handed to the exporter; aborts the export once cancelled"""
+        self.rows_written = rows_written
+        self.total_rows = total_rows
+        if self.cancel_requested.is_set():
+            raise ExportCancelled()
+
+    def eta_seconds(self) -> Optional[float]:
+        if self.status != 'running' or not self.rows_written or not self.total_rows:
+            return None
+        rate = self.rows_written / (time.time() - self.started_at)
+        return round(max(self.total_rows - self.rows_written, 0) / rate, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        percent = None
+        if self.total_rows:
+            percent = round(100 * self.rows_written / self.total_rows, 1)
+        job = {
+            'id': self.id,
+            'status': self.status,
+            'options': self.options,
+            'progress': {
+                'rows_written': self.rows_written,
+                'total_rows': self.total_rows,
+                'percent': percent
+            },
+            'eta_seconds': self.eta_seconds(),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error
+        }
+        if self.result:
+            job['result'] = self.result
+            # A cache hit points at an earlier job's file
+            job['download_url'] = f"/api/admin/download/{os.path.basename(self.result['file_path'])}"
+        return job
+
+class ExportJobManager:
+    """Runs exports on a bounded worker pool and tracks them by job id"""
+
+    def __init__(self, export_func: Callable[..., Optional[Dict[str, Any]]],
+                 max_workers: int = EXPORT_WORKERS, max_pending: int = EXPORT_MAX_PENDING,
+                 retention: float = EXPORT_JOB_RETENTION):
+        self.export_func = export_func
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.retention = retention
+        self.jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the module starts no threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export")
+        return self._executor
+
+    def submit(self, **options) -> ExportJob:
+        """Queue an export; options are passed to the export function"""
+        job = ExportJob(options)
+        with self._lock:
+            self._prune()
+            pending = sum(1 for existing in self.jobs.values() if not existing.finished)
+            if pending >= self.max_pending:
+                raise ExportQueueFull(f"{pending} export jobs already pending")
+            self.jobs[job.id] = job
+            job.future = self._get_executor().submit(self._run, job)
+        logger.info(f"Queued export job {job.id}")
+        return job
+
+    def _run(self, job: ExportJob) -> ExportJob:
+        if job.cancel_requested.is_set():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return job
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = self.export_func(filename=job.filename, progress=job.progress, **job.options)
+            if job.result is None:
+                job.status = 'failed'
+                job.error = "No users found to export"
+            else:
+                job.status = 'completed'
+        except ExportCancelled:
+            job.status = 'cancelled'
+            logger.info(f"Export job {job.id} cancelled after {job.rows_written} rows")
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            logger.error(f"Export job {job.id} failed: {e}")
+        job.finished_at = time.time()
+        return job
+
+    def _prune(self):
+        """Forget finished jobs past the retention window; their files are left in place"""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[ExportJob]:
+        with self._lock:
+            self._prune()
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[ExportJob]:
+        """Cancel a queued or running job; running exports stop at their next progress check"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested.set()
+        if job.future.cancel():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+        return job
+
+    def is_writing(self, filename: str) -> bool:
+        """True while the job producing filename is still unfinished"""
+        with self._lock:
+            return any(not job.finished and job.filename == filename for job in self.jobs.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {'workers': self.max_workers, 'max_pending': self.max_pending, 'jobs': counts}
+
+    def close(self):
+        """Cancel outstanding jobs and wait for running exports to stop"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+# Global export job manager
+export_jobs = ExportJobManager(excel_service.export_users)
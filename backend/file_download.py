@@ -0,0 +1,188 @@
+import os
+import zlib
+import logging
+from email.utils import formatdate
+from typing import Iterator, Optional, Tuple
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per chunk when the server cannot send the file itself
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOAD_CHUNK_SIZE', 1024 * 1024))
+# zlib level for on-the-fly gzip of text exports; 1 is fastest, 9 smallest
+DOWNLOAD_GZIP_LEVEL = int(os.getenv('DOWNLOAD_GZIP_LEVEL', 6))
+
+def resolve_download_path(directory: str, filename: str) -> Optional[str]:
+    """Absolute path of a regular file directly inside directory, or None"""
+    if not filename or filename in ('.', '..') or filename != os.path.basename(filename):
+        return None
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, filename))
+    # realpath follows symlinks, so a link pointing outside the directory is refused too
+    if os.path.dirname(path) != root or not os.path.isfile(path):
+        return None
+    return path
+
+def file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match list"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+def accepts_gzip(header: Optional[str]) -> bool:
+    for coding in (header or '').split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a byte range that starts past the end of the file"""
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    The (start, end) inclusive byte range a Range header asks for.
+
+    None means serve the whole file: no header, a malformed one or several
+    ranges, which the RFC allows a server to answer in full.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None
+    first, dash, last = spec.partition('-')
+    try:
+        if not dash:
+            return None
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+class FileRangeResponse(Response):
+    """
+    All or one byte range of a file.
+
+    When the ASGI server offers the zerocopysend extension the kernel copies
+    the file to the socket (sendfile); whole files also use pathsend where
+    available. Otherwise the file is read in DOWNLOAD_CHUNK_SIZE chunks off
+    the event loop.
+    """
+
+    def __init__(self, path: str, start: int, end: int, size: int, status_code: int = 200,
+                 headers: Optional[dict] = None, media_type: Optional[str] = None):
+        self.path = path
+        self.start = start
+        self.length = end - start + 1 if size else 0
+        self.whole_file = self.length == size
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        headers = dict(headers or {}, **{'Content-Length': str(self.length)})
+        if status_code == 206:
+            headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        extensions = scope.get('extensions') or {}
+        if scope['method'].upper() == 'HEAD' or not self.length:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        elif 'http.response.zerocopysend' in extensions:
+            with open(self.path, 'rb') as handle:
+                await send({
+                    'type': 'http.response.zerocopysend',
+                    'file': handle,
+                    'offset': self.start,
+                    'count': self.length,
+                    'more_body': False
+                })
+        elif 'http.response.pathsend' in extensions and self.whole_file:
+            await send({'type': 'http.response.pathsend', 'path': self.path})
+        else:
+            async with await anyio.open_file(self.path, 'rb') as handle:
+                await handle.seek(self.start)
+                remaining = self.length
+                while remaining:
+                    chunk = await handle.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break  # Truncated underneath us; Content-Length already promised more
+                    remaining -= len(chunk)
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': bool(remaining)})
+                if remaining:
+                    logger.warning(f"{self.path} shrank while it was being sent")
+
+def gzip_file(path: str, level: int = DOWNLOAD_GZIP_LEVEL) -> Iterator[bytes]:
+    """Gzip-encoded chunks of a file, compressed as it is read"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    with open(path, 'rb') as handle:
+        while True:
+            chunk = handle.read(DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+    yield compressor.flush()
+
+def file_download_response(request: Request, path: str, media_type: str, filename: str,
+                           compress: bool = False) -> Response:
+    """
+    Serve a file honoring If-None-Match, Range/If-Range and, for compress=True,
+    Accept-Encoding: gzip. Ranges are always of the identity encoding, so a
+    resumed download is never gzipped.
+    """
+    stat_result = os.stat(path)
+    size = stat_result.st_size
+    etag = file_etag(stat_result)
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Accept-Ranges': 'bytes',
+        'Last-Modified': formatdate(stat_result.st_mtime, usegmt=True),
+    }
+    if compress:
+        headers['Vary'] = 'Accept-Encoding'
+
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None  # The client's partial copy is stale; send it all again
+    gzip = compress and range_header is None and accepts_gzip(request.headers.get('accept-encoding'))
+    if gzip:
+        # The encoded bytes differ, so they get their own validator
+        etag = etag[:-1] + '-gzip"'
+    headers['ETag'] = etag
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    if gzip:
+        headers['Content-Encoding'] = 'gzip'
+        # The encoded length is unknown until compressed, so HEAD gets the headers alone
+        body = iter(()) if request.method == 'HEAD' else gzip_file(path)
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={'Content-Range': f"bytes */{size}"})
+    if byte_range is None:
+        return FileRangeResponse(path, 0, size - 1, size, headers=headers, media_type=media_type)
+    start, end = byte_range
+    return FileRangeResponse(path, start, end, size, status_code=206, headers=headers, media_type=media_type)
@@ -0,0 +1,287 @@
+"""
+Ordered schema migrations for the WealthSage database.
+
+Each migration runs once and is recorded in the schema_version table.
+Steps are callables taking a SQLAlchemy connection, so they can use
+dialect-aware DDL; build them with create_tables(), create_index(),
+change_counter() and sql(). Append new migrations to MIGRATIONS with the next version number;
+never edit one that has already shipped.
+"""
+import logging
+from collections import namedtuple
+from typing import List, Sequence
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+import schema
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'name', 'steps'])
+
+# Server databases the schema is built for from schema.py; SQLite is the original target
+SERVER_DIALECTS = ('mysql', 'mariadb', 'postgresql')
+
+def create_tables(*tables, dialects: Sequence[str] = None):
+    """Create tables from schema.py unless they already exist, only on the given dialects if any are named"""
+    def step(conn: Connection):
+        if dialects is None or conn.dialect.name in dialects:
+            schema.metadata.create_all(conn, tables=list(tables), checkfirst=True)
+    return step
+
+def create_index(name: str, table: str, *columns: str):
+    """CREATE INDEX unless an index with that name already exists"""
+    def step(conn: Connection):
+        existing = {index['name'] for index in inspect(conn).get_indexes(table)}
+        if name not in existing:
+            conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    return step
+
+def sql(statement: str, dialects: Sequence[str] = None):
+    """Run statement, only on the given dialects if any are named"""
+    def step(conn: Connection):
+        if dialects is None or conn.dialect.name in dialects:
+            conn.execute(text(statement))
+    return step
+
+# PostgreSQL bumps once per statement; the trigger passes the counter's name
+POSTGRES_BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = TG_ARGV[0];
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+def change_counter(table: str):
+    """Seed table's data_versions row and bump it from triggers on every insert, update and delete"""
+    def step(conn: Connection):
+        exists = conn.execute(
+            text("SELECT COUNT(*) FROM data_versions WHERE name = :name"), {'name': table}
+        ).scalar()
+        if not exists:
+            conn.execute(text("INSERT INTO data_versions (name, version) VALUES (:name, 0)"), {'name': table})
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            conn.execute(text(POSTGRES_BUMP_FUNCTION))
+            conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_data_version ON {table}"))
+            conn.execute(text(
+                f"CREATE TRIGGER trg_{table}_data_version AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH STATEMENT EXECUTE PROCEDURE bump_data_version('{table}')"
+            ))
+            return
+        if dialect not in ('sqlite', 'mysql'):
+            logger.warning(f"No change counter triggers for {dialect}; {table} exports are versioned by timestamps only")
+            return
+        bump = f"UPDATE data_versions SET version = version + 1 WHERE name = '{table}'"
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            name = f"trg_{table}_{operation.lower()}_data_version"
+            if dialect == 'sqlite':
+                conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation} ON {table} BEGIN {bump}; END"))
+            else:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                conn.execute(text(f"CREATE TRIGGER {name} AFTER {operation} ON {table} FOR EACH ROW {bump}"))
+    return step
+
+def drop_change_counter(table: str):
+    """Remove change_counter's triggers; the table's data_versions row stays for the application to bump"""
+    def step(conn: Connection):
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_data_version ON {table}"))
+        elif dialect in ('sqlite', 'mysql'):
+            for operation in ('insert', 'update', 'delete'):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_{operation}_data_version"))
+    return step
+
+MIGRATIONS = [
+    Migration(1, 'initial_schema', [
+        # Users table
+        sql('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            display_name TEXT,
+            role TEXT NOT NULL DEFAULT 'Student',
+            phone TEXT,
+            avatar_url TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            is_verified BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            firebase_uid TEXT,
+            provider TEXT DEFAULT 'email'
+        )
+        ''', dialects=('sqlite',)),
+        # User profiles table for additional data
+        sql('''
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            university TEXT,
+            major TEXT,
+            graduation_year INTEGER,
+            monthly_income DECIMAL(10,2) DEFAULT 0,
+            savings_goal DECIMAL(10,2) DEFAULT 0,
+            current_savings DECIMAL(10,2) DEFAULT 0,
+            budget_limit DECIMAL(10,2) DEFAULT 0,
+            preferences TEXT, -- JSON string
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''', dialects=('sqlite',)),
+        # Sessions table for authentication
+        sql('''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_token TEXT UNIQUE NOT NULL,
+            firebase_token TEXT,
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''', dialects=('sqlite',)),
+        # Income sources table
+        sql('''
+        CREATE TABLE IF NOT EXISTS income_sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            source_name TEXT NOT NULL,
+            source_type TEXT NOT NULL, -- scholarship, freelance, job, etc.
+            amount DECIMAL(10,2) NOT NULL,
+            frequency TEXT DEFAULT 'monthly', -- monthly, yearly, one-time
+            description TEXT,
+            url TEXT,
+            deadline DATE,
+            status TEXT DEFAULT 'active', -- active, applied, completed
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''', dialects=('sqlite',)),
+        # Financial goals table
+        sql('''
+        CREATE TABLE IF NOT EXISTS financial_goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            goal_name TEXT NOT NULL,
+            target_amount DECIMAL(10,2) NOT NULL,
+            current_amount DECIMAL(10,2) DEFAULT 0,
+            target_date DATE,
+            category TEXT, -- emergency, education, travel, etc.
+            description TEXT,
+            is_completed BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''', dialects=('sqlite',)),
+        # The same tables in portable types, for the databases supported since
+        # this shipped; SQLite keeps the DDL above, fresh or upgraded
+        create_tables(
+            schema.users, schema.user_profiles, schema.user_sessions,
+            schema.income_sources, schema.financial_goals,
+            dialects=SERVER_DIALECTS
+        ),
+    ]),
+    Migration(2, 'hot_lookup_indexes', [
+        # Session lookups and cleanup by user
+        create_index('idx_user_sessions_user_id', 'user_sessions', 'user_id'),
+        # get_user_income_sources: WHERE user_id = ? AND status = ? ORDER BY created_at DESC
+        create_index('idx_income_sources_user_status_created', 'income_sources',
+                     'user_id', 'status', 'created_at'),
+        create_index('idx_financial_goals_user_id', 'financial_goals', 'user_id'),
+        # Covers the profile columns read by the users LEFT JOIN user_profiles lookups
+        create_index('idx_user_profiles_user_covering', 'user_profiles',
+                     'user_id', 'university', 'monthly_income', 'savings_goal',
+                     'current_savings', 'budget_limit'),
+    ]),
+    Migration(3, 'session_expiry', [
+        # session_token lookups already use the UNIQUE constraint's index; the
+        # sweeper needs a range scan on expiry
+        create_index('idx_user_sessions_expires_at', 'user_sessions', 'expires_at'),
+        # Inactive sessions are treated as expired from now on
+        sql('UPDATE user_sessions SET expires_at = 0 WHERE NOT is_active'),
+    ]),
+    Migration(4, 'users_keyset_index', [
+        # Keyset pagination on (created_at, id); id is the rowid, which every index carries
+        create_index('idx_users_created_at', 'users', 'created_at'),
+    ]),
+    Migration(5, 'delta_exports', [
+        create_tables(schema.export_watermarks),
+        # Delta exports select ids changed since a watermark, one range scan per column
+        create_index('idx_users_updated_at', 'users', 'updated_at'),
+        create_index('idx_users_last_login', 'users', 'last_login'),
+        create_index('idx_user_profiles_updated_at', 'user_profiles', 'updated_at'),
+    ]),
+    Migration(6, 'change_counters', [
+        create_tables(schema.data_versions),
+        # Everything a user export reads; the export cache keys on these
+        change_counter('users'),
+        change_counter('user_profiles'),
+    ]),
+    Migration(7, 'application_change_counters', [
+        # Row triggers made every write, logins included, contend for one
+        # counter row; the export write paths now bump it once per transaction
+        drop_change_counter('users'),
+        drop_change_counter('user_profiles'),
+        sql('DROP FUNCTION IF EXISTS bump_data_version()', dialects=('postgresql',)),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+class SchemaVersionError(Exception):
+    """Raised when the database schema does not match this code"""
+
+def get_schema_version(conn: Connection) -> int:
+    """Return the highest applied migration version, 0 for a fresh database"""
+    schema.metadata.create_all(conn, tables=[schema.schema_version], checkfirst=True)
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+def apply_migrations(conn: Connection, target: int = None) -> List[str]:
+    """Apply pending migrations in order, up to and including target"""
+    current = get_schema_version(conn)
+    conn.commit()
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        if target is not None and migration.version > target:
+            break
+        try:
+            for step in migration.steps:
+                step(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+                {'version': migration.version, 'name': migration.name}
+            )
+            conn.commit()
+        except SQLAlchemyError as e:
+            conn.rollback()
+            logger.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+            raise
+        applied.append(f"{migration.version:04d}_{migration.name}")
+    return applied
+
+def check_schema(conn: Connection):
+    """Startup check that the database is at exactly the version this code expects"""
+    version = get_schema_version(conn)
+    if version > LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema version {version} is newer than this code supports ({LATEST_VERSION})"
+        )
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema version {version} is behind; expected {LATEST_VERSION}"
+        )
@@ -0,0 +1,171 @@
+import os
+import hmac
+import hashlib
+import secrets
+import asyncio
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# PBKDF2 cost for new hashes; existing hashes are upgraded on the next successful login
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 100000))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+# Hash jobs allowed to be queued or running before new ones are rejected
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', PASSWORD_HASH_WORKERS * 16))
+# Separate, smaller pool for bulk imports so they cannot starve signups and logins
+PASSWORD_HASH_BULK_WORKERS = int(os.getenv('PASSWORD_HASH_BULK_WORKERS', max(1, PASSWORD_HASH_WORKERS // 4)))
+
+HASH_ALGORITHM = 'pbkdf2_sha256'
+# Iteration count used by the original "salt:hash" format
+LEGACY_ITERATIONS = 100000
+
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Hash password with a random salt as pbkdf2_sha256$<iterations>$<salt>$<hash>"""
+    salt = secrets.token_hex(16)
+    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations)
+    return f"{HASH_ALGORITHM}${iterations}${salt}${password_hash.hex()}"
+
+def parse_password_hash(password_hash: str) -> Tuple[int, str, str]:
+    """Split a stored hash into (iterations, salt, hash hex), accepting the legacy format"""
+    if password_hash.startswith(f"{HASH_ALGORITHM}$"):
+        _, iterations, salt, hash_hex = password_hash.split('$')
+        return int(iterations), salt, hash_hex
+    salt, hash_hex = password_hash.split(':')
+    return LEGACY_ITERATIONS, salt, hash_hex
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Verify password against a stored hash in constant time"""
+    try:
+        iterations, salt, hash_hex = parse_password_hash(password_hash)
+        password_check = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations)
+        return hmac.compare_digest(password_check.hex(), hash_hex)
+    except (ValueError, AttributeError):
+        return False
+
+def needs_rehash(password_hash: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> bool:
+    """True if the stored hash uses the legacy format or a different cost"""
+    if not password_hash.startswith(f"{HASH_ALGORITHM}$"):
+        return True
+    try:
+        return parse_password_hash(password_hash)[0] != iterations
+    except ValueError:
+        return True
+
+class HashQueueFull(Exception):
+    """Raised when too many hash jobs are already pending"""
+
+class PasswordHasher:
+    """Runs PBKDF2 in a process pool so hashing never holds the API's GIL or event loop"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+                 bulk_workers: int = PASSWORD_HASH_BULK_WORKERS):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.bulk_workers = max(1, bulk_workers)
+        self._executor = None
+        self._bulk_executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._max_pending = 0
+        self._completed = 0
+        self._bulk_completed = 0
+        self._rejected = 0
+        self._latencies_ms = deque(maxlen=1000)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use so importing this module never forks
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _get_bulk_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._bulk_executor is None:
+                self._bulk_executor = ProcessPoolExecutor(max_workers=self.bulk_workers)
+            return self._bulk_executor
+
+    def submit(self, func, *args) -> Future:
+        """Queue a hash job, rejecting it if the queue is already full"""
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._rejected += 1
+                raise HashQueueFull(f"Password hashing queue is full ({self.max_queue} pending)")
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+
+        started = time.perf_counter()
+
+        def _done(_future):
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._latencies_ms.append((time.perf_counter() - started) * 1000)
+
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(_done)
+        return future
+
+    def hash_many(self, passwords) -> list:
+        """Hash a batch on the bulk pool, leaving the interactive pool and its queue to logins"""
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        chunksize = max(1, len(passwords) // (self.bulk_workers * 4))
+        hashes = list(self._get_bulk_executor().map(hash_password, passwords, chunksize=chunksize))
+        with self._lock:
+            self._bulk_completed += len(passwords)
+        return hashes
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(hash_password, password))
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await asyncio.wrap_future(self.submit(verify_password, password, password_hash))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and latency metrics"""
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            pending = self._pending
+            stats = {
+                'workers': self.workers,
+                'iterations': PASSWORD_HASH_ITERATIONS,
+                'queue_depth': pending,
+                'max_queue_depth': self._max_pending,
+                'queue_limit': self.max_queue,
+                'completed': self._completed,
+                'bulk_workers': self.bulk_workers,
+                'bulk_completed': self._bulk_completed,
+                'rejected': self._rejected
+            }
+        if latencies:
+            stats['latency_ms'] = {
+                'avg': round(sum(latencies) / len(latencies), 2),
+                'p50': round(latencies[len(latencies) // 2], 2),
+                'p99': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+                'max': round(latencies[-1], 2)
+            }
+        return stats
+
+    def close(self):
+        with self._lock:
+            executors = (self._executor, self._bulk_executor)
+            self._executor = self._bulk_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+# Global hashing service
+password_hasher = PasswordHasher()
@@ -0,0 +1,130 @@
+"""
+SQLAlchemy Core table definitions for the WealthSage database.
+
+These mirror the original SQLite DDL with portable types, so the same
+schema can be created on SQLite, MySQL or PostgreSQL. Indexed text
+columns use bounded String lengths because MySQL cannot index TEXT.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Boolean, DateTime, Date,
+    Float, Numeric, BigInteger, ForeignKey, func
+)
+
+metadata = MetaData()
+
+def timestamps():
+    return [
+        Column('created_at', DateTime, server_default=func.current_timestamp()),
+        Column('updated_at', DateTime, server_default=func.current_timestamp()),
+    ]
+
+# Users table
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('uid', String(128), unique=True, nullable=False),
+    Column('email', String(255), unique=True, nullable=False),
+    Column('password_hash', String(255)),
+    Column('first_name', String(255), nullable=False),
+    Column('last_name', String(255), nullable=False),
+    Column('display_name', String(255)),
+    Column('role', String(50), nullable=False, server_default='Student'),
+    Column('phone', String(32)),
+    Column('avatar_url', Text),
+    Column('is_active', Boolean, server_default='1'),
+    Column('is_verified', Boolean, server_default='0'),
+    *timestamps(),
+    Column('last_login', DateTime),
+    Column('firebase_uid', String(128)),
+    Column('provider', String(50), server_default='email'),
+    sqlite_autoincrement=True
+)
+
+# User profiles table for additional data
+user_profiles = Table(
+    'user_profiles', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('university', String(255)),
+    Column('major', String(255)),
+    Column('graduation_year', Integer),
+    Column('monthly_income', Numeric(10, 2), server_default='0'),
+    Column('savings_goal', Numeric(10, 2), server_default='0'),
+    Column('current_savings', Numeric(10, 2), server_default='0'),
+    Column('budget_limit', Numeric(10, 2), server_default='0'),
+    Column('preferences', Text),  # JSON string
+    *timestamps(),
+    sqlite_autoincrement=True
+)
+
+# Sessions table for authentication
+user_sessions = Table(
+    'user_sessions', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('session_token', String(128), unique=True, nullable=False),
+    Column('firebase_token', Text),
+    Column('expires_at', Float, nullable=False),  # Unix timestamp
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+    Column('is_active', Boolean, server_default='1'),
+    sqlite_autoincrement=True
+)
+
+# Income sources table
+income_sources = Table(
+    'income_sources', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('source_name', String(255), nullable=False),
+    Column('source_type', String(50), nullable=False),  # scholarship, freelance, job, etc.
+    Column('amount', Numeric(10, 2), nullable=False),
+    Column('frequency', String(20), server_default='monthly'),  # monthly, yearly, one-time
+    Column('description', Text),
+    Column('url', Text),
+    Column('deadline', Date),
+    Column('status', String(20), server_default='active'),  # active, applied, completed
+    *timestamps(),
+    sqlite_autoincrement=True
+)
+
+# Financial goals table
+financial_goals = Table(
+    'financial_goals', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('goal_name', String(255), nullable=False),
+    Column('target_amount', Numeric(10, 2), nullable=False),
+    Column('current_amount', Numeric(10, 2), server_default='0'),
+    Column('target_date', Date),
+    Column('category', String(50)),  # emergency, education, travel, etc.
+    Column('description', Text),
+    Column('is_completed', Boolean, server_default='0'),
+    *timestamps(),
+    sqlite_autoincrement=True
+)
+
+schema_version = Table(
+    'schema_version', metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, server_default=func.current_timestamp())
+)
+
+# High-water mark of each export, so a later export can ask for rows changed since it
+export_watermarks = Table(
+    'export_watermarks', metadata,
+    Column('export_id', String(64), primary_key=True),
+    Column('format', String(20), nullable=False),
+    Column('since', DateTime),  # NULL for a full export
+    Column('watermark', DateTime, nullable=False),
+    Column('rows', Integer),
+    Column('created_at', DateTime, server_default=func.current_timestamp())
+)
+
+# Per-table change counters, bumped once by each transaction that changes
+# exported data, so export caches can tell apart writes in the same second
+data_versions = Table(
+    'data_versions', metadata,
+    Column('name', String(64), primary_key=True),
+    Column('version', BigInteger, nullable=False, server_default='0')
+)
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+import logging
+from typing import Optional, Dict, Any
+from cache import TTLCache
+from database import DatabaseManager, db
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', 10000))
+# Upper bound on how long a cached session is trusted without re-checking the database
+SESSION_CACHE_TTL = float(os.getenv('SESSION_CACHE_TTL', 300))
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', 600))
+SESSION_SWEEP_BATCH = int(os.getenv('SESSION_SWEEP_BATCH', 500))
+
+class SessionStore:
+    """Resolves session tokens to users through an LRU+TTL cache over user_sessions"""
+
+    def __init__(self, manager: DatabaseManager, cache_size: int = SESSION_CACHE_SIZE,
+                 cache_ttl: float = SESSION_CACHE_TTL):
+        self.manager = manager
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self._sweeper = None
+        self._stop = threading.Event()
+        self._last_sweep = None
+        self._swept = 0
+
+    def get_cached(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Cache-only lookup, safe to call from the event loop"""
+        user_id = self.cache.get(session_token)
+        if user_id is None:
+            return None
+        # User records live in the user cache so profile writes invalidate them in one place
+        return self.manager.user_cache.get_by_id(user_id)
+
+    def resolve(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Return the session's user, reading through to the database on a miss"""
+        user = self.get_cached(session_token)
+        if user is not None:
+            return user
+        return self.load(session_token)
+
+    def load(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Read a session from the database and cache it"""
+        user = self.manager.get_session_user(session_token)
+        if user is not None:
+            expires_at = user.pop('session_expires_at')
+            # Never cache past the session's own expiry
+            self.cache.set(session_token, user['id'], ttl=expires_at - time.time())
+            self.manager.user_cache.put(user)
+        return user
+
+    def invalidate(self, session_token: str) -> bool:
+        """End a session and drop it from the cache"""
+        self.cache.pop(session_token)
+        return self.manager.deactivate_session(session_token)
+
+    def sweep(self) -> int:
+        """Delete expired and inactive sessions in batches"""
+        deleted = self.manager.delete_expired_sessions(SESSION_SWEEP_BATCH)
+        self._last_sweep = time.time()
+        self._swept += deleted
+        if deleted:
+            logger.info(f"Session sweeper deleted {deleted} expired sessions")
+        return deleted
+
+    def _sweep_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+
+    def start_sweeper(self, interval: float = SESSION_SWEEP_INTERVAL):
+        """Start the background expiry sweeper thread"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, args=(interval,), name="session-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+        if self._sweeper:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cache': self.cache.stats(),
+            'sweeper_running': bool(self._sweeper and self._sweeper.is_alive()),
+            'last_sweep': self._last_sweep,
+            'sessions_swept': self._swept
+        }
+
+# Global session store
+session_store = SessionStore(db)
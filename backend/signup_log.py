@@ -0,0 +1,179 @@
+import os
+import json
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Sequence
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background compactions into the xlsx; 0 disables the scheduler
+SIGNUP_COMPACT_INTERVAL = float(os.getenv('SIGNUP_COMPACT_INTERVAL', 300))
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive advisory lock on a lock file, across threads and processes"""
+    with open(path, 'a+b') as handle:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of an NDJSON log, skipping a torn trailing line"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable line {line_number} of {path}")
+
+class SignupLog:
+    """
+    Append-only NDJSON log of signups, compacted into an xlsx workbook.
+
+    Appending is O(1): one locked, fsynced write per signup. compact() folds the
+    log into the workbook off the request path, de-duplicated on the key columns
+    so a compaction interrupted after writing the workbook cannot repeat rows.
+    """
+
+    def __init__(self, log_path: str, workbook_path: str, key: Sequence[str] = ('ID', 'Email'),
+                 money_columns: Sequence[str] = (), money_format: str = '$#,##0.00'):
+        self.log_path = log_path
+        self.workbook_path = workbook_path
+        self.key = list(key)
+        self.money_columns = list(money_columns)
+        self.money_format = money_format
+        self.lock_path = log_path + '.lock'
+        self.compacting_path = log_path + '.compacting'
+        self.compact_lock_path = log_path + '.compact.lock'
+        self._compactor = None
+        self._stop = threading.Event()
+        self._appended = 0
+        self._compactions = 0
+        self._last_compaction = None
+
+    def append(self, record: Dict[str, Any]):
+        """Durably append one record"""
+        line = (json.dumps(record, default=str) + "\n").encode()
+        with file_lock(self.lock_path):
+            with open(self.log_path, 'a+b') as handle:
+                # A crash mid-write can leave a torn line; never glue a record onto it
+                size = handle.seek(0, os.SEEK_END)
+                if size:
+                    handle.seek(size - 1)
+                    if handle.read(1) != b"\n":
+                        line = b"\n" + line
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+        self._appended += 1
+
+    def pending(self) -> int:
+        """Records logged since the last compaction"""
+        return sum(1 for path in (self.compacting_path, self.log_path) for _ in read_records(path))
+
+    def compact(self) -> Optional[str]:
+        """Fold logged records into the workbook; returns its path, or None if nothing was pending"""
+        with file_lock(self.compact_lock_path):
+            # Detach the current log so signups keep appending to a fresh one meanwhile.
+            # A .compacting file left by an interrupted run is folded in first.
+            if not os.path.exists(self.compacting_path):
+                with file_lock(self.lock_path):
+                    if not os.path.exists(self.log_path):
+                        return None
+                    os.replace(self.log_path, self.compacting_path)
+
+            records = list(read_records(self.compacting_path))
+            if records:
+                frames = []
+                if os.path.exists(self.workbook_path):
+                    frames.append(pd.read_excel(self.workbook_path))
+                frames.append(pd.DataFrame(records))
+                combined = pd.concat(frames, ignore_index=True)
+                if set(self.key) <= set(combined.columns):
+                    combined = combined.drop_duplicates(subset=self.key, keep='first')
+                money_columns = [column for column in self.money_columns if column in combined.columns]
+                for column in money_columns:
+                    # Older records and workbooks hold amounts as '$1,234.00' text
+                    amounts = combined[column].astype(str).str.replace(r'[$,]', '', regex=True)
+                    combined[column] = pd.to_numeric(amounts, errors='coerce')
+
+                # Write aside and swap in, so readers never see a half-written workbook
+                root, ext = os.path.splitext(self.workbook_path)
+                temp_path = f"{root}.tmp{ext}"
+                with pd.ExcelWriter(temp_path, engine='xlsxwriter') as writer:
+                    combined.to_excel(writer, index=False)
+                    money_format = writer.book.add_format({'num_format': self.money_format})
+                    sheet = next(iter(writer.sheets.values()))
+                    for column in money_columns:
+                        index = combined.columns.get_loc(column)
+                        sheet.set_column(index, index, None, money_format)
+                with open(temp_path, 'r+b') as handle:
+                    os.fsync(handle.fileno())
+                os.replace(temp_path, self.workbook_path)
+
+            os.remove(self.compacting_path)
+            self._compactions += 1
+            self._last_compaction = time.time()
+            logger.info(f"Compacted {len(records)} signups into {self.workbook_path}")
+            return self.workbook_path
+
+    def _compact_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Signup log compaction failed: {e}")
+
+    def start_compactor(self, interval: float = SIGNUP_COMPACT_INTERVAL):
+        """Start the background compaction thread"""
+        if interval <= 0 or (self._compactor and self._compactor.is_alive()):
+            return
+        self._stop.clear()
+        self._compactor = threading.Thread(
+            target=self._compact_loop, args=(interval,), name="signup-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def stop_compactor(self):
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join()
+            self._compactor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'log_path': self.log_path,
+            'workbook_path': self.workbook_path,
+            'appended': self._appended,
+            'compactions': self._compactions,
+            'last_compaction': self._last_compaction,
+            'compactor_running': bool(self._compactor and self._compactor.is_alive())
+        }
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Bulk user import from CSV or NDJSON.
+
+CSV files need a header row; recognised columns are email, password,
+first_name, last_name, role, university, display_name, uid, provider.
+NDJSON files hold one JSON object per line with the same keys.
+
+Usage: python backend/user_import.py users.csv [--format csv] [--chunk-size 500] [--errors errors.ndjson]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+def parse_user_records(lines: Iterable[str], fmt: str, fieldnames: List[str] = None) -> Iterator[Any]:
+    """Yield one record per input row; unparseable NDJSON lines are yielded as-is"""
+    if fmt == 'csv':
+        for record in csv.DictReader(lines, fieldnames=fieldnames):
+            yield {key.strip(): (value or '').strip() for key, value in record.items() if key}
+    else:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
+
+def csv_header(line: str) -> List[str]:
+    return [name.strip() for name in next(csv.reader([line]))]
+
+async def iter_body_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed request body into decoded text lines"""
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line.decode('utf-8-sig').rstrip('\r')
+    if buffer:
+        yield buffer.decode('utf-8-sig').rstrip('\r')
+
+def merge_reports(total: Dict[str, Any], part: Dict[str, Any]):
+    for key in ('processed', 'created', 'failed'):
+        total[key] += part[key]
+    total['errors'].extend(part['errors'])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=IMPORT_FORMATS)
+    parser.add_argument('--chunk-size', type=int)
+    parser.add_argument('--errors', help="Write per-row errors to this NDJSON file")
+    args = parser.parse_args()
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from database import db, BULK_IMPORT_CHUNK_SIZE
+
+    fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+    started = time.perf_counter()
+    with open(args.path, newline='', encoding='utf-8-sig') as f:
+        report = db.create_users_bulk(
+            parse_user_records(f, fmt), chunk_size=args.chunk_size or BULK_IMPORT_CHUNK_SIZE
+        )
+    elapsed = time.perf_counter() - started
+    db.close()
+
+    print(f"Processed {report['processed']} rows in {elapsed:.1f}s "
+          f"({report['created'] / elapsed * 60:.0f} users/min)")
+    print(f"  created: {report['created']}")
+    print(f"  failed:  {report['failed']}")
+    if args.errors:
+        with open(args.errors, 'w') as f:
+            for error in report['errors']:
+                f.write(json.dumps(error) + '\n')
+    else:
+        for error in report['errors'][:20]:
+            print(f"  row {error['row']}: {error['error']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import atexit
+import threading
+import logging
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_FLUSH_MS = int(os.getenv('WRITE_BEHIND_FLUSH_MS', 500))
+WRITE_BEHIND_MAX_ENTRIES = int(os.getenv('WRITE_BEHIND_MAX_ENTRIES', 500))
+
+class WriteBehindBuffer:
+    """
+    Coalesces non-critical row updates and writes them in one batch.
+
+    Updates are merged per key (later values win) and handed to flush_func as
+    {key: {column: value}} every flush_interval_ms, as soon as max_entries keys
+    are pending, and on close(). A failed flush is retried on the next cycle.
+    A flush_interval_ms of 0 disables buffering and writes through immediately.
+    """
+
+    def __init__(self, flush_func: Callable[[Dict[Hashable, Dict[str, Any]]], None],
+                 name: str, flush_interval_ms: int = WRITE_BEHIND_FLUSH_MS,
+                 max_entries: int = WRITE_BEHIND_MAX_ENTRIES):
+        self.flush_func = flush_func
+        self.name = name
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_entries = max(1, max_entries)
+        self._pending = {}
+        self._inflight = {}  # The batch being written by flush()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._queued = 0
+        self._flushed = 0
+        self._flushes = 0
+        self._failures = 0
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"write-behind-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def put(self, key: Hashable, values: Dict[str, Any]):
+        """Queue an update for key, merging with any pending update for the same key"""
+        with self._lock:
+            write_through = self._closed or self.flush_interval <= 0
+            if not write_through:
+                self._pending.setdefault(key, {}).update(values)
+                self._queued += 1
+                self._ensure_thread()
+                if len(self._pending) >= self.max_entries:
+                    self._wakeup.set()
+        if write_through:
+            # Unbuffered mode, or a late write after shutdown
+            self.flush_func({key: dict(values)})
+
+    def flush(self) -> int:
+        """Write all pending updates now; returns the number of keys written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                self.flush_func(batch)
+            except Exception as e:
+                with self._lock:
+                    self._inflight = {}
+                    self._failures += 1
+                    # Re-queue without clobbering anything newer that arrived meanwhile
+                    for key, values in batch.items():
+                        merged = dict(values)
+                        merged.update(self._pending.get(key, {}))
+                        self._pending[key] = merged
+                logger.error(f"Write-behind flush for {self.name} failed: {e}")
+                return 0
+            with self._lock:
+                self._inflight = {}
+                self._flushes += 1
+                self._flushed += len(batch)
+            return len(batch)
+
+    def oldest(self, column: str) -> Any:
+        """Smallest value of column among updates not yet in the database, or None"""
+        with self._lock:
+            values = [values[column] for batch in (self._pending, self._inflight)
+                      for values in batch.values() if values.get(column) is not None]
+        return min(values, default=None)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flusher thread and write everything still pending"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'queued': self._queued,
+                'flushed': self._flushed,
+                'flushes': self._flushes,
+                'failures': self._failures,
+                'flush_interval_ms': int(self.flush_interval * 1000),
+                'max_entries': self.max_entries
+            }
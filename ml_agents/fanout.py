@@ -0,0 +1,155 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Threads shared by every agent's searches
+FANOUT_MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', 16))
+# Searches one category may have in flight at once, across all callers
+FANOUT_CONCURRENCY = int(os.getenv('FANOUT_CONCURRENCY', 5))
+# Seconds a single search may take before its result is given up on; the
+# search sees this deadline through call_deadline() and stops retrying at it
+FANOUT_QUERY_TIMEOUT = float(os.getenv('FANOUT_QUERY_TIMEOUT', 10))
+# Seconds for a whole fan-out; whatever has finished by then is returned
+FANOUT_DEADLINE = float(os.getenv('FANOUT_DEADLINE', 20))
+
+_call_state = threading.local()
+
+def call_deadline() -> Optional[float]:
+    """time.monotonic() at which the fan-out running this call stops waiting for it; None outside one"""
+    return getattr(_call_state, 'deadline', None)
+
+def _call_with_deadline(func: Callable[[Any], Any], item: Any, deadline_at: float) -> Any:
+    _call_state.deadline = deadline_at
+    try:
+        return func(item)
+    finally:
+        _call_state.deadline = None
+
+class FanOutResult:
+    """Per-item results of a fan-out, in input order; None where an item produced nothing"""
+
+    def __init__(self, items: Sequence[Any]):
+        self.items = list(items)
+        self.results: List[Any] = [None] * len(self.items)
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    @property
+    def partial(self) -> bool:
+        return self.completed < len(self.items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'items': len(self.items),
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'skipped': self.skipped,
+            'seconds': round(self.seconds, 3)
+        }
+
+class FanOutExecutor:
+    """
+    Runs one function over many items on a shared thread pool.
+
+    Each key (an agent's category) has its own cap on in-flight calls, held
+    until a call actually returns, so a slow upstream is never hit harder
+    than the cap. Callers stop waiting on a call after query_timeout and on
+    the whole fan-out at deadline, and get back whatever completed; the call
+    can read the earlier of the two from call_deadline() and wind up by then.
+    """
+
+    def __init__(self, max_workers: int = FANOUT_MAX_WORKERS, concurrency: int = FANOUT_CONCURRENCY,
+                 query_timeout: float = FANOUT_QUERY_TIMEOUT, deadline: float = FANOUT_DEADLINE):
+        self.max_workers = max(1, max_workers)
+        self.concurrency = max(1, concurrency)
+        self.query_timeout = query_timeout
+        self.deadline = deadline
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the module starts no threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fanout")
+            return self._executor
+
+    def _limit(self, key: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = threading.BoundedSemaphore(self.concurrency)
+            return self._limits[key]
+
+    def map(self, key: str, func: Callable[[Any], Any], items: Sequence[Any],
+            query_timeout: Optional[float] = None, deadline: Optional[float] = None) -> FanOutResult:
+        """Call func on every item, at most the key's concurrency at a time"""
+        query_timeout = self.query_timeout if query_timeout is None else query_timeout
+        deadline = self.deadline if deadline is None else deadline
+        outcome = FanOutResult(items)
+        executor = self._get_executor()
+        limit = self._limit(key)
+        start = time.monotonic()
+        deadline_at = start + deadline
+        waiting = deque(enumerate(outcome.items))
+        running = {}
+
+        while waiting or running:
+            now = time.monotonic()
+            if now >= deadline_at:
+                break
+            while waiting and limit.acquire(blocking=False):
+                index, item = waiting.popleft()
+                future = executor.submit(_call_with_deadline, func, item, min(now + query_timeout, deadline_at))
+                future.add_done_callback(lambda _: limit.release())
+                running[future] = (index, now)
+            if not running:
+                # Every slot is held by other callers of the same key
+                time.sleep(min(0.01, deadline_at - now))
+                continue
+
+            wake_at = min([deadline_at] + [started + query_timeout for _, started in running.values()])
+            done, _ = wait(list(running), timeout=max(0, wake_at - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                index, _ = running.pop(future)
+                try:
+                    outcome.results[index] = future.result()
+                    outcome.completed += 1
+                except Exception as e:
+                    outcome.failed += 1
+                    logger.error(f"{key} fan-out call failed for {outcome.items[index]!r}: {e}")
+            now = time.monotonic()
+            for future, (index, started) in list(running.items()):
+                if now - started >= query_timeout:
+                    # Its thread finishes on its own; the result is no longer wanted
+                    del running[future]
+                    outcome.timed_out += 1
+                    logger.warning(f"{key} fan-out call timed out for {outcome.items[index]!r}")
+
+        outcome.timed_out += len(running)
+        outcome.skipped = len(waiting)
+        outcome.seconds = time.monotonic() - start
+        if outcome.partial:
+            logger.warning(f"{key} fan-out returned partial results: {outcome.stats()}")
+        else:
+            logger.info(f"{key} fan-out completed: {outcome.stats()}")
+        return outcome
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Shared by the scholarship, hackathon and freelancing agents
+fan_out = FanOutExecutor()
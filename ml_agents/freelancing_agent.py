@@ -1,4 +1,6 @@
-from .utils import search_tavily, format_opportunity, save_to_cache, load_from_cache
+from .utils import search_tavily_or_raise, format_opportunity, save_to_cache, load_from_cache
+from .fanout import fan_out
+from .single_flight import single_flight
 from typing import List, Dict
 import logging
 
@@ -30,6 +32,7 @@ def is_freelancing_related(title: str, description: str) -> bool:
     text = (title + ' ' + description).lower()
     return any(keyword in text for keyword in freelancing_keywords)
 
+@single_flight.coalesce('freelancing')
 def fetch_freelancing_gigs() -> List[Dict]:
     """
     Fetch freelancing opportunities from multiple sources
@@ -39,10 +42,11 @@ def fetch_freelancing_gigs() -> List[Dict]:
     if cached_results:
         return cached_results
 
+    # Queries run concurrently; a slow one is dropped rather than holding up the rest
+    outcome = fan_out.map('freelancing', search_tavily_or_raise, FREELANCING_QUERIES)
     all_results = []
-    for query in FREELANCING_QUERIES:
-        results = search_tavily(query)
-        for result in results:
+    for results in outcome.results:
+        for result in results or []:
             # Only include results that are actually about freelancing
             if is_freelancing_related(result.get('title', ''), result.get('description', '')):
                 formatted_result = format_opportunity(result)
@@ -55,7 +59,8 @@ def fetch_freelancing_gigs() -> List[Dict]:
     # Sort by relevance score
     sorted_results = sorted(unique_results, key=lambda x: x['relevance_score'], reverse=True)
     
-    # Save to cache
-    save_to_cache(list(sorted_results), 'freelancing')
+    # Save to cache; partial results (a query failed or timed out) are served but not kept, so the next request retries
+    if not outcome.partial:
+        save_to_cache(list(sorted_results), 'freelancing')
     
     return list(sorted_results) 
\ No newline at end of file
@@ -1,4 +1,6 @@
-from .utils import search_tavily, format_opportunity, save_to_cache, load_from_cache
+from .utils import search_tavily_or_raise, format_opportunity, save_to_cache, load_from_cache
+from .fanout import fan_out
+from .single_flight import single_flight
 from typing import List, Dict
 import logging
 
@@ -30,6 +32,7 @@ def is_hackathon_related(title: str, description: str) -> bool:
     text = (title + ' ' + description).lower()
     return any(keyword in text for keyword in hackathon_keywords)
 
+@single_flight.coalesce('hackathons')
 def fetch_hackathons() -> List[Dict]:
     """
     Fetch hackathons and tech competitions from multiple sources
@@ -39,10 +42,11 @@ def fetch_hackathons() -> List[Dict]:
     if cached_results:
         return cached_results
 
+    # Queries run concurrently; a slow one is dropped rather than holding up the rest
+    outcome = fan_out.map('hackathons', search_tavily_or_raise, HACKATHON_QUERIES)
     all_results = []
-    for query in HACKATHON_QUERIES:
-        results = search_tavily(query)
-        for result in results:
+    for results in outcome.results:
+        for result in results or []:
             # Only include results that are actually about hackathons
             if is_hackathon_related(result.get('title', ''), result.get('description', '')):
                 formatted_result = format_opportunity(result)
@@ -55,7 +59,8 @@ def fetch_hackathons() -> List[Dict]:
     # Sort by relevance score
     sorted_results = sorted(unique_results, key=lambda x: x['relevance_score'], reverse=True)
     
-    # Save to cache
-    save_to_cache(list(sorted_results), 'hackathons')
+    # Save to cache; partial results (a query failed or timed out) are served but not kept, so the next request retries
+    if not outcome.partial:
+        save_to_cache(list(sorted_results), 'hackathons')
     
     return list(sorted_results) 
\ No newline at end of file
@@ -1,4 +1,6 @@
-from .utils import search_tavily, format_opportunity, save_to_cache, load_from_cache
+from .utils import search_tavily_or_raise, format_opportunity, save_to_cache, load_from_cache
+from .fanout import fan_out
+from .single_flight import single_flight
 from typing import List, Dict
 
 SCHOLARSHIP_QUERIES = [
@@ -14,6 +16,7 @@ SCHOLARSHIP_QUERIES = [
     "scholarships for minority students 2025"
 ]
 
+@single_flight.coalesce('scholarships')
 def fetch_scholarships() -> List[Dict]:
     """
     Fetch scholarships from multiple sources using different search queries
@@ -23,10 +26,11 @@ def fetch_scholarships() -> List[Dict]:
     if cached_results:
         return cached_results
 
+    # Queries run concurrently; a slow one is dropped rather than holding up the rest
+    outcome = fan_out.map('scholarships', search_tavily_or_raise, SCHOLARSHIP_QUERIES)
     all_results = []
-    for query in SCHOLARSHIP_QUERIES:
-        results = search_tavily(query)
-        for result in results:
+    for results in outcome.results:
+        for result in results or []:
             formatted_result = format_opportunity(result)
             formatted_result['type'] = 'Scholarship'
             all_results.append(formatted_result)
@@ -37,7 +41,8 @@ def fetch_scholarships() -> List[Dict]:
     # Sort by relevance score
     sorted_results = sorted(unique_results, key=lambda x: x['relevance_score'], reverse=True)
     
-    # Save to cache
-    save_to_cache(list(sorted_results), 'scholarships')
+    # Save to cache; partial results (a query failed or timed out) are served but not kept, so the next request retries
+    if not outcome.partial:
+        save_to_cache(list(sorted_results), 'scholarships')
     
     return list(sorted_results) 
\ No newline at end of file
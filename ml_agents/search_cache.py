@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-query results cache; relative to the working directory, like the category caches
+SEARCH_CACHE_DIR = os.getenv('SEARCH_CACHE_DIR', os.path.join('cache', 'search'))
+# Seconds a query's results are reused before it is searched again
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', 3600))
+# Entries kept in memory and on disk; the least recently used go first
+SEARCH_CACHE_MEMORY_ENTRIES = int(os.getenv('SEARCH_CACHE_MEMORY_ENTRIES', 256))
+SEARCH_CACHE_DISK_ENTRIES = int(os.getenv('SEARCH_CACHE_DISK_ENTRIES', 5000))
+
+def search_key(query: str, search_depth: str, params: Dict[str, Any]) -> str:
+    """Content key for a search of query at search_depth with these request parameters"""
+    payload = json.dumps({'query': query, 'search_depth': search_depth, 'params': params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class SearchCache:
+    """
+    Two-tier LRU cache of search results keyed by search_key.
+
+    Lookups try memory, then disk, promoting disk hits into memory. Each
+    entry carries its own expiry, so a query's results are reused until that
+    query is due, whatever happens to the rest of its category. Disk entries
+    are one JSON file each, so every worker process shares them; recency on
+    disk is the file's mtime, refreshed on each hit.
+    """
+
+    def __init__(self, cache_dir: str = SEARCH_CACHE_DIR, ttl: float = SEARCH_CACHE_TTL,
+                 memory_entries: int = SEARCH_CACHE_MEMORY_ENTRIES,
+                 disk_entries: int = SEARCH_CACHE_DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.memory_entries = max(1, memory_entries)
+        self.disk_entries = max(1, disk_entries)
+        self._memory = OrderedDict()  # key -> (expires_at, results), least recently used first
+        self._lock = threading.Lock()
+        self._disk_count = None  # Counted on first write
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, expires_at: float, results: List[Dict]):
+        # Caller holds the lock
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path) as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if entry.get('expires_at', 0) <= time.time():
+            self._remove(path)
+            with self._lock:
+                self._expirations += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_count:
+                self._disk_count -= 1
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached results for key, or None when absent or expired"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._remember(key, entry['expires_at'], entry['results'])
+        return entry['results']
+
+    def put(self, key: str, results: List[Dict], ttl: Optional[float] = None, query: str = ''):
+        """Store results under key for ttl seconds, in memory and on disk"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, results)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w') as handle:
+                json.dump({'query': query, 'expires_at': expires_at, 'results': results}, handle)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error writing search cache entry: {e}")
+            return
+        if not existed:
+            self._count_write()
+
+    def _disk_entries(self) -> List[Tuple[float, str]]:
+        """(mtime, path) of every entry file on disk"""
+        entries = []
+        try:
+            shards = [shard.path for shard in os.scandir(self.cache_dir) if shard.is_dir()]
+        except OSError:
+            return entries
+        for shard in shards:
+            try:
+                for entry in os.scandir(shard):
+                    if entry.name.endswith('.json'):
+                        entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass  # Removed by another process meanwhile
+        return entries
+
+    def _count_write(self):
+        with self._lock:
+            if self._disk_count is not None:
+                self._disk_count += 1
+                if self._disk_count <= self.disk_entries:
+                    return
+        # First write, or over the limit: count what is really there (other
+        # processes write here too) and drop the least recently used files
+        entries = self._disk_entries()
+        excess = len(entries) - self.disk_entries
+        if excess > 0:
+            # Trim a little below the limit so the next writes do not rescan
+            excess += self.disk_entries // 10
+            entries.sort()
+            for _, path in entries[:excess]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                with self._lock:
+                    self._evictions += 1
+            entries = entries[excess:]
+        with self._lock:
+            self._disk_count = len(entries)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for _, path in self._disk_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_count = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                'memory_size': len(self._memory),
+                'memory_max_entries': self.memory_entries,
+                'disk_size': self._disk_count,
+                'disk_max_entries': self.disk_entries,
+                'ttl_seconds': self.ttl,
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'expirations': self._expirations,
+                'evictions': self._evictions
+            }
+
+# Shared by every agent's searches
+search_cache = SearchCache()
@@ -0,0 +1,89 @@
+import asyncio
+import functools
+import threading
+import logging
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; everyone who asks for the
+    same key while it is running waits on the same concurrent.futures.Future
+    and gets its result or exception. Threads block on the future, and
+    asyncio tasks await it through asyncio.wrap_future, so both kinds of
+    caller share a flight. Nothing is remembered once a flight lands.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._executions = 0
+
+    def _join(self, key: Hashable):
+        """The key's in-flight future, and whether this caller must run it"""
+        with self._lock:
+            self._calls += 1
+            future = self._flights.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            # Running futures cannot be cancelled, so one waiter giving up
+            # (an asyncio task being cancelled) cannot fail the others
+            future.set_running_or_notify_cancel()
+            self._flights[key] = future
+            self._executions += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, func: Callable, args: tuple):
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        """func(*args), or the result of the call already running for key"""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, func, args)
+        else:
+            logger.debug(f"Joining in-flight call for {key!r}")
+        return future.result()
+
+    async def do_async(self, key: Hashable, func: Callable, *args,
+                       executor: Optional[Executor] = None) -> Any:
+        """As do, awaited; a new flight runs func on executor (the loop's default if None)"""
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(executor, self._run, key, future, func, args)
+        return await asyncio.wrap_future(future)
+
+    def coalesce(self, key: Hashable):
+        """Decorator coalescing concurrent calls of a no-argument function under key"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper():
+                return self.do(key, func)
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self._calls,
+                'executions': self._executions,
+                'coalesced': self._calls - self._executions,
+                'in_flight': sorted(map(str, self._flights))
+            }
+
+# Shared by the opportunity cache and the agents' fetches
+single_flight = SingleFlight()
@@ -1,13 +1,22 @@
-from typing import List, Dict
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from .scholarships_agent import fetch_scholarships
 from .hackathons_agent import fetch_hackathons
 from .freelancing_agent import fetch_freelancing_gigs
+from .single_flight import SingleFlight, single_flight
+import os
+import time
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Cache for storing results
-_opportunity_cache = {}
+# Seconds a category is served as fresh; after that it is still served, and refreshed in the background
+OPPORTUNITY_SOFT_TTL = float(os.getenv('OPPORTUNITY_SOFT_TTL', 3600))
+# Seconds after which a request waits for a refresh rather than get data this old
+OPPORTUNITY_HARD_TTL = float(os.getenv('OPPORTUNITY_HARD_TTL', 6 * 3600))
+# Seconds to wait after a failed refresh before trying that category again
+OPPORTUNITY_RETRY_AFTER = float(os.getenv('OPPORTUNITY_RETRY_AFTER', 60))
 
 CATEGORY_FUNCTIONS = {
     'Scholarships': fetch_scholarships,
@@ -15,23 +24,184 @@ CATEGORY_FUNCTIONS = {
     'Freelancing': fetch_freelancing_gigs
 }
 
-def get_student_opportunities(category: str) -> List[Dict]:
+class OpportunityCache:
     """
-    Get opportunities for a specific category with caching
+    In-process cache of each category's opportunities, with stale-while-revalidate.
+
+    Past soft_ttl an entry is still returned at once while one background
+    refresh replaces it; past hard_ttl the caller waits for the refresh. A
+    refresh that fails or finds nothing keeps the last good data. Refreshes
+    of a category run as one flight, so concurrent misses fetch it once.
     """
-    if category not in CATEGORY_FUNCTIONS:
-        raise ValueError(f"Unknown category: {category}")
 
-    # Check in-memory cache first
-    if category in _opportunity_cache:
-        logger.info(f"Returning cached results for {category}")
-        return _opportunity_cache[category]
+    def __init__(self, fetchers: Dict[str, Callable[[], List[Dict]]],
+                 soft_ttl: float = OPPORTUNITY_SOFT_TTL, hard_ttl: float = OPPORTUNITY_HARD_TTL,
+                 retry_after: float = OPPORTUNITY_RETRY_AFTER, flights: SingleFlight = single_flight):
+        self.fetchers = fetchers
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.retry_after = retry_after
+        self._entries: Dict[str, tuple] = {}  # category -> (fetched_at, opportunities)
+        self._retry_at: Dict[str, float] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._flights = flights
+        self._fresh_hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the module starts no threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=len(self.fetchers) or 1,
+                                                    thread_name_prefix="opportunity-refresh")
+            return self._executor
+
+    def _refresh(self, category: str) -> bool:
+        """Fetch category and store it; False, keeping the old entry, if that fails or finds nothing"""
+        error = None
+        try:
+            opportunities = self.fetchers[category]()
+        except Exception as e:
+            opportunities, error = None, e
+        with self._lock:
+            if opportunities:
+                self._entries[category] = (time.monotonic(), opportunities)
+                self._retry_at.pop(category, None)
+                self._refreshes += 1
+                return True
+            self._refresh_failures += 1
+            self._retry_at[category] = time.monotonic() + self.retry_after
+            has_entry = category in self._entries
+        logger.error(f"Refreshing {category} opportunities failed: {error or 'no results'}")
+        if error is not None and not has_entry:
+            raise error
+        return False
+
+    def _refresh_expired(self, category: str) -> bool:
+        # A flight that landed between the caller's miss and joining has already refreshed it
+        with self._lock:
+            entry = self._entries.get(category)
+            if entry and time.monotonic() - entry[0] < self.hard_ttl:
+                return True
+        return self._refresh(category)
+
+    def _flight_key(self, category: str) -> str:
+        return f"opportunities:{category}"
+
+    def _background_refresh(self, category: str):
+        try:
+            self._flights.do(self._flight_key(category), self._refresh, category)
+        except Exception:
+            pass  # Already logged; the stale entry stays in place
+        finally:
+            with self._lock:
+                self._refreshing.discard(category)
+
+    def _cached(self, category: str) -> Optional[Dict[str, Any]]:
+        """The response for a fresh or stale-but-usable entry, or None if the caller must wait for a refresh"""
+        if category not in self.fetchers:
+            raise ValueError(f"Unknown category: {category}")
+
+        with self._lock:
+            entry = self._entries.get(category)
+            now = time.monotonic()
+            age = now - entry[0] if entry else None
+            can_retry = self._retry_at.get(category, 0) <= now
+            if entry and age < self.soft_ttl:
+                self._fresh_hits += 1
+                return self._response(entry, now, stale=False)
+            # Past the hard TTL stale data is still better than nothing while a failed refresh backs off
+            serve_stale = entry is not None and (age < self.hard_ttl or not can_retry)
+            refresh_in_background = serve_stale and can_retry and category not in self._refreshing
+            if serve_stale:
+                self._stale_hits += 1
+            else:
+                self._misses += 1
+            if refresh_in_background:
+                self._refreshing.add(category)
+
+        if refresh_in_background:
+            logger.info(f"Serving stale {category} opportunities ({age:.0f}s old) while refreshing")
+            try:
+                self._get_executor().submit(self._background_refresh, category)
+            except RuntimeError:
+                with self._lock:
+                    self._refreshing.discard(category)  # Shutting down
+        if serve_stale:
+            return self._response(entry, now, stale=True)
+        logger.info(f"Fetching new results for {category}")
+        return None
 
-    # Fetch new results (this will check file cache internally)
-    logger.info(f"Fetching new results for {category}")
-    results = CATEGORY_FUNCTIONS[category]()
+    def _refreshed(self, category: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entries.get(category)
+        if entry is None:
+            return {'opportunities': [], 'cache_age_seconds': 0.0, 'stale': False}
+        now = time.monotonic()
+        return self._response(entry, now, stale=now - entry[0] >= self.soft_ttl)
 
-    # Update in-memory cache
-    _opportunity_cache[category] = results
+    def get(self, category: str) -> Dict[str, Any]:
+        """A category's opportunities with their age in seconds and whether they are past the soft TTL"""
+        response = self._cached(category)
+        if response is None:
+            self._flights.do(self._flight_key(category), self._refresh_expired, category)
+            response = self._refreshed(category)
+        return response
 
-    return results
\ No newline at end of file
+    async def get_async(self, category: str) -> Dict[str, Any]:
+        """As get, for the event loop; a refresh runs on a worker thread and waiters hold none"""
+        response = self._cached(category)
+        if response is None:
+            await self._flights.do_async(self._flight_key(category), self._refresh_expired, category)
+            response = self._refreshed(category)
+        return response
+
+    @staticmethod
+    def _response(entry: tuple, now: float, stale: bool) -> Dict[str, Any]:
+        fetched_at, opportunities = entry
+        return {
+            'opportunities': opportunities,
+            'cache_age_seconds': round(now - fetched_at, 1),
+            'stale': stale
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._retry_at.clear()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'soft_ttl_seconds': self.soft_ttl,
+                'hard_ttl_seconds': self.hard_ttl,
+                'fresh_hits': self._fresh_hits,
+                'stale_hits': self._stale_hits,
+                'misses': self._misses,
+                'refreshes': self._refreshes,
+                'refresh_failures': self._refresh_failures,
+                'refreshing': sorted(self._refreshing),
+                'age_seconds': {category: round(now - fetched_at, 1)
+                                for category, (fetched_at, _) in self._entries.items()}
+            }
+
+# Shared by every request in the process
+opportunity_cache = OpportunityCache(CATEGORY_FUNCTIONS)
+
+def get_student_opportunities(category: str) -> List[Dict]:
+    """
+    Get opportunities for a specific category with caching
+    """
+    return opportunity_cache.get(category)['opportunities']
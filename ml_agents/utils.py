@@ -1,10 +1,18 @@
 import os
+import time
+import random
+import threading
 import requests
-from typing import List, Dict
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
 import json
 import logging
 from dotenv import load_dotenv
+from .search_cache import search_cache, search_key
+from .fanout import call_deadline
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,15 +27,155 @@ if not TAVILY_API_KEY:
 else:
     logger.info("TAVILY_API_KEY loaded successfully")
 
+# Overridable so tests and benchmarks can point at a local stub server
+TAVILY_API_URL = os.getenv('TAVILY_API_URL', 'https://api.tavily.com/search')
+# Seconds to establish a connection, and to wait for each read of the response
+TAVILY_CONNECT_TIMEOUT = float(os.getenv('TAVILY_CONNECT_TIMEOUT', 3.05))
+TAVILY_READ_TIMEOUT = float(os.getenv('TAVILY_READ_TIMEOUT', 15))
+# Retries after a 429/5xx or a connection failure, with jittered exponential backoff
+TAVILY_MAX_RETRIES = int(os.getenv('TAVILY_MAX_RETRIES', 3))
+TAVILY_BACKOFF_BASE = float(os.getenv('TAVILY_BACKOFF_BASE', 0.5))
+TAVILY_BACKOFF_MAX = float(os.getenv('TAVILY_BACKOFF_MAX', 10))
+# Keep-alive connections kept per host; sized for the agents' concurrent searches
+TAVILY_POOL_SIZE = int(os.getenv('TAVILY_POOL_SIZE', 16))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Request parameters besides the query and depth; part of each search's cache key
+SEARCH_PARAMS = {
+    'limit': 10,
+    'include_answer': True,
+    'include_raw_content': True
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Process-wide session, so searches reuse pooled keep-alive connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=TAVILY_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+def retry_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """Seconds before retry number attempt: Retry-After if the server sent one, else full-jitter backoff"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0), TAVILY_BACKOFF_MAX)
+    return random.uniform(0, min(TAVILY_BACKOFF_MAX, TAVILY_BACKOFF_BASE * 2 ** attempt))
+
+class SearchMetrics:
+    """Running latency and retry counters for search calls"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+
+    def record(self, latency_ms: float, retries: int, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            if not ok:
+                self.failures += 1
+            self._latencies.append(latency_ms)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls, failures, retries = self.calls, self.failures, self.retries
+        def percentile(pct):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))], 1)
+        return {
+            'calls': calls,
+            'failures': failures,
+            'retries': retries,
+            'latency_ms_p50': percentile(50),
+            'latency_ms_p99': percentile(99)
+        }
+
+search_metrics = SearchMetrics()
+
+def post_with_retries(url: str, payload: Dict, headers: Dict, call: Dict) -> requests.Response:
+    """
+    POST on the pooled session, retrying transient failures; counts retries in call['retries'].
+    Inside a fan-out, timeouts shrink to the time left before it gives up on
+    the call, and no retry is started past that.
+    """
+    session = get_session()
+    deadline = call_deadline()
+    for attempt in range(TAVILY_MAX_RETRIES + 1):
+        timeout = (TAVILY_CONNECT_TIMEOUT, TAVILY_READ_TIMEOUT)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout("Fan-out stopped waiting for this search")
+            timeout = (min(TAVILY_CONNECT_TIMEOUT, remaining), min(TAVILY_READ_TIMEOUT, remaining))
+        response = None
+        try:
+            response = session.post(url, headers=headers, json=payload, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES or attempt == TAVILY_MAX_RETRIES:
+                response.raise_for_status()
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == TAVILY_MAX_RETRIES or (deadline is not None and time.monotonic() >= deadline):
+                raise
+            logger.warning(f"Tavily request failed ({e.__class__.__name__}), retrying")
+        delay = retry_delay(attempt, response)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            # The retry could not finish before the fan-out gives up; free the slot now
+            if response is not None:
+                response.raise_for_status()
+            raise requests.exceptions.Timeout("Fan-out deadline leaves no time to retry")
+        if response is not None:
+            logger.warning(f"Tavily returned {response.status_code}, retrying in {delay:.2f}s")
+            response.close()
+        time.sleep(delay)
+        call['retries'] += 1
+
+class SearchError(Exception):
+    """A search that could not be made or failed after its retries"""
+
 def search_tavily(query: str, search_depth: str = "advanced") -> List[Dict]:
     """
     Enhanced Tavily search with better result processing
     """
+    try:
+        return search_tavily_or_raise(query, search_depth)
+    except SearchError:
+        return []
+
+def search_tavily_or_raise(query: str, search_depth: str = "advanced") -> List[Dict]:
+    """As search_tavily, but a failure raises SearchError instead of looking like no results"""
     if not TAVILY_API_KEY:
         logger.error("TAVILY_API_KEY is not set in environment variables")
-        return []
+        raise SearchError("TAVILY_API_KEY is not set")
+
+    key = search_key(query, search_depth, SEARCH_PARAMS)
+    cached = search_cache.get(key)
+    if cached is not None:
+        logger.info(f"Returning {len(cached)} cached results for query: {query}")
+        return cached
 
-    url = "https://api.tavily.com/search"
+    url = TAVILY_API_URL
     headers = {
         'Authorization': f'Bearer {TAVILY_API_KEY}',
         'Content-Type': 'application/json'
@@ -35,15 +183,15 @@ def search_tavily(query: str, search_depth: str = "advanced") -> List[Dict]:
     data = {
         'query': query,
         'search_depth': search_depth,
-        'limit': 10,
-        'include_answer': True,
-        'include_raw_content': True
+        **SEARCH_PARAMS
     }
     
+    start = time.perf_counter()
+    call = {'retries': 0}
+    ok = False
     try:
         logger.info(f"Making Tavily API request for query: {query}")
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
+        response = post_with_retries(url, data, headers, call)
         results = response.json().get('results', [])
         
         # Process and clean the results
@@ -60,15 +208,22 @@ def search_tavily(query: str, search_depth: str = "advanced") -> List[Dict]:
             processed_results.append(processed_result)
         
         logger.info(f"Found {len(processed_results)} results for query: {query}")
+        ok = True
+        # Only successful searches are cached; failures are retried next time
+        search_cache.put(key, processed_results, query=query)
         return processed_results
     except requests.exceptions.RequestException as e:
         logger.error(f"Error in Tavily API request: {str(e)}")
         if hasattr(e.response, 'text'):
             logger.error(f"API Response: {e.response.text}")
-        return []
+        raise SearchError(str(e)) from e
     except Exception as e:
         logger.error(f"Unexpected error in Tavily search: {str(e)}")
-        return []
+        raise SearchError(str(e)) from e
+    finally:
+        latency_ms = (time.perf_counter() - start) * 1000
+        search_metrics.record(latency_ms, call['retries'], ok)
+        logger.info(f"tavily_search latency_ms={latency_ms:.1f} retries={call['retries']} ok={ok}")
 
 def format_opportunity(opportunity: Dict) -> Dict:
     """
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for running column width tracking.
+
+Checks the exact and sampled measurement, padding and cap of ColumnWidths,
+and that exported sheets get widths sized from their data, without needing
+the API server.
+"""
+import os
+import sys
+import tempfile
+
+# Keep the module-level manager off disk and password hashing cheap
+os.environ.setdefault('WEALTHSAGE_DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+os.environ.setdefault('WRITE_BEHIND_FLUSH_MS', '0')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import openpyxl
+from column_widths import ColumnWidths
+from database import DatabaseManager
+from excel_service import ExcelExportService, USER_EXPORT_COLUMNS
+
+def test_widths_follow_longest_value():
+    widths = ColumnWidths(['ID', 'Name'])
+    widths.add([7, 'Ada'])
+    widths.add([12345, 'Grace Hopper'])
+    widths.add([None, ''])
+    assert widths.widths() == [len('12345') + 2, len('Grace Hopper') + 2]
+    print("✅ Widths follow the longest value")
+
+def test_headers_and_cap():
+    widths = ColumnWidths(['A long header', 'B'], max_width=10)
+    widths.add(['x', 'y' * 100])
+    assert widths.widths() == [10, 10]
+    print("✅ Headers count and widths are capped")
+
+def test_sampling_past_exact_rows():
+    widths = ColumnWidths(['A'], exact_rows=10, sample_every=5)
+    for _ in range(10):
+        widths.add(['x'])
+    widths.add(['y' * 20])  # Row 11: not a multiple of 5, so not measured
+    assert widths.widths() == [3]
+    for _ in range(3):
+        widths.add(['x'])
+    widths.add(['z' * 30])  # Row 15 is sampled
+    assert widths.widths() == [32]
+    print("✅ Rows past exact_rows are sampled")
+
+def test_export_applies_data_widths():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'test.db')}")
+        try:
+            email = "a.very.long.email.address@university.example.com"
+            manager.create_user({
+                "email": email,
+                "password": "testpass123",
+                "first_name": "Test",
+                "last_name": "Student"
+            })
+            result = ExcelExportService(manager, export_dir=tmp).export_users()
+            sheet = openpyxl.load_workbook(result['file_path'])['Users']
+            letter = openpyxl.utils.get_column_letter(USER_EXPORT_COLUMNS.index('Email') + 1)
+            # Excel stores widths with its own font padding added
+            assert len(email) + 2 <= sheet.column_dimensions[letter].width < len(email) + 4
+        finally:
+            manager.close()
+    print("✅ Export applies widths sized from the data")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing column width tracking")
+    print("=" * 50)
+    test_widths_follow_longest_value()
+    test_headers_and_cap()
+    test_sampling_past_exact_rows()
+    test_export_applies_data_widths()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the streamed Excel user export.
+
+Exports a SQLite database through the constant-memory XlsxWriter path and
+reads the workbook back with openpyxl, without needing the API server.
+"""
+import os
+import sys
+import tempfile
+
+# Keep the module-level manager off disk and password hashing cheap
+os.environ.setdefault('WEALTHSAGE_DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+os.environ.setdefault('WRITE_BEHIND_FLUSH_MS', '0')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import openpyxl
+from database import DatabaseManager
+from excel_service import ExcelExportService, USER_EXPORT_COLUMNS, MONEY_FORMAT
+
+USERS = 25
+
+def new_service(tmp, users=USERS):
+    manager = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'test.db')}")
+    for n in range(users):
+        user = manager.create_user({
+            "email": f"student{n}@test.com",
+            "password": "testpass123",
+            # User-entered text that looks like a formula must stay text
+            "first_name": "=HYPERLINK(\"http://example.com\")" if n == 0 else "Test",
+            "last_name": f"Student{n}",
+            "role": "Professional" if n % 5 == 0 else "Student"
+        })
+        manager.update_user_profile(user['id'], {'monthly_income': 1000 + n, 'savings_goal': 500})
+    return manager, ExcelExportService(manager, export_dir=tmp)
+
+def test_users_sheet_streams_every_row():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, service = new_service(tmp)
+        try:
+            progress = []
+            result = service.export_users(progress=lambda rows, total: progress.append((rows, total)))
+            assert result['rows'] == USERS and not result['cached']
+            assert progress[-1] == (USERS, USERS)
+            assert not [name for name in os.listdir(tmp) if name.endswith('.partial')]
+
+            workbook = openpyxl.load_workbook(result['file_path'])
+            assert workbook.sheetnames == ['Users', 'Summary', 'Statistics']
+            rows = list(workbook['Users'].iter_rows(values_only=True))
+            assert list(rows[0]) == USER_EXPORT_COLUMNS
+            assert len(rows) == USERS + 1
+            assert workbook['Users']['A1'].font.bold
+
+            first_name = USER_EXPORT_COLUMNS.index('First Name')
+            assert any(str(row[first_name]).startswith('=HYPERLINK') for row in rows[1:])
+            assert all(cell.data_type != 'f' for row in workbook['Users'].iter_rows() for cell in row)
+
+            income = USER_EXPORT_COLUMNS.index('Monthly Income') + 1
+            cells = [workbook['Users'].cell(row=row, column=income) for row in range(2, USERS + 2)]
+            assert sorted(cell.value for cell in cells) == [1000.0 + n for n in range(USERS)]
+            assert all(cell.number_format == MONEY_FORMAT for cell in cells)
+        finally:
+            manager.close()
+    print("✅ Users sheet streams every row")
+
+def test_summary_comes_from_aggregates():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, service = new_service(tmp)
+        try:
+            result = service.export_users(include_users=False)
+            workbook = openpyxl.load_workbook(result['file_path'])
+            assert 'Users' not in workbook.sheetnames
+            summary = {label: value for label, value in workbook['Summary'].iter_rows(values_only=True) if label}
+            assert summary['Total Users'] == USERS
+            assert summary['  Professional'] == 5
+            assert summary['  Student'] == USERS - 5
+        finally:
+            manager.close()
+    print("✅ Summary comes from SQL aggregates")
+
+def test_no_users_writes_nothing():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, service = new_service(tmp, users=0)
+        try:
+            assert service.export_users() is None
+            assert not [name for name in os.listdir(tmp) if name.endswith(('.xlsx', '.partial'))]
+        finally:
+            manager.close()
+    print("✅ No users writes nothing")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing the Excel user export")
+    print("=" * 50)
+    test_users_sheet_streams_every_row()
+    test_summary_comes_from_aggregates()
+    test_no_users_writes_nothing()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
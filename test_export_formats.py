@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for the streamed CSV, NDJSON and Parquet exports.
+
+Checks that rows keep their declared types in every format, that output
+arrives in chunks, and that a database export reads back typed, without
+needing the API server.
+"""
+import io
+import os
+import sys
+import csv
+import json
+import tempfile
+from datetime import datetime
+
+# Keep the module-level manager off disk and password hashing cheap
+os.environ.setdefault('WEALTHSAGE_DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+os.environ.setdefault('WRITE_BEHIND_FLUSH_MS', '0')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database import DatabaseManager
+from excel_service import ExcelExportService
+from export_formats import (
+    ExportFormatError, get_streaming_exporter, stream_csv, stream_ndjson, stream_parquet, typed_rows
+)
+
+COLUMNS = [('id', 'int'), ('email', 'string'), ('is_active', 'bool'),
+           ('created_at', 'timestamp'), ('monthly_income', 'float')]
+# As SQLite returns them: booleans as 0/1, timestamps as text, decimals as strings
+RAW_ROWS = [
+    (1, 'a@test.com', 1, '2024-01-02 03:04:05', '1250.50'),
+    (2, 'b@test.com', 0, None, None),
+    (3, 'c@test.com', 1, '2024-02-03T04:05:06Z', 0),
+]
+
+def rows():
+    return list(typed_rows(COLUMNS, RAW_ROWS))
+
+def test_typed_rows():
+    first, second, third = rows()
+    assert first == (1, 'a@test.com', True, datetime(2024, 1, 2, 3, 4, 5), 1250.5)
+    assert second == (2, 'b@test.com', False, None, None)
+    assert third[3].year == 2024 and third[3].utcoffset().total_seconds() == 0
+    print("✅ Rows coerced to their declared types")
+
+def test_csv_chunks():
+    chunks = list(stream_csv(COLUMNS, rows(), chunk_rows=2))
+    assert len(chunks) == 2
+    records = list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+    assert records[0] == [name for name, _ in COLUMNS]
+    assert records[1] == ['1', 'a@test.com', 'True', '2024-01-02 03:04:05', '1250.5']
+    assert records[2][3:] == ['', '']
+    print("✅ CSV streams in chunks")
+
+def test_ndjson_keeps_json_types():
+    chunks = list(stream_ndjson(COLUMNS, rows(), chunk_rows=1))
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+    assert records[0] == {'id': 1, 'email': 'a@test.com', 'is_active': True,
+                          'created_at': '2024-01-02 03:04:05', 'monthly_income': 1250.5}
+    assert records[1]['created_at'] is None and records[1]['is_active'] is False
+    print("✅ NDJSON keeps JSON types")
+
+def test_parquet_row_groups_and_schema():
+    chunks = list(stream_parquet(COLUMNS, rows(), row_group_size=2))
+    parquet = pq.ParquetFile(io.BytesIO(b''.join(chunks)))
+    assert parquet.metadata.num_row_groups == 2
+    schema = parquet.schema_arrow
+    assert schema.field('id').type == pa.int64()
+    assert schema.field('is_active').type == pa.bool_()
+    assert schema.field('created_at').type == pa.timestamp('us')
+    assert schema.field('monthly_income').type == pa.float64()
+    table = parquet.read()
+    assert table.column('created_at').to_pylist()[:2] == [datetime(2024, 1, 2, 3, 4, 5), None]
+    assert table.column('monthly_income').to_pylist() == [1250.5, None, 0.0]
+
+    empty = pq.read_table(io.BytesIO(b''.join(stream_parquet(COLUMNS, []))))
+    assert empty.num_rows == 0 and empty.schema.field('created_at').type == pa.timestamp('us')
+    print("✅ Parquet written in row groups with typed columns")
+
+def test_unknown_format_rejected():
+    for fmt in ('xlsx', 'xml'):
+        try:
+            get_streaming_exporter(fmt)
+            raise AssertionError(f"{fmt} was accepted")
+        except ExportFormatError:
+            pass
+    assert get_streaming_exporter('parquet') is stream_parquet
+    print("✅ Unknown format rejected before any row is read")
+
+def test_database_export_is_typed():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'test.db')}")
+        try:
+            user = manager.create_user({
+                "email": "student@test.com",
+                "password": "testpass123",
+                "first_name": "Test",
+                "last_name": "Student"
+            })
+            manager.update_user_profile(user['id'], {'monthly_income': 1250.5})
+            service = ExcelExportService(manager, export_dir=tmp)
+            _, chunks = service.stream_users('parquet')
+            table = pq.read_table(io.BytesIO(b''.join(chunks)))
+            record = table.to_pylist()[0]
+            assert record['id'] == user['id'] and record['monthly_income'] == 1250.5
+            assert record['is_active'] is True
+            assert isinstance(record['created_at'], datetime)
+        finally:
+            manager.close()
+    print("✅ Database export reads back typed")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing streamed export formats")
+    print("=" * 50)
+    test_typed_rows()
+    test_csv_chunks()
+    test_ndjson_keeps_json_types()
+    test_parquet_row_groups_and_schema()
+    test_unknown_format_rejected()
+    test_database_export_is_typed()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for cancelling export jobs.
+
+Cancels exports while they are running, with and without the Users sheet,
+and checks that they stop before a workbook is written, without the API
+server.
+"""
+import os
+import sys
+import tempfile
+import threading
+
+# Keep the module-level services off disk and password hashing cheap
+os.environ.setdefault('WEALTHSAGE_DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+os.environ.setdefault('EXPORT_DIR', tempfile.mkdtemp(prefix='wealthsage_exports_'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from database import DatabaseManager
+from excel_service import ExcelExportService
+from export_jobs import ExportJobManager
+
+def new_service(tmp):
+    manager = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'test.db')}")
+    for n in range(3):
+        manager.create_user({
+            "email": f"student{n}@test.com",
+            "password": "testpass123",
+            "first_name": "Test",
+            "last_name": f"Student{n}"
+        })
+    return manager, ExcelExportService(manager, export_dir=tmp)
+
+def cancel_while_running(include_users):
+    """Cancel a job from inside its first progress check, then let it continue"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, service = new_service(tmp)
+        started = threading.Event()
+        proceed = threading.Event()
+
+        def export(progress, **options):
+            def gated(rows_written, total_rows):
+                started.set()
+                proceed.wait(5)
+                progress(rows_written, total_rows)
+            return service.export_users(progress=gated, **options)
+
+        jobs = ExportJobManager(export, max_workers=1)
+        try:
+            job = jobs.submit(include_users=include_users, use_cache=False)
+            assert started.wait(5), "export never reported progress"
+            assert job.status == 'running'
+            jobs.cancel(job.id)
+            proceed.set()
+            job.future.result(5)
+            assert job.status == 'cancelled', job.to_dict()
+            assert job.result is None
+            assert not [name for name in os.listdir(tmp) if name.endswith(('.xlsx', '.partial'))]
+        finally:
+            proceed.set()
+            jobs.close()
+            manager.close()
+
+def test_cancel_running_export():
+    cancel_while_running(include_users=True)
+    print("✅ Running export cancelled")
+
+def test_cancel_running_export_without_users():
+    cancel_while_running(include_users=False)
+    print("✅ Running export without the Users sheet cancelled")
+
+def test_uncancelled_export_completes():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, service = new_service(tmp)
+        jobs = ExportJobManager(service.export_users, max_workers=1)
+        try:
+            job = jobs.submit(include_users=False, use_cache=False)
+            job.future.result(10)
+            assert job.status == 'completed', job.to_dict()
+            assert os.path.exists(job.result['file_path'])
+        finally:
+            jobs.close()
+            manager.close()
+    print("✅ Uncancelled export completes")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing export job cancellation")
+    print("=" * 50)
+    test_cancel_running_export()
+    test_cancel_running_export_without_users()
+    test_uncancelled_export_completes()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for export downloads.
+
+Serves a file through file_download_response on a bare Starlette app and
+checks Range, If-Range, 416, If-None-Match and gzip handling, without
+needing the API server.
+"""
+import gzip
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from file_download import RangeNotSatisfiable, file_download_response, parse_range, resolve_download_path
+
+BODY = b"".join(f"{n},student{n}@test.com\n".encode() for n in range(2000))
+
+def new_client(tmp):
+    path = os.path.join(tmp, 'export.csv')
+    with open(path, 'wb') as handle:
+        handle.write(BODY)
+
+    async def download(request):
+        return file_download_response(request, path, 'text/csv', 'export.csv',
+                                      compress=request.query_params.get('compress') == '1')
+
+    app = Starlette(routes=[Route('/download', download, methods=['GET', 'HEAD'])])
+    return TestClient(app)
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range('bytes=0-9', 100) == (0, 9)
+    assert parse_range('bytes=90-', 100) == (90, 99)
+    assert parse_range('bytes=-10', 100) == (90, 99)
+    assert parse_range('bytes=50-500', 100) == (50, 99)
+    # Malformed and multi-range requests are answered with the whole file
+    assert parse_range('bytes=5-2', 100) is None
+    assert parse_range('bytes=0-1,5-6', 100) is None
+    assert parse_range('items=0-1', 100) is None
+    for header in ('bytes=100-', 'bytes=-0'):
+        try:
+            parse_range(header, 100)
+            raise AssertionError(f"{header} was satisfiable")
+        except RangeNotSatisfiable:
+            pass
+    print("✅ Range headers parsed")
+
+def test_resolve_download_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        exports = os.path.join(tmp, 'exports')
+        os.makedirs(exports)
+        with open(os.path.join(tmp, 'secret.txt'), 'w') as handle:
+            handle.write('secret')
+        with open(os.path.join(exports, 'export.csv'), 'w') as handle:
+            handle.write('id\n')
+        os.symlink(os.path.join(tmp, 'secret.txt'), os.path.join(exports, 'link.csv'))
+        assert resolve_download_path(exports, 'export.csv') == os.path.realpath(os.path.join(exports, 'export.csv'))
+        for name in ('../secret.txt', '..', 'link.csv', 'missing.csv', ''):
+            assert resolve_download_path(exports, name) is None, name
+    print("✅ Only regular files inside the export directory resolve")
+
+def test_whole_file_and_ranges():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = new_client(tmp)
+        response = client.get('/download')
+        assert response.status_code == 200 and response.content == BODY
+        assert response.headers['accept-ranges'] == 'bytes'
+        etag = response.headers['etag']
+
+        response = client.get('/download', headers={'Range': 'bytes=10-19'})
+        assert response.status_code == 206 and response.content == BODY[10:20]
+        assert response.headers['content-range'] == f"bytes 10-19/{len(BODY)}"
+
+        response = client.get('/download', headers={'Range': 'bytes=-5'})
+        assert response.status_code == 206 and response.content == BODY[-5:]
+
+        response = client.get('/download', headers={'Range': f"bytes={len(BODY)}-"})
+        assert response.status_code == 416
+        assert response.headers['content-range'] == f"bytes */{len(BODY)}"
+
+        response = client.get('/download', headers={'If-None-Match': etag})
+        assert response.status_code == 304 and not response.content
+    print("✅ Whole file, ranges, 416 and 304")
+
+def test_if_range():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = new_client(tmp)
+        etag = client.head('/download').headers['etag']
+        response = client.get('/download', headers={'Range': 'bytes=0-9', 'If-Range': etag})
+        assert response.status_code == 206 and response.content == BODY[:10]
+        # A stale validator means the client's partial copy is outdated: send everything
+        response = client.get('/download', headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        assert response.status_code == 200 and response.content == BODY
+    print("✅ If-Range resumes only an unchanged file")
+
+def test_gzip():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = new_client(tmp)
+        response = client.get('/download?compress=1', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['content-encoding'] == 'gzip'
+        assert response.headers['vary'] == 'Accept-Encoding'
+        assert response.headers['etag'].endswith('-gzip"')
+        assert response.content == BODY  # Decoded by the client
+        with client.stream('GET', '/download?compress=1', headers={'Accept-Encoding': 'gzip'}) as response:
+            encoded = b''.join(response.iter_raw())
+        assert len(encoded) < len(BODY) and gzip.decompress(encoded) == BODY
+
+        response = client.get('/download?compress=1', headers={'Accept-Encoding': 'gzip;q=0'})
+        assert 'content-encoding' not in response.headers and response.content == BODY
+
+        # Ranges are of the identity encoding, so a resumed download is never gzipped
+        response = client.get('/download?compress=1', headers={'Accept-Encoding': 'gzip', 'Range': 'bytes=0-9'})
+        assert response.status_code == 206 and 'content-encoding' not in response.headers
+        assert response.content == BODY[:10]
+
+        response = client.head('/download?compress=1', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['content-encoding'] == 'gzip' and not response.content
+    print("✅ Gzip for whole text files only")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing export downloads")
+    print("=" * 50)
+    test_parse_range()
+    test_resolve_download_path()
+    test_whole_file_and_ranges()
+    test_if_range()
+    test_gzip()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test script for stale-while-revalidate opportunity caching.
+
+Drives OpportunityCache with short TTLs and scripted fetchers, and checks
+fresh hits, stale hits refreshed in the background, waits past the hard
+TTL and failed refreshes that keep the last good data, without the API
+server or a Tavily key.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ml_agents.single_flight import SingleFlight
+from ml_agents.student_agent import OpportunityCache
+
+SOFT_TTL = 0.2
+HARD_TTL = 0.6
+
+class ScriptedFetch:
+    """Upstream stand-in returning numbered results, or raising while failing is set"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = 0
+        self.failing = False
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError("upstream down")
+        return [{'title': f"Result {call}"}]
+
+def new_cache(fetch, retry_after=60):
+    return OpportunityCache({'Scholarships': fetch}, soft_ttl=SOFT_TTL, hard_ttl=HARD_TTL,
+                            retry_after=retry_after, flights=SingleFlight())
+
+def wait_for_refresh(cache):
+    give_up = time.monotonic() + 5
+    while cache.stats()['refreshing'] and time.monotonic() < give_up:
+        time.sleep(0.01)
+    assert not cache.stats()['refreshing'], "background refresh did not finish"
+
+def titles(response):
+    return [opportunity['title'] for opportunity in response['opportunities']]
+
+def test_fresh_hits():
+    fetch = ScriptedFetch()
+    cache = new_cache(fetch)
+    try:
+        first = cache.get('Scholarships')
+        assert titles(first) == ['Result 1'] and not first['stale']
+        second = cache.get('Scholarships')
+        assert titles(second) == ['Result 1'] and not second['stale']
+        assert fetch.calls == 1
+        stats = cache.stats()
+        assert stats['misses'] == 1 and stats['fresh_hits'] == 1
+    finally:
+        cache.close()
+    print("✅ Fresh entries served without fetching")
+
+def test_stale_served_while_refreshing():
+    fetch = ScriptedFetch(delay=0.1)
+    cache = new_cache(fetch)
+    try:
+        cache.get('Scholarships')
+        time.sleep(SOFT_TTL + 0.05)
+        started = time.monotonic()
+        stale = cache.get('Scholarships')
+        # Returned at once, without waiting for the 0.1s fetch
+        assert time.monotonic() - started < 0.05
+        assert titles(stale) == ['Result 1'] and stale['stale']
+        assert stale['cache_age_seconds'] >= SOFT_TTL - 0.05
+        # Further stale hits join the refresh already running
+        cache.get('Scholarships')
+        wait_for_refresh(cache)
+        assert fetch.calls == 2
+        fresh = cache.get('Scholarships')
+        assert titles(fresh) == ['Result 2'] and not fresh['stale']
+        stats = cache.stats()
+        assert stats['stale_hits'] == 2 and stats['refreshes'] == 2
+    finally:
+        cache.close()
+    print("✅ Stale entries served while one background refresh runs")
+
+def test_waits_past_hard_ttl():
+    fetch = ScriptedFetch(delay=0.1)
+    cache = new_cache(fetch)
+    try:
+        cache.get('Scholarships')
+        time.sleep(HARD_TTL + 0.05)
+        started = time.monotonic()
+        response = cache.get('Scholarships')
+        assert time.monotonic() - started >= 0.1
+        assert titles(response) == ['Result 2'] and not response['stale']
+        assert cache.stats()['misses'] == 2
+
+        time.sleep(HARD_TTL + 0.05)
+        response = asyncio.run(cache.get_async('Scholarships'))
+        assert titles(response) == ['Result 3'] and not response['stale']
+    finally:
+        cache.close()
+    print("✅ Callers wait for a refresh past the hard TTL")
+
+def test_failed_refresh_keeps_data_and_backs_off():
+    fetch = ScriptedFetch()
+    cache = new_cache(fetch, retry_after=0.5)
+    try:
+        cache.get('Scholarships')
+        fetch.failing = True
+        time.sleep(SOFT_TTL + 0.05)
+        assert titles(cache.get('Scholarships')) == ['Result 1']
+        wait_for_refresh(cache)
+        assert fetch.calls == 2 and cache.stats()['refresh_failures'] == 1
+
+        # Backing off: stale data is served with no new fetch, even past the hard TTL
+        assert titles(cache.get('Scholarships')) == ['Result 1']
+        time.sleep(HARD_TTL - SOFT_TTL)
+        response = cache.get('Scholarships')
+        assert titles(response) == ['Result 1'] and response['stale']
+        assert fetch.calls == 2
+
+        # Once retry_after has passed the next miss fetches again
+        fetch.failing = False
+        time.sleep(0.5)
+        response = cache.get('Scholarships')
+        assert titles(response) == ['Result 3'] and not response['stale']
+    finally:
+        cache.close()
+    print("✅ Failed refresh keeps the last good data and backs off")
+
+def test_first_fetch_failure_raises():
+    fetch = ScriptedFetch()
+    fetch.failing = True
+    cache = new_cache(fetch)
+    try:
+        try:
+            cache.get('Scholarships')
+            raise AssertionError("a failed first fetch was not raised")
+        except ConnectionError:
+            pass
+        try:
+            cache.get('Loans')
+            raise AssertionError("an unknown category was accepted")
+        except ValueError:
+            pass
+    finally:
+        cache.close()
+    print("✅ Failure with nothing cached raised to the caller")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing stale-while-revalidate opportunity caching")
+    print("=" * 50)
+    test_fresh_hits()
+    test_stale_served_while_refreshing()
+    test_waits_past_hard_ttl()
+    test_failed_refresh_keeps_data_and_backs_off()
+    test_first_fetch_failure_raises()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
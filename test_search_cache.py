@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-query search cache.
+
+Checks keying, per-entry TTL expiry, LRU eviction in memory and on disk,
+and that a second process's cache sees entries through disk, without a
+Tavily key.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ml_agents.search_cache import SearchCache, search_key
+
+RESULTS = [{'title': 'Scholarship', 'link': 'https://example.com'}]
+
+def test_key_covers_query_depth_and_params():
+    key = search_key('scholarships', 'advanced', {'limit': 10})
+    assert key == search_key('scholarships', 'advanced', {'limit': 10})
+    assert key != search_key('Scholarships', 'advanced', {'limit': 10})
+    assert key != search_key('scholarships', 'basic', {'limit': 10})
+    assert key != search_key('scholarships', 'advanced', {'limit': 20})
+    print("✅ Key covers query, depth and parameters")
+
+def test_memory_then_disk():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(tmp, ttl=60)
+        cache.put('k', RESULTS, query='scholarships')
+        assert cache.get('k') == RESULTS
+        assert cache.stats()['memory_hits'] == 1
+
+        # Another worker process has an empty memory tier but shares the directory
+        other = SearchCache(tmp, ttl=60)
+        assert other.get('k') == RESULTS
+        assert other.get('k') == RESULTS
+        stats = other.stats()
+        assert stats['disk_hits'] == 1 and stats['memory_hits'] == 1
+        assert other.get('missing') is None and other.stats()['misses'] == 1
+    print("✅ Memory hits, then disk hits promoted to memory")
+
+def test_entries_expire_on_their_own_ttl():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(tmp, ttl=60)
+        cache.put('short', RESULTS, ttl=0.05)
+        cache.put('long', RESULTS)
+        time.sleep(0.1)
+        assert cache.get('short') is None
+        assert cache.get('long') == RESULTS
+        # The expired file is removed when found on disk, too
+        assert SearchCache(tmp, ttl=60).get('short') is None
+        assert not os.path.exists(cache._path('short'))
+        cache.put('never', RESULTS, ttl=0)
+        assert cache.get('never') is None
+    print("✅ Entries expire on their own TTL")
+
+def test_memory_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(tmp, ttl=60, memory_entries=2)
+        cache.put('a', RESULTS)
+        cache.put('b', RESULTS)
+        cache.get('a')  # 'b' is now the least recently used
+        cache.put('c', RESULTS)
+        assert cache.stats()['memory_size'] == 2
+        assert cache.get('b') == RESULTS  # Still on disk
+        assert cache.stats()['disk_hits'] == 1
+    print("✅ Memory tier evicts the least recently used")
+
+def test_disk_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(tmp, ttl=60, memory_entries=1, disk_entries=10)
+        for n in range(10):
+            cache.put(f"key{n:02d}", RESULTS)
+            # mtime is the recency clock; keep it strictly increasing
+            os.utime(cache._path(f"key{n:02d}"), (n, n))
+        cache.put('key10', RESULTS)  # Over the limit: trims below it
+        stats = cache.stats()
+        assert stats['evictions'] == 2 and stats['disk_size'] == 9
+        assert not os.path.exists(cache._path('key00'))
+        assert not os.path.exists(cache._path('key01'))
+        assert os.path.exists(cache._path('key02'))
+    print("✅ Disk tier evicts the least recently used")
+
+def test_clear():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(tmp, ttl=60)
+        cache.put('k', RESULTS)
+        cache.clear()
+        assert cache.get('k') is None
+        assert cache.stats()['disk_size'] == 0
+    print("✅ Clear empties both tiers")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing the search cache")
+    print("=" * 50)
+    test_key_covers_query_depth_and_params()
+    test_memory_then_disk()
+    test_entries_expire_on_their_own_ttl()
+    test_memory_lru_eviction()
+    test_disk_lru_eviction()
+    test_clear()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
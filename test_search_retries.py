@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test script for Tavily request retries.
+
+Scripts the responses of a local stub server and checks which failures are
+retried, how Retry-After is honored and capped, and that a fan-out's
+deadline stops retries, without a Tavily key or network access.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from ml_agents import utils
+from ml_agents.fanout import FanOutExecutor
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers each POST with the next (status, headers, delay) in script, then 200s"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    script = []
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        with ScriptedHandler.lock:
+            ScriptedHandler.calls += 1
+            status, headers, delay = self.script.pop(0) if self.script else (200, {}, 0)
+        time.sleep(delay)
+        payload = json.dumps({'results': [{'title': 'Stub result'}]} if status == 200 else {}).encode()
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            pass  # The client stopped waiting
+
+    def log_message(self, *args):
+        pass
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+server.daemon_threads = True
+threading.Thread(target=server.serve_forever, daemon=True).start()
+URL = f"http://127.0.0.1:{server.server_port}/search"
+
+def respond(*script):
+    ScriptedHandler.script = list(script)
+    ScriptedHandler.calls = 0
+
+@contextmanager
+def settings(**values):
+    """Temporarily override ml_agents.utils configuration"""
+    saved = {name: getattr(utils, name) for name in values}
+    for name, value in values.items():
+        setattr(utils, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(utils, name, value)
+
+def post():
+    call = {'retries': 0}
+    response = utils.post_with_retries(URL, {'query': 'test'}, {}, call)
+    return response, call['retries']
+
+def response_with(retry_after):
+    response = requests.Response()
+    response.headers['Retry-After'] = retry_after
+    return response
+
+def test_retry_after_is_capped():
+    with settings(TAVILY_BACKOFF_MAX=10, TAVILY_BACKOFF_BASE=0.5):
+        assert utils.retry_delay(0, response_with('2')) == 2
+        assert utils.retry_delay(0, response_with('3600')) == 10
+        assert utils.retry_delay(0, response_with('-5')) == 0
+        assert 3 < utils.retry_delay(0, response_with(formatdate(time.time() + 5, usegmt=True))) <= 5
+        assert utils.retry_delay(0, response_with(formatdate(time.time() - 60, usegmt=True))) == 0
+        # Unparseable values fall back to full-jitter backoff
+        for attempt in range(8):
+            assert 0 <= utils.retry_delay(attempt, response_with('soon')) <= min(10, 0.5 * 2 ** attempt)
+    print("✅ Retry-After honored and capped")
+
+def test_transient_statuses_are_retried():
+    respond((429, {'Retry-After': '0'}, 0), (503, {'Retry-After': '0'}, 0))
+    response, retries = post()
+    assert response.status_code == 200 and retries == 2
+    assert ScriptedHandler.calls == 3
+    print("✅ 429 and 503 retried")
+
+def test_client_errors_are_not_retried():
+    respond((400, {}, 0))
+    try:
+        post()
+        raise AssertionError("a 400 was not raised")
+    except requests.exceptions.HTTPError as e:
+        assert e.response.status_code == 400
+    assert ScriptedHandler.calls == 1
+    print("✅ 400 not retried")
+
+def test_retries_run_out():
+    with settings(TAVILY_MAX_RETRIES=2):
+        respond(*[(503, {'Retry-After': '0'}, 0)] * 3)
+        try:
+            post()
+            raise AssertionError("exhausted retries did not raise")
+        except requests.exceptions.HTTPError as e:
+            assert e.response.status_code == 503
+    assert ScriptedHandler.calls == 3
+    print("✅ Last failure raised once retries run out")
+
+def test_read_timeout_is_retried():
+    with settings(TAVILY_READ_TIMEOUT=0.2, TAVILY_BACKOFF_BASE=0.01):
+        respond((200, {}, 1.0))
+        response, retries = post()
+    assert response.status_code == 200 and retries == 1
+    print("✅ Hung response retried after the read timeout")
+
+def test_fan_out_deadline_stops_retries():
+    fan_out = FanOutExecutor(max_workers=2, concurrency=2, query_timeout=0.5)
+    respond(*[(503, {'Retry-After': '1'}, 0.1)] * 4)
+    returned = []
+
+    def search(_):
+        started = time.monotonic()
+        try:
+            post()
+        finally:
+            returned.append(time.monotonic() - started)
+
+    try:
+        outcome = fan_out.map('retries', search, ['a', 'b'])
+        assert outcome.failed == 2
+        # Neither call waited a second to retry past the 0.5s it was given
+        assert len(returned) == 2 and max(returned) < 0.5
+        assert ScriptedHandler.calls == 2
+    finally:
+        fan_out.close()
+    print("✅ Fan-out deadline stops retries")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Tavily request retries")
+    print("=" * 50)
+    test_retry_after_is_capped()
+    test_transient_statuses_are_retried()
+    test_client_errors_are_not_retried()
+    test_retries_run_out()
+    test_read_timeout_is_retried()
+    test_fan_out_deadline_stops_retries()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
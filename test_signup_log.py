@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the append-only signup log.
+
+Checks that appends are fsynced and survive a torn line, and that
+compaction folds the log into the workbook once, even after an interrupted
+run, without needing the API server.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import pandas as pd
+import signup_log
+from signup_log import SignupLog, read_records
+
+def new_log(tmp):
+    return SignupLog(os.path.join(tmp, 'signups.ndjson'), os.path.join(tmp, 'all_users.xlsx'))
+
+def record(n):
+    return {'ID': n, 'Email': f"student{n}@test.com", 'First Name': 'Test'}
+
+def test_append_is_fsynced():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = new_log(tmp)
+        synced = []
+        fsync = signup_log.os.fsync
+        signup_log.os.fsync = lambda fd: (synced.append(fd), fsync(fd))
+        try:
+            log.append(record(1))
+            log.append(record(2))
+        finally:
+            signup_log.os.fsync = fsync
+        assert len(synced) == 2
+        assert [r['ID'] for r in read_records(log.log_path)] == [1, 2]
+        assert log.pending() == 2
+    print("✅ Appends are fsynced")
+
+def test_torn_line_is_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = new_log(tmp)
+        log.append(record(1))
+        # A crash mid-write leaves half a record without its newline
+        with open(log.log_path, 'ab') as handle:
+            handle.write(b'{"ID": 2, "Em')
+        log.append(record(3))
+        assert [r['ID'] for r in read_records(log.log_path)] == [1, 3]
+    print("✅ Torn line skipped")
+
+def test_compaction_folds_log_into_workbook():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = new_log(tmp)
+        assert log.compact() is None  # Nothing logged yet
+        log.append(record(1))
+        log.append(record(2))
+        assert log.compact() == log.workbook_path
+        assert not os.path.exists(log.log_path)
+        assert log.pending() == 0
+
+        log.append(record(3))
+        log.compact()
+        workbook = pd.read_excel(log.workbook_path)
+        assert list(workbook['ID']) == [1, 2, 3]
+        assert log.stats()['compactions'] == 2
+    print("✅ Compaction folds the log into the workbook")
+
+def test_interrupted_compaction_is_not_repeated():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = new_log(tmp)
+        log.append(record(1))
+        log.compact()
+
+        # A run that wrote the workbook but died before removing its .compacting file
+        log.append(record(2))
+        os.replace(log.log_path, log.compacting_path)
+        pd.DataFrame([record(1), record(2)]).to_excel(log.workbook_path, index=False)
+        log.append(record(3))
+        assert log.pending() == 2
+
+        log.compact()  # Folds the leftover .compacting file
+        log.compact()  # Then the records appended meanwhile
+        workbook = pd.read_excel(log.workbook_path)
+        assert list(workbook['ID']) == [1, 2, 3]
+        assert not os.path.exists(log.compacting_path)
+    print("✅ Interrupted compaction not repeated")
+
+def test_money_columns_are_numbers():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = SignupLog(os.path.join(tmp, 'signups.ndjson'), os.path.join(tmp, 'all_users.xlsx'),
+                        money_columns=['Monthly Income'])
+        # Records logged before amounts were numbers hold formatted text
+        log.append(dict(record(1), **{'Monthly Income': '$1,250.00'}))
+        log.append(dict(record(2), **{'Monthly Income': 0.0}))
+        log.compact()
+        workbook = pd.read_excel(log.workbook_path)
+        assert list(workbook['Monthly Income']) == [1250.0, 0.0]
+    print("✅ Money columns compacted as numbers")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing the signup log")
+    print("=" * 50)
+    test_append_is_fsynced()
+    test_torn_line_is_skipped()
+    test_compaction_folds_log_into_workbook()
+    test_interrupted_compaction_is_not_repeated()
+    test_money_columns_are_numbers()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
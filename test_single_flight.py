@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of opportunity fetches.
+
+Fires 100 concurrent cache misses from threads, asyncio tasks and a mix of
+both, and checks that the upstream fetch runs once, without the API server
+or a Tavily key.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ml_agents.single_flight import SingleFlight
+from ml_agents.student_agent import OpportunityCache
+
+CALLERS = 100
+
+class CountingFetch:
+    """Upstream stand-in that holds its one call open until every caller has joined"""
+
+    def __init__(self, flights, callers=CALLERS, error=None):
+        self.flights = flights
+        self.callers = callers
+        self.error = error
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        give_up = time.monotonic() + 5
+        while self.flights.stats()['calls'] < self.callers and time.monotonic() < give_up:
+            time.sleep(0.005)
+        if self.error:
+            raise self.error
+        return [{'title': 'Coalesced result'}]
+
+def new_cache(error=None, callers=CALLERS):
+    flights = SingleFlight()
+    fetch = CountingFetch(flights, callers, error)
+    return OpportunityCache({'Scholarships': fetch}, flights=flights), fetch, flights
+
+def run_threads(target, count):
+    results = [None] * count
+    def call(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_threads_share_one_fetch():
+    cache, fetch, flights = new_cache()
+    results = run_threads(lambda: cache.get('Scholarships'), CALLERS)
+    assert fetch.calls == 1
+    assert all(result['opportunities'] == [{'title': 'Coalesced result'}] for result in results)
+    assert flights.stats()['coalesced'] == CALLERS - 1
+    assert flights.stats()['in_flight'] == []
+
+def test_tasks_share_one_fetch():
+    cache, fetch, _ = new_cache()
+
+    async def main():
+        return await asyncio.gather(*(cache.get_async('Scholarships') for _ in range(CALLERS)))
+
+    results = asyncio.run(main())
+    assert fetch.calls == 1
+    assert all(result['opportunities'] == [{'title': 'Coalesced result'}] for result in results)
+
+def test_threads_and_tasks_share_one_fetch():
+    cache, fetch, _ = new_cache()
+    half = CALLERS // 2
+
+    async def main():
+        return await asyncio.gather(*(cache.get_async('Scholarships') for _ in range(half)))
+
+    task_results = []
+    loop_thread = threading.Thread(target=lambda: task_results.extend(asyncio.run(main())))
+    loop_thread.start()
+    thread_results = run_threads(lambda: cache.get('Scholarships'), CALLERS - half)
+    loop_thread.join()
+    assert fetch.calls == 1
+    assert len(task_results) + len(thread_results) == CALLERS
+    assert all(result['opportunities'] for result in task_results + thread_results)
+
+def test_failure_reaches_every_caller_and_is_not_kept():
+    cache, fetch, _ = new_cache(error=ConnectionError("upstream down"))
+    results = run_threads(lambda: cache.get('Scholarships'), CALLERS)
+    assert fetch.calls == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    # The failed flight is gone, so the next miss fetches again
+    cache.retry_after = 0
+    fetch.error = None
+    assert cache.get('Scholarships')['opportunities']
+    assert fetch.calls == 2
+
+def test_cancelled_waiter_leaves_flight_running():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return 'done'
+
+    async def main():
+        first = asyncio.ensure_future(flights.do_async('key', slow))
+        second = asyncio.ensure_future(flights.do_async('key', slow))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        release.set()
+        return await second
+
+    assert asyncio.run(main()) == 'done'
+    assert flights.stats()['executions'] == 1
+
+def test_coalesce_decorator():
+    flights = SingleFlight()
+    fetch = CountingFetch(flights)
+    decorated = flights.coalesce('scholarships')(fetch)
+    results = run_threads(decorated, CALLERS)
+    assert fetch.calls == 1
+    assert all(result == [{'title': 'Coalesced result'}] for result in results)
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing single-flight coalescing")
+    print("=" * 50)
+    for test in (test_threads_share_one_fetch, test_tasks_share_one_fetch,
+                 test_threads_and_tasks_share_one_fetch, test_failure_reaches_every_caller_and_is_not_kept,
+                 test_cancelled_waiter_leaves_flight_running, test_coalesce_decorator):
+        test()
+        print(f"✅ {test.__name__}")
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the read-through user cache.
+
+Checks LRU eviction and TTL expiry, lookups by id and email, and that
+profile updates and logins never leave a stale user in the cache, without
+needing the API server.
+"""
+import os
+import sys
+import time
+
+# Keep the module-level manager off disk and password hashing cheap
+os.environ.setdefault('WEALTHSAGE_DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+os.environ.setdefault('WRITE_BEHIND_FLUSH_MS', '0')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from cache import TTLCache, UserCache
+from database import DatabaseManager
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+    print("✅ LRU eviction")
+
+def test_ttl_expiry():
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.1)
+    assert cache.get('a') is None
+    assert not cache.replace('a', lambda value: value + 1)
+    assert cache.stats()['expirations'] == 1
+    print("✅ TTL expiry")
+
+def test_lookup_by_email_follows_id():
+    cache = UserCache(max_size=10, ttl=60)
+    cache.put({'id': 1, 'email': 'old@test.com', 'first_name': 'Test'})
+    assert cache.get_by_email('old@test.com')['id'] == 1
+
+    # Returned records are copies; callers cannot change the cached one
+    cache.get_by_id(1)['first_name'] = 'Changed'
+    assert cache.get_by_id(1)['first_name'] == 'Test'
+
+    # The email index is only a pointer; a record under a new email is not returned for the old one
+    cache.put({'id': 1, 'email': 'new@test.com', 'first_name': 'Test'})
+    assert cache.get_by_email('old@test.com') is None
+    assert cache.get_by_email('new@test.com')['id'] == 1
+
+    cache.invalidate(email='new@test.com')
+    assert cache.get_by_id(1) is None
+    print("✅ Lookup by email follows the id entry")
+
+def test_profile_update_invalidates():
+    manager = DatabaseManager("sqlite://")
+    try:
+        user = manager.create_user({
+            "email": "student@test.com",
+            "password": "testpass123",
+            "first_name": "Test",
+            "last_name": "Student",
+            "university": "Old University"
+        })
+        assert manager.get_user_by_id(user['id'])['university'] == "Old University"
+        hits = manager.user_cache_stats()['by_id']['hits']
+        assert manager.get_user_by_id(user['id'])['university'] == "Old University"
+        assert manager.user_cache_stats()['by_id']['hits'] == hits + 1
+
+        updated = manager.update_user_profile(user['id'], {'university': "New University"})
+        assert updated['university'] == "New University"
+        assert manager.get_user_by_id(user['id'])['university'] == "New University"
+        assert manager.get_user_by_email("student@test.com")['university'] == "New University"
+    finally:
+        manager.close()
+    print("✅ Profile update invalidates the cached user")
+
+def test_login_updates_cached_user():
+    manager = DatabaseManager("sqlite://")
+    try:
+        user = manager.create_user({
+            "email": "login@test.com",
+            "password": "testpass123",
+            "first_name": "Test",
+            "last_name": "Login"
+        })
+        assert manager.get_user_by_id(user['id'])['last_login'] is None
+        assert manager.authenticate_user("login@test.com", "testpass123")
+        # Still buffered, but the cached record already carries the stamp
+        assert manager.get_user_by_id(user['id'])['last_login'] is not None
+    finally:
+        manager.close()
+    print("✅ Login updates the cached user")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing the user cache")
+    print("=" * 50)
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_lookup_by_email_follows_id()
+    test_profile_update_invalidates()
+    test_login_updates_cached_user()
+    print("=" * 50)
+    print("✅ ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()